@@ -5,6 +5,7 @@ from .inventory import inventory_bp
 from .orders import orders_bp
 from .integrations import integrations_bp
 from .analytics import analytics_bp
+from .events import events_bp
 
 def init_routes(app: Flask):
     """
@@ -20,6 +21,7 @@ def init_routes(app: Flask):
     api_bp.register_blueprint(orders_bp)
     api_bp.register_blueprint(integrations_bp)
     api_bp.register_blueprint(analytics_bp)
+    api_bp.register_blueprint(events_bp)
     
     # Регистрируем основной Blueprint в приложении
     app.register_blueprint(api_bp) 
\ No newline at end of file
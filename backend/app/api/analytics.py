@@ -1,134 +1,167 @@
 from flask import Blueprint, jsonify, request, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
+from sqlalchemy import func
 
 from ..core.auth import admin_required, owner_required
+from ..core.errors import APIError, NotFoundError, ValidationAPIError
 from ..models.user import User
+from ..models.analytics import AnalyticsJob, ProductClassification, StockHealth, StockHealthStatus
 from ..models.inventory import Product
-from ..models.order import Order, OrderItem
 from ..db.session import db_session
-from ..services.ml_forecasting import get_forecaster
+from ..core.celery import celery
+from ..services.ml_forecasting import get_forecaster, restock_recommendations, is_training
+from ..services.demand_forecasts import get_horizon, get_stored_forecast, get_stored_demand, forecast_headers
+from ..services.top_products import top_products_cache
+from ..services.dashboard_stats import compute_dashboard_stats
+from ..services.category_distribution import compute_category_distribution
+from ..services.downsampling import downsample, DOWNSAMPLE_METHODS, MIN_POINTS
+from ..services.sales_trends import GRANULARITIES, get_timezone, build_sales_trends
+from ..services.reports import create_job, cancel_job
+from ..services.inventory_metrics import get_windows, query_inventory_metrics
+from ..services.inventory_valuation import get_valuation_summary
+from ..services.parquet_export import get_latest_manifest, export_relative_path
+from ..utils.file_delivery import send_protected_file
+from ..tasks.reports import run_report
+from ..tasks.inventory_analytics import classify_inventory, refresh_metrics, refresh_stock_health_task
+from ..services.analytics_cache import analytics_cache, cached_analytics, ORDERS, PRODUCTS
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 logger = logging.getLogger(__name__)
 
 @analytics_bp.route('/forecast/<int:product_id>', methods=['GET'])
 @owner_required
-def get_forecast(product_id):
+def get_forecast(current_user, product_id):
     """
     Получение прогноза запасов для конкретного продукта
+    
+    Прогноз читается из сохраненных прогнозов текущей версии модели; если они
+    еще не построены или запрошен горизонт больше сохраненного - рассчитывается
+    в запросе. Свежесть - в заголовках X-Forecast-*.
     """
     try:
         days = request.args.get('days', 30, type=int)
+        forecaster = get_forecaster()
         
         # Проверяем существование продукта
         with db_session() as session:
             product = session.query(Product).filter_by(id=product_id).first()
             if not product:
                 abort(404, description="Товар не найден")
+            
+            stored = None
+            if days <= get_horizon():
+                stored = get_stored_forecast(session, product_id, forecaster.model_version, days)
         
-        # Получаем прогноз
-        forecaster = get_forecaster()
-        forecasts = forecaster.predict_future_demand(product_id, days_ahead=days)
+        if stored is not None:
+            forecasts, generated_at = stored
+        else:
+            forecasts, generated_at = forecaster.predict_future_demand(product_id, days_ahead=days), None
         
-        return jsonify(forecasts)
+        response = jsonify(forecasts)
+        response.headers.update(forecast_headers(forecaster.model_version, generated_at))
+        return response
     except Exception as e:
         logger.error(f"Ошибка при получении прогноза: {str(e)}")
         abort(500, description=f"Ошибка при получении прогноза: {str(e)}")
 
 @analytics_bp.route('/restock-recommendations', methods=['GET'])
 @owner_required
-def get_restock_recommendations():
+def get_restock_recommendations(current_user):
     """
     Получение рекомендаций по пополнению запасов
     """
     try:
         forecaster = get_forecaster()
-        recommendations = forecaster.get_restock_recommendations()
         
-        return jsonify(recommendations)
+        with db_session() as session:
+            stored = get_stored_demand(session, forecaster.model_version, horizon=14)
+        
+        if stored is not None:
+            products, demand, generated_at = stored
+            recommendations = restock_recommendations(products, demand, horizon=14)
+        else:
+            recommendations, generated_at = forecaster.get_restock_recommendations(), None
+        
+        response = jsonify(recommendations)
+        response.headers.update(forecast_headers(forecaster.model_version, generated_at))
+        return response
     except Exception as e:
         logger.error(f"Ошибка при получении рекомендаций: {str(e)}")
         abort(500, description=f"Ошибка при получении рекомендаций: {str(e)}")
 
 @analytics_bp.route('/train-model', methods=['POST'])
 @owner_required
-def train_model():
+def train_model(current_user):
     """
-    Обучение модели прогнозирования
+    Запуск фонового обучения модели прогнозирования
+    
+    Обучение выполняется задачей Celery; одновременно идет не больше одного
+    обучения (409, если обучение уже выполняется). Возвращает задание:
+    статус и прогресс - GET /analytics/reports/<id>.
     """
-    try:
-        data = request.get_json() or {}
-        product_id = data.get('product_id')
-        
-        # Если product_id присутствует, преобразуем его к int
-        if product_id is not None:
+    data = request.get_json() or {}
+    product_id = data.get('product_id')
+    
+    # Если product_id присутствует, преобразуем его к int
+    if product_id is not None:
+        try:
             product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise ValidationAPIError("Некорректный идентификатор товара")
+    
+    if is_training():
+        raise APIError("Обучение модели уже выполняется", status_code=409)
+    
+    with db_session() as session:
+        if product_id is not None and not session.query(Product.id).filter_by(id=product_id).first():
+            raise NotFoundError("Товар не найден")
         
-        forecaster = get_forecaster()
-        success = forecaster.train(product_id=product_id)
-        
-        if not success:
-            abort(400, description="Недостаточно данных для обучения модели")
+        job = create_job(session, "train_model", {"product_id": product_id}, current_user.id, internal=True)
+        task = run_report.delay(job.id)
+        job.celery_task_id = task.id
+        session.commit()
         
-        return jsonify({"message": "Модель успешно обучена"})
-    except Exception as e:
-        logger.error(f"Ошибка при обучении модели: {str(e)}")
-        abort(500, description=f"Ошибка при обучении модели: {str(e)}")
+        response = jsonify(job.to_dict())
+        response.status_code = 202
+        response.headers['Location'] = f"{request.base_url.rsplit('/', 1)[0]}/reports/{job.id}"
+        return response
 
 @analytics_bp.route('/sales-trends', methods=['GET'])
 @jwt_required()
+@cached_analytics([ORDERS])
 def get_sales_trends():
     """
     Получение трендов продаж за указанный период
+    
+    Параметры: period (дни), granularity (hour, day, week, month), tz (часовой пояс IANA),
+    max_points и downsample (lttb, minmax) для прореживания длинных рядов
     """
+    period = request.args.get('period', 30, type=int)
+    granularity = request.args.get('granularity', 'day')
+    tz_name = request.args.get('tz', 'UTC')
+    max_points = request.args.get('max_points', type=int)
+    method = request.args.get('downsample', 'lttb')
+    
+    if granularity not in GRANULARITIES:
+        raise ValidationAPIError(f"Недопустимая гранулярность. Допустимые значения: {list(GRANULARITIES)}")
+    try:
+        get_timezone(tz_name)
+    except ValueError as e:
+        raise ValidationAPIError(str(e))
+    if max_points is not None and max_points < MIN_POINTS:
+        raise ValidationAPIError(f"max_points должен быть не меньше {MIN_POINTS}")
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValidationAPIError(f"Недопустимый метод прореживания. Допустимые значения: {list(DOWNSAMPLE_METHODS)}")
+    
     try:
-        period = request.args.get('period', 30, type=int)
-        
-        # Определение даты начала периода
-        start_date = datetime.now() - timedelta(days=period)
-        
         with db_session() as session:
-            # Получение заказов за период
-            orders = session.query(Order).filter(
-                Order.created_at >= start_date,
-                Order.order_type == 'outgoing',  # Только исходящие заказы (продажи)
-                Order.status.in_(['completed', 'processing'])  # Только завершенные и обрабатываемые заказы
-            ).all()
-            
-            # Группировка по дате
-            sales_by_date = {}
-            for order in orders:
-                date_str = order.created_at.strftime('%Y-%m-%d')
-                if date_str not in sales_by_date:
-                    sales_by_date[date_str] = {
-                        'date': date_str,
-                        'total_sales': 0,
-                        'order_count': 0
-                    }
-                
-                sales_by_date[date_str]['total_sales'] += order.total_amount
-                sales_by_date[date_str]['order_count'] += 1
+            result = build_sales_trends(session, period, granularity, tz_name)
             
-            # Заполнение пропущенных дат
-            result = []
-            current_date = start_date
-            end_date = datetime.now()
-            
-            while current_date <= end_date:
-                date_str = current_date.strftime('%Y-%m-%d')
-                if date_str in sales_by_date:
-                    result.append(sales_by_date[date_str])
-                else:
-                    result.append({
-                        'date': date_str,
-                        'total_sales': 0,
-                        'order_count': 0
-                    })
-                
-                current_date += timedelta(days=1)
+            if max_points is not None:
+                result = downsample(result, 'total_sales', max_points, method)
             
             return jsonify(result)
     except Exception as e:
@@ -137,41 +170,17 @@ def get_sales_trends():
 
 @analytics_bp.route('/category-distribution', methods=['GET'])
 @jwt_required()
+@cached_analytics([PRODUCTS], ttl_setting='CATEGORY_DISTRIBUTION_TTL_SECONDS')
 def get_category_distribution():
     """
     Получение распределения товаров по категориям
     """
     try:
+        supplier_id = request.args.get('supplier_id', type=int)
+        low_stock = request.args.get('low_stock', '').lower() in ('1', 'true')
+        
         with db_session() as session:
-            # Получение всех товаров
-            inventory_items = session.query(Product).all()
-            
-            # Группировка по категориям
-            categories = {}
-            for item in inventory_items:
-                if not item.category:
-                    continue
-                
-                category_name = item.category.name
-                if category_name not in categories:
-                    categories[category_name] = 0
-                
-                categories[category_name] += 1
-            
-            # Расчет процентного соотношения
-            total_items = sum(categories.values())
-            
-            result = []
-            for category, count in categories.items():
-                percentage = (count / total_items) * 100 if total_items > 0 else 0
-                result.append({
-                    'category': category,
-                    'value': count,
-                    'percentage': percentage
-                })
-            
-            # Сортировка по убыванию количества
-            result.sort(key=lambda x: x['value'], reverse=True)
+            result = compute_category_distribution(session, supplier_id, low_stock)
             
             return jsonify(result)
     except Exception as e:
@@ -180,49 +189,18 @@ def get_category_distribution():
 
 @analytics_bp.route('/top-products', methods=['GET'])
 @jwt_required()
+@cached_analytics([ORDERS])
 def get_top_products():
     """
     Получение топ продаваемых товаров за указанный период
     """
     try:
         period = request.args.get('period', 30, type=int)
-        
-        # Определение даты начала периода
-        start_date = datetime.now() - timedelta(days=period)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        offset = max(request.args.get('offset', 0, type=int), 0)
         
         with db_session() as session:
-            # Получение заказов за период
-            orders = session.query(Order).filter(
-                Order.created_at >= start_date,
-                Order.order_type == 'outgoing',  # Только исходящие заказы (продажи)
-                Order.status.in_(['completed', 'processing'])  # Только завершенные и обрабатываемые заказы
-            ).all()
-            
-            # Подсчет продаж по товарам
-            product_sales = {}
-            
-            for order in orders:
-                for item in order.items:
-                    product_id = item.product_id
-                    product = session.query(Product).filter_by(id=product_id).first()
-                    
-                    if not product:
-                        continue
-                    
-                    if product_id not in product_sales:
-                        product_sales[product_id] = {
-                            'product_id': product_id,
-                            'product_name': product.name,
-                            'quantity_sold': 0,
-                            'revenue': 0
-                        }
-                    
-                    product_sales[product_id]['quantity_sold'] += item.quantity
-                    product_sales[product_id]['revenue'] += item.quantity * item.unit_price
-            
-            # Преобразование в список и сортировка по выручке
-            result = list(product_sales.values())
-            result.sort(key=lambda x: x['revenue'], reverse=True)
+            result = top_products_cache.get(session, period, limit, offset)
             
             return jsonify(result)
     except Exception as e:
@@ -231,86 +209,339 @@ def get_top_products():
 
 @analytics_bp.route('/dashboard-stats', methods=['GET'])
 @jwt_required()
+@cached_analytics([ORDERS, PRODUCTS], ttl_setting='DASHBOARD_STATS_TTL_SECONDS')
 def get_dashboard_stats():
     """
     Получение статистики для панели управления
     """
     try:
-        # Определение дат для разных периодов
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=1)
-        start_of_month = datetime(today.year, today.month, 1).date()
-        start_of_prev_month = (datetime(today.year, today.month, 1) - timedelta(days=1)).replace(day=1).date()
-        end_of_prev_month = datetime(today.year, today.month, 1) - timedelta(days=1)
+        with db_session() as session:
+            stats = compute_dashboard_stats(session)
+            
+            return jsonify(stats)
+    except Exception as e:
+        logger.error(f"Ошибка при получении статистики: {str(e)}")
+        abort(500, description=f"Ошибка при получении статистики: {str(e)}")
+
+@analytics_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def get_cache_stats(current_user):
+    """
+    Статистика кэша результатов аналитики
+    """
+    return jsonify(analytics_cache.stats())
+
+def _get_user_job(session, job_id):
+    """Задание отчета текущего пользователя (404, если не найдено)"""
+    job = session.query(AnalyticsJob).filter_by(id=job_id, user_id=get_jwt_identity()).first()
+    if not job:
+        raise NotFoundError("Задание отчета не найдено")
+    return job
+
+@analytics_bp.route('/reports', methods=['POST'])
+@jwt_required()
+def create_report():
+    """
+    Запуск фонового построения отчета
+    
+    Тело запроса: {"type": "sales_trends" | "top_products" | "category_distribution" | "dashboard_stats" | "valuation", "params": {...}}
+    Возвращает идентификатор задания; статус и результат - GET /analytics/reports/<id>
+    """
+    data = request.get_json() or {}
+    
+    with db_session() as session:
+        try:
+            job = create_job(session, data.get('type'), data.get('params'), get_jwt_identity())
+        except ValueError as e:
+            raise ValidationAPIError(str(e))
+        
+        task = run_report.delay(job.id)
+        job.celery_task_id = task.id
+        session.commit()
+        
+        response = jsonify(job.to_dict())
+        response.status_code = 202
+        response.headers['Location'] = f"{request.base_url}/{job.id}"
+        return response
+
+@analytics_bp.route('/reports', methods=['GET'])
+@jwt_required()
+def get_reports():
+    """
+    Список заданий отчетов текущего пользователя
+    """
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    
+    with db_session() as session:
+        jobs = session.query(AnalyticsJob).filter_by(
+            user_id=get_jwt_identity()
+        ).order_by(AnalyticsJob.created_at.desc()).limit(limit).all()
         
+        return jsonify([job.to_dict() for job in jobs])
+
+@analytics_bp.route('/reports/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_report(job_id):
+    """
+    Статус, прогресс и (для завершенного задания) результат отчета
+    """
+    with db_session() as session:
+        job = _get_user_job(session, job_id)
+        
+        if job.expires_at and job.expires_at < datetime.utcnow():
+            raise APIError("Срок хранения результата отчета истек", status_code=410)
+        
+        return jsonify(job.to_dict(include_result=True))
+
+@analytics_bp.route('/reports/<int:job_id>', methods=['DELETE'])
+@jwt_required()
+def delete_report(job_id):
+    """
+    Отмена незавершенного задания или удаление завершенного
+    """
+    with db_session() as session:
+        job = _get_user_job(session, job_id)
+        
+        if cancel_job(session, job):
+            if job.celery_task_id:
+                # Задача, еще не взятая воркером, не будет запущена;
+                # выполняющаяся прервется при следующем обновлении прогресса
+                celery.control.revoke(job.celery_task_id)
+            return jsonify({"message": "Задание отчета отменено", "job": job.to_dict()})
+        
+        session.delete(job)
+        session.commit()
+        return jsonify({"message": "Задание отчета удалено"})
+
+@analytics_bp.route('/exports', methods=['GET'])
+@owner_required
+def get_latest_export(current_user):
+    """
+    Манифест последней выгрузки Parquet (список файлов по таблицам и разделам)
+    """
+    manifest = get_latest_manifest()
+    if manifest is None:
+        abort(404, description="Выгрузка еще не выполнялась")
+    
+    return jsonify(manifest)
+
+@analytics_bp.route('/exports/files/<path:file_path>', methods=['GET'])
+@owner_required
+def download_export_file(current_user, file_path):
+    """
+    Скачивание файла выгрузки Parquet
+    """
+    if not file_path.endswith('.parquet'):
+        abort(404, description="Файл не найден")
+    
+    download_name = file_path.replace('/', '_')
+    return send_protected_file(export_relative_path(file_path), download_name, 'application/vnd.apache.parquet')
+
+
+@analytics_bp.route('/abc-xyz', methods=['GET'])
+@jwt_required()
+def get_abc_xyz():
+    """
+    ABC/XYZ-классы товаров из последнего пересчета
+    
+    Параметры: abc, xyz - фильтр по классам (например, abc=A&xyz=Z), page, per_page
+    """
+    abc = request.args.get('abc', '').upper()
+    xyz = request.args.get('xyz', '').upper()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+    
+    if abc and abc not in ('A', 'B', 'C'):
+        raise ValidationAPIError("Недопустимый класс ABC. Допустимые значения: A, B, C")
+    if xyz and xyz not in ('X', 'Y', 'Z'):
+        raise ValidationAPIError("Недопустимый класс XYZ. Допустимые значения: X, Y, Z")
+    
+    try:
         with db_session() as session:
-            # Статистика продаж
-            sales_today = session.query(Order).filter(
-                Order.created_at >= datetime.combine(today, datetime.min.time()),
-                Order.order_type == 'outgoing',
-                Order.status.in_(['completed', 'processing'])
-            ).all()
+            # Матрица классов по всему каталогу (для сводной таблицы 3x3)
+            matrix_rows = session.query(
+                ProductClassification.abc_class,
+                ProductClassification.xyz_class,
+                func.count(ProductClassification.id)
+            ).group_by(ProductClassification.abc_class, ProductClassification.xyz_class).all()
+            computed_at = session.query(func.max(ProductClassification.computed_at)).scalar()
             
-            sales_yesterday = session.query(Order).filter(
-                Order.created_at >= datetime.combine(yesterday, datetime.min.time()),
-                Order.created_at < datetime.combine(today, datetime.min.time()),
-                Order.order_type == 'outgoing',
-                Order.status.in_(['completed', 'processing'])
-            ).all()
+            query = session.query(ProductClassification, Product.name, Product.sku).join(
+                Product, Product.id == ProductClassification.product_id
+            )
+            if abc:
+                query = query.filter(ProductClassification.abc_class == abc)
+            if xyz:
+                query = query.filter(ProductClassification.xyz_class == xyz)
             
-            sales_this_month = session.query(Order).filter(
-                Order.created_at >= datetime.combine(start_of_month, datetime.min.time()),
-                Order.order_type == 'outgoing',
-                Order.status.in_(['completed', 'processing'])
-            ).all()
+            total = query.count()
+            rows = query.order_by(
+                ProductClassification.revenue.desc(), ProductClassification.product_id
+            ).offset((page - 1) * per_page).limit(per_page).all()
             
-            sales_prev_month = session.query(Order).filter(
-                Order.created_at >= datetime.combine(start_of_prev_month, datetime.min.time()),
-                Order.created_at < datetime.combine(start_of_month, datetime.min.time()),
-                Order.order_type == 'outgoing',
-                Order.status.in_(['completed', 'processing'])
-            ).all()
+            items = []
+            for classification, name, sku in rows:
+                item = classification.to_dict()
+                item["product_name"] = name
+                item["sku"] = sku
+                items.append(item)
             
-            # Статистика запасов
-            total_inventory = session.query(Product).count()
-            low_stock_items = session.query(Product).filter(
-                Product.quantity <= Product.min_threshold
-            ).count()
+            return jsonify({
+                "items": items,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "matrix": {f"{a}{x}": count for a, x, count in matrix_rows},
+                "computed_at": computed_at.isoformat() if computed_at else None
+            })
+    except Exception as e:
+        logger.error(f"Ошибка при получении ABC/XYZ-классов: {str(e)}")
+        abort(500, description=f"Ошибка при получении ABC/XYZ-классов: {str(e)}")
+
+@analytics_bp.route('/abc-xyz/recalculate', methods=['POST'])
+@owner_required
+def recalculate_abc_xyz(current_user):
+    """
+    Внеплановый пересчет ABC/XYZ-классов (выполняется задачей Celery)
+    """
+    data = request.get_json() or {}
+    weeks = data.get('weeks')
+    if weeks is not None and (not isinstance(weeks, int) or weeks < 1):
+        raise ValidationAPIError("Окно классификации должно быть положительным числом недель")
+    
+    task = classify_inventory.delay(weeks)
+    return jsonify({"message": "Пересчет ABC/XYZ-классов запущен", "task_id": task.id}), 202
+
+@analytics_bp.route('/inventory-metrics', methods=['GET'])
+@jwt_required()
+def get_inventory_metrics():
+    """
+    Оборачиваемость, дни запаса и sell-through по товарам или категориям
+    
+    Параметры: scope (product | category), window (дни, одно из INVENTORY_METRICS_WINDOWS),
+    sort (показатель), order (asc | desc), limit, cursor (next_cursor предыдущей страницы),
+    category_id (для scope=product)
+    """
+    windows = get_windows()
+    window = request.args.get('window', windows[0], type=int)
+    if window not in windows:
+        raise ValidationAPIError(f"Недопустимое окно. Допустимые значения: {list(windows)}")
+    
+    order = request.args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValidationAPIError("Недопустимый порядок сортировки. Допустимые значения: asc, desc")
+    
+    with db_session() as session:
+        try:
+            result = query_inventory_metrics(
+                session,
+                scope=request.args.get('scope', 'product'),
+                window_days=window,
+                sort=request.args.get('sort', 'turnover'),
+                descending=order == 'desc',
+                limit=min(max(request.args.get('limit', 50, type=int), 1), 500),
+                cursor=request.args.get('cursor'),
+                category_id=request.args.get('category_id', type=int)
+            )
+        except ValueError as e:
+            raise ValidationAPIError(str(e))
+        
+        result["window_days"] = window
+        return jsonify(result)
+
+@analytics_bp.route('/inventory-metrics/recalculate', methods=['POST'])
+@owner_required
+def recalculate_inventory_metrics(current_user):
+    """
+    Внеплановый пересчет показателей оборачиваемости (выполняется задачей Celery)
+    """
+    task = refresh_metrics.delay()
+    return jsonify({"message": "Пересчет показателей оборачиваемости запущен", "task_id": task.id}), 202
+
+@analytics_bp.route('/valuation', methods=['GET'])
+@owner_required
+@cached_analytics([PRODUCTS])
+def get_valuation(current_user):
+    """
+    Оценка запасов на текущий момент по средневзвешенной себестоимости и FIFO
+    
+    Параметры: by_category - добавить разбивку по категориям
+    """
+    by_category = request.args.get('by_category', '').lower() in ('1', 'true')
+    
+    try:
+        with db_session() as session:
+            return jsonify(get_valuation_summary(session, by_category=by_category))
+    except Exception as e:
+        logger.error(f"Ошибка при расчете оценки запасов: {str(e)}")
+        abort(500, description=f"Ошибка при расчете оценки запасов: {str(e)}")
+
+@analytics_bp.route('/stock-health', methods=['GET'])
+@jwt_required()
+def get_stock_health():
+    """
+    Неликвидные и медленно оборачиваемые товары из последнего пересчета
+    
+    Параметры: status (dead | slow | healthy, по умолчанию dead и slow), page, per_page
+    Сортировка по стоимости запаса (сначала самые дорогие)
+    """
+    status = request.args.get('status')
+    statuses = [s.value for s in StockHealthStatus]
+    if status and status not in statuses:
+        raise ValidationAPIError(f"Недопустимый статус. Допустимые значения: {statuses}")
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+    
+    try:
+        with db_session() as session:
+            summary_rows = session.query(
+                StockHealth.status,
+                func.count(StockHealth.id),
+                func.coalesce(func.sum(StockHealth.stock_value), 0)
+            ).group_by(StockHealth.status).all()
+            computed_at = session.query(func.max(StockHealth.computed_at)).scalar()
             
-            # Статистика заказов
-            pending_orders = session.query(Order).filter(
-                Order.status == 'pending'
-            ).count()
+            query = session.query(StockHealth, Product.name, Product.sku).join(
+                Product, Product.id == StockHealth.product_id
+            )
+            if status:
+                query = query.filter(StockHealth.status == status)
+            else:
+                query = query.filter(StockHealth.status != StockHealthStatus.HEALTHY.value)
             
-            # Расчет значений
-            total_sales_today = sum(order.total_amount for order in sales_today)
-            total_sales_yesterday = sum(order.total_amount for order in sales_yesterday)
-            total_sales_this_month = sum(order.total_amount for order in sales_this_month)
-            total_sales_prev_month = sum(order.total_amount for order in sales_prev_month)
+            total = query.count()
+            rows = query.order_by(
+                StockHealth.stock_value.desc(), StockHealth.product_id
+            ).offset((page - 1) * per_page).limit(per_page).all()
             
-            # Расчет изменений в процентах
-            sales_change_daily = ((total_sales_today - total_sales_yesterday) / total_sales_yesterday * 100) if total_sales_yesterday > 0 else 0
-            sales_change_monthly = ((total_sales_this_month - total_sales_prev_month) / total_sales_prev_month * 100) if total_sales_prev_month > 0 else 0
+            items = []
+            for health, name, sku in rows:
+                item = health.to_dict()
+                item["product_name"] = name
+                item["sku"] = sku
+                items.append(item)
             
             return jsonify({
-                "sales": {
-                    "today": total_sales_today,
-                    "yesterday": total_sales_yesterday,
-                    "this_month": total_sales_this_month,
-                    "prev_month": total_sales_prev_month,
-                    "daily_change_percent": sales_change_daily,
-                    "monthly_change_percent": sales_change_monthly
+                "items": items,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "summary": {
+                    row_status: {"products": count, "stock_value": round(float(value), 2)}
+                    for row_status, count, value in summary_rows
                 },
-                "inventory": {
-                    "total_items": total_inventory,
-                    "low_stock_items": low_stock_items,
-                    "low_stock_percent": (low_stock_items / total_inventory * 100) if total_inventory > 0 else 0
-                },
-                "orders": {
-                    "pending_count": pending_orders,
-                    "today_count": len(sales_today)
-                }
+                "computed_at": computed_at.isoformat() if computed_at else None
             })
     except Exception as e:
-        logger.error(f"Ошибка при получении статистики: {str(e)}")
-        abort(500, description=f"Ошибка при получении статистики: {str(e)}") 
\ No newline at end of file
+        logger.error(f"Ошибка при получении состояния запасов: {str(e)}")
+        abort(500, description=f"Ошибка при получении состояния запасов: {str(e)}")
+
+@analytics_bp.route('/stock-health/recalculate', methods=['POST'])
+@owner_required
+def recalculate_stock_health(current_user):
+    """
+    Внеплановый поиск неликвидов (выполняется задачей Celery)
+    """
+    task = refresh_stock_health_task.delay()
+    return jsonify({"message": "Пересчет состояния запасов запущен", "task_id": task.id}), 202
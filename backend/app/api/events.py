@@ -0,0 +1,114 @@
+import queue
+import time
+
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
+from flask_jwt_extended import decode_token, verify_jwt_in_request, get_jwt_identity
+
+from app.models import User, OutboxEvent, OutboxStatus
+from app.db.session import db
+from app.services.event_stream import event_broker, format_sse, is_visible, STREAM_EVENT_TYPES
+
+# Создание Blueprint для потока событий
+events_bp = Blueprint('events', __name__, url_prefix='/events')
+
+
+def _stream_user():
+    """
+    Пользователь потока событий
+
+    EventSource в браузере не умеет передавать заголовки, поэтому
+    кроме заголовка Authorization принимается параметр ?token=
+    (только токен доступа, не токен обновления)
+    """
+    token = request.args.get('token')
+    if token:
+        decoded = decode_token(token)
+        if decoded.get('type') != 'access':
+            raise ValueError("Для потока событий требуется токен доступа")
+        user_id = decoded[current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]
+    else:
+        verify_jwt_in_request()
+        user_id = get_jwt_identity()
+    return db.session.query(User).get(user_id)
+
+
+def _replay_events(last_event_id, limit):
+    """События, пропущенные клиентом при переподключении (по Last-Event-ID)"""
+    events = OutboxEvent.query.filter(
+        OutboxEvent.id > last_event_id,
+        OutboxEvent.status == OutboxStatus.SENT.value,
+        OutboxEvent.event_type.in_(STREAM_EVENT_TYPES)
+    ).order_by(OutboxEvent.id).limit(limit).all()
+    return [event.to_message() for event in events]
+
+
+@events_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    Поток изменений заказов и остатков (text/event-stream)
+
+    Соединение закрывается через EVENTS_STREAM_MAX_SECONDS, после чего
+    EventSource переподключается и получает пропущенные события по Last-Event-ID.
+    """
+    try:
+        user = _stream_user()
+    except Exception:
+        return jsonify({"message": "Недействительный токен"}), 401
+
+    if not user:
+        return jsonify({"message": "Пользователь не найден"}), 401
+
+    if not user.is_active:
+        return jsonify({"message": "Аккаунт деактивирован"}), 403
+
+    user_id = user.id
+    role = user.role
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT_SECONDS', 15)
+    max_seconds = current_app.config.get('EVENTS_STREAM_MAX_SECONDS', 600)
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id', type=int), type=int)
+
+    # Подписка до чтения пропущенных событий, чтобы не потерять события между ними
+    subscriber = event_broker.subscribe()
+    replay = []
+    if last_event_id is not None:
+        try:
+            replay = _replay_events(last_event_id, current_app.config.get('EVENTS_REPLAY_LIMIT', 200))
+        except Exception:
+            event_broker.unsubscribe(subscriber)
+            raise
+
+    # Соединение с БД не должно удерживаться на все время потока
+    db.session.close()
+
+    def generate():
+        replayed = {message['id'] for message in replay}
+        try:
+            yield f"retry: {current_app.config.get('EVENTS_RETRY_MS', 5000)}\n\n"
+            for message in replay:
+                if is_visible(message, user_id, role):
+                    yield format_sse(message)
+
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                try:
+                    message = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Комментарий держит соединение открытым через прокси
+                    yield ": ping\n\n"
+                    continue
+
+                if message['id'] in replayed or not is_visible(message, user_id, role):
+                    continue
+                yield format_sse(message)
+        finally:
+            event_broker.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Отключает буферизацию ответа в nginx для этого запроса
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -1,11 +1,17 @@
+from datetime import datetime, timedelta
+
+import numpy as np
 from flask import Blueprint, request, jsonify, current_app
 from marshmallow import ValidationError
 from sqlalchemy import or_
 
-from app.models import Product, Category, Supplier, InventoryLog
+from app.models import Product, Category, Supplier, InventoryLog, OrderItem
 from app.core.auth import token_required, owner_required
 from app.core.errors import NotFoundError
 from app.db.session import db
+from app.services.events import record_stock_changed
+from app.services import inventory_valuation
+from app.services.downsampling import downsample, DOWNSAMPLE_METHODS, MIN_POINTS
 
 # Создание Blueprint для инвентаря
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
@@ -278,9 +284,10 @@ def create_product(current_user):
             category_id=data.get('category_id'),
             supplier_id=data.get('supplier_id')
         )
-        product.save()
+        db.session.add(product)
+        db.session.flush()
         
-        # Создание лога изменения запасов
+        # Создание лога изменения запасов и события в той же транзакции
         if data['quantity'] > 0:
             log = InventoryLog(
                 product_id=product.id,
@@ -288,7 +295,13 @@ def create_product(current_user):
                 quantity_change=data['quantity'],
                 comment="Начальное поступление товара"
             )
-            log.save()
+            db.session.add(log)
+            record_stock_changed(db.session, product, 0, reason="product_created")
+            inventory_valuation.apply_stock_change(
+                db.session, product, 0, source="product_created", unit_cost=data.get('unit_cost')
+            )
+        
+        db.session.commit()
         
         product_schema = current_app.config['SCHEMAS']["product_schema"]
         return jsonify({
@@ -299,6 +312,7 @@ def create_product(current_user):
     except ValidationError as e:
         return jsonify({"message": "Ошибка валидации данных", "errors": e.messages}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
 
@@ -333,6 +347,9 @@ def update_product(current_user, product_id):
         product_update_schema = current_app.config['SCHEMAS']["product_update_schema"]
         data = product_update_schema.load(json_data)
         
+        # Закупочная цена относится к поступлению, а не к полям товара
+        unit_cost = data.pop('unit_cost', None)
+        
         # Проверка изменения количества
         old_quantity = product.quantity
         new_quantity = data.get('quantity', old_quantity)
@@ -342,9 +359,9 @@ def update_product(current_user, product_id):
         for key, value in data.items():
             setattr(product, key, value)
         
-        product.save()
+        db.session.add(product)
         
-        # Создание лога изменения запасов при изменении количества
+        # Создание лога изменения запасов и события при изменении количества
         if quantity_change != 0:
             log = InventoryLog(
                 product_id=product.id,
@@ -352,7 +369,13 @@ def update_product(current_user, product_id):
                 quantity_change=quantity_change,
                 comment=data.get('comment', "Обновление количества товара")
             )
-            log.save()
+            db.session.add(log)
+            record_stock_changed(db.session, product, old_quantity, reason="product_updated")
+            inventory_valuation.apply_stock_change(
+                db.session, product, old_quantity, source="product_updated", unit_cost=unit_cost
+            )
+        
+        db.session.commit()
         
         product_schema = current_app.config['SCHEMAS']["product_schema"]
         return jsonify({
@@ -363,6 +386,7 @@ def update_product(current_user, product_id):
     except ValidationError as e:
         return jsonify({"message": "Ошибка валидации данных", "errors": e.messages}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
 
@@ -375,8 +399,8 @@ def delete_product(current_user, product_id):
     if not product:
         raise NotFoundError("Товар не найден")
     
-    # Проверка, используется ли товар в заказах
-    if product.order_items.count() > 0:
+    # Проверка, используется ли товар в заказах (по индексу order_items(product_id, order_id))
+    if OrderItem.count_orders_by_product(db.session, [product.id]):
         return jsonify({
             "message": "Нельзя удалить товар, связанный с заказами"
         }), 400
@@ -402,6 +426,57 @@ def get_product_logs(current_user, product_id):
     return jsonify(inventory_logs_schema.dump(logs)), 200
 
 
+@inventory_bp.route('/products/<int:product_id>/stock-history', methods=['GET'])
+@token_required
+def get_stock_history(current_user, product_id):
+    """
+    История остатка товара для графика
+    
+    Остаток после каждой записи лога восстанавливается от текущего количества
+    (отгрузки и возвраты по заказам тоже пишутся в лог).
+    Параметры: days (период), max_points и downsample (lttb, minmax) для прореживания
+    """
+    product = Product.query.get(product_id)
+    
+    if not product:
+        raise NotFoundError("Товар не найден")
+    
+    days = request.args.get('days', type=int)
+    max_points = request.args.get('max_points', type=int)
+    method = request.args.get('downsample', 'lttb')
+    
+    if max_points is not None and max_points < MIN_POINTS:
+        return jsonify({"message": f"max_points должен быть не меньше {MIN_POINTS}"}), 400
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({"message": f"Недопустимый метод прореживания. Допустимые значения: {list(DOWNSAMPLE_METHODS)}"}), 400
+    
+    rows = db.session.query(
+        InventoryLog.created_at, InventoryLog.quantity_change
+    ).filter(
+        InventoryLog.product_id == product_id
+    ).order_by(InventoryLog.created_at, InventoryLog.id).all()
+    
+    # Остаток после записи = текущий остаток - сумма всех последующих изменений
+    changes = np.fromiter((change for _, change in rows), dtype=np.int64, count=len(rows))
+    levels = product.quantity - (changes.sum() - np.cumsum(changes))
+    
+    start = datetime.utcnow() - timedelta(days=days) if days is not None else None
+    history = [
+        {
+            "timestamp": created_at.isoformat(),
+            "time": created_at.timestamp(),
+            "quantity": int(level)
+        }
+        for (created_at, _), level in zip(rows, levels)
+        if start is None or created_at >= start
+    ]
+    
+    if max_points is not None:
+        history = downsample(history, "quantity", max_points, method, x_key="time")
+    
+    return jsonify(history), 200
+
+
 @inventory_bp.route('/low_stock', methods=['GET'])
 @token_required
 def get_low_stock(current_user):
@@ -3,51 +3,179 @@ import uuid
 from flask import Blueprint, request, jsonify, current_app
 from marshmallow import ValidationError
 from datetime import datetime
+from sqlalchemy import func, literal
 
-from app.models import Order, OrderItem, OrderFile, Product, OrderStatus
+from app.models import Order, OrderItem, OrderFile, Product, InventoryLog, OrderStatus, UserRole, ArchivedOrder, ArchivedOrderItem
 from app.core.auth import token_required, owner_required
 from app.core.errors import NotFoundError, ValidationAPIError
 from app.db.session import db
+from app.utils.file_delivery import send_protected_file
+from app.services.events import record_order_created, record_order_status_changed, record_stock_changed
+from app.services.order_archive import reaches_archive
+from app.services import sales_rollup, inventory_valuation
 
 # Создание Blueprint для заказов
 orders_bp = Blueprint('orders', __name__, url_prefix='/orders')
 
+def _apply_order_filters(query, model, current_user, supplier_id=None, status=None, start=None, end=None):
+    """Общие фильтры списка заказов (для рабочей и архивной таблиц)"""
+    # Фильтрация по пользователю (только для обычных сотрудников)
+    if current_user.role == UserRole.EMPLOYEE.value:
+        query = query.filter(model.user_id == current_user.id)
+    
+    if supplier_id:
+        query = query.filter(model.supplier_id == supplier_id)
+    
+    if status:
+        query = query.filter(model.status == status)
+    
+    if start:
+        query = query.filter(model.created_at >= start)
+    
+    if end:
+        query = query.filter(model.created_at <= end)
+    
+    return query
+
+
 @orders_bp.route('/', methods=['GET'])
 @token_required
 def get_orders(current_user):
     """Получение списка заказов с фильтрацией"""
-    query = Order.query
-    
-    # Фильтрация по пользователю (только для обычных сотрудников)
-    if current_user.role.value == 'employee':
-        query = query.filter_by(user_id=current_user.id)
-    
     # Фильтрация по параметрам
     supplier_id = request.args.get('supplier_id')
     status = request.args.get('status')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    if supplier_id:
-        query = query.filter_by(supplier_id=supplier_id)
-    
-    if status:
-        query = query.filter_by(status=status)
-    
-    if start_date:
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        query = query.filter(Order.created_at >= start)
+    start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
     
-    if end_date:
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        query = query.filter(Order.created_at <= end)
+    query = _apply_order_filters(Order.query, Order, current_user, supplier_id, status, start, end)
     
     # Сортировка
     query = query.order_by(Order.created_at.desc())
     
     orders = query.all()
     orders_schema = current_app.config['SCHEMAS']["orders_schema"]
-    return jsonify(orders_schema.dump(orders)), 200
+    result = orders_schema.dump(orders)
+    
+    # Архив читается только если фильтр по дате заходит в архивный период
+    if reaches_archive(start, end):
+        archived_query = _apply_order_filters(
+            ArchivedOrder.query, ArchivedOrder, current_user, supplier_id, status, start, end
+        ).order_by(ArchivedOrder.created_at.desc())
+        
+        archived_orders_schema = current_app.config['SCHEMAS']["archived_orders_schema"]
+        result.extend(archived_orders_schema.dump(archived_query.all()))
+        result.sort(key=lambda order: order.get('created_at') or '', reverse=True)
+    
+    return jsonify(result), 200
+
+
+def _orders_by_product_query(order_model, item_model, product_id, current_user, status, start, end, archived):
+    """Заказы с товаром и количеством товара в заказе (для рабочей и архивной таблиц)"""
+    query = db.session.query(
+        order_model.id.label('id'),
+        order_model.order_number.label('order_number'),
+        order_model.order_type.label('order_type'),
+        order_model.status.label('status'),
+        order_model.total_amount.label('total_amount'),
+        order_model.created_at.label('created_at'),
+        func.sum(item_model.quantity).label('product_quantity'),
+        literal(archived).label('archived')
+    ).join(
+        item_model, item_model.order_id == order_model.id
+    ).filter(
+        item_model.product_id == product_id
+    )
+    
+    query = _apply_order_filters(query, order_model, current_user, status=status, start=start, end=end)
+    return query.group_by(order_model.id)
+
+
+@orders_bp.route('/by-product', methods=['GET'])
+@token_required
+def get_orders_by_product(current_user):
+    """Получение заказов, содержащих товар (по product_id или sku), с фильтрацией и пагинацией"""
+    product_id = request.args.get('product_id', type=int)
+    sku = request.args.get('sku')
+    
+    if not product_id and not sku:
+        return jsonify({"message": "Необходимо указать product_id или sku"}), 400
+    
+    if not product_id:
+        product = Product.query.filter_by(sku=sku).first()
+        if not product:
+            raise NotFoundError("Товар не найден")
+        product_id = product.id
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+    
+    status = request.args.get('status')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+    
+    # Поиск идет по индексу order_items(product_id, order_id)
+    query = _orders_by_product_query(Order, OrderItem, product_id, current_user, status, start, end, False)
+    
+    # Архив подключается только если фильтр по дате заходит в архивный период
+    if reaches_archive(start, end):
+        query = query.union_all(_orders_by_product_query(
+            ArchivedOrder, ArchivedOrderItem, product_id, current_user, status, start, end, True
+        ))
+    
+    subquery = query.subquery()
+    total = db.session.query(func.count()).select_from(subquery).scalar()
+    rows = db.session.query(subquery).order_by(
+        subquery.c.created_at.desc(), subquery.c.id.desc()
+    ).offset((page - 1) * per_page).limit(per_page).all()
+    
+    return jsonify({
+        "product_id": product_id,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "orders": [
+            {
+                "id": row.id,
+                "order_number": row.order_number,
+                "order_type": row.order_type,
+                "status": row.status,
+                "total_amount": row.total_amount,
+                "product_quantity": int(row.product_quantity or 0),
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "archived": bool(row.archived)
+            }
+            for row in rows
+        ]
+    }), 200
+
+
+@orders_bp.route('/product-counts', methods=['GET'])
+@token_required
+def get_product_order_counts(current_user):
+    """Количество заказов по товарам (product_ids - список ID через запятую)"""
+    raw_ids = request.args.get('product_ids', '')
+    
+    try:
+        product_ids = [int(value) for value in raw_ids.split(',') if value.strip()]
+    except ValueError:
+        return jsonify({"message": "product_ids должен содержать числа через запятую"}), 400
+    
+    if not product_ids:
+        return jsonify({"message": "Необходимо указать product_ids"}), 400
+    
+    counts = OrderItem.count_orders_by_product(db.session, product_ids)
+    
+    return jsonify({
+        str(product_id): counts.get(product_id, 0)
+        for product_id in product_ids
+    }), 200
 
 
 @orders_bp.route('/', methods=['POST'])
@@ -71,7 +199,7 @@ def create_order(current_user):
             order_number=order_number,
             user_id=current_user.id,
             supplier_id=data['supplier_id'],
-            status=OrderStatus.PENDING,
+            status=OrderStatus.PENDING.value,
             shipping_address=data.get('shipping_address'),
             notes=data.get('notes'),
             expected_delivery_date=data.get('expected_delivery_date')
@@ -93,13 +221,17 @@ def create_order(current_user):
                 quantity=item_data['quantity'],
                 unit_price=item_data['unit_price']
             )
+            order_item.snapshot_product(product)
             order.items.append(order_item)
         
         # Расчет общей суммы заказа
         order.calculate_total()
         
-        # Сохранение заказа
+        # Сохранение заказа вместе с событием в одной транзакции
         db.session.add(order)
+        db.session.flush()
+        record_order_created(db.session, order)
+        sales_rollup.apply_order(db.session, order)
         db.session.commit()
         
         order_schema = current_app.config['SCHEMAS']["order_schema"]
@@ -122,15 +254,20 @@ def create_order(current_user):
 def get_order(current_user, order_id):
     """Получение информации о заказе"""
     order = Order.query.get(order_id)
+    order_schema = current_app.config['SCHEMAS']["order_schema"]
+    
+    # Заказ мог быть перенесен в архив (поиск по первичному ключу)
+    if not order:
+        order = ArchivedOrder.query.get(order_id)
+        order_schema = current_app.config['SCHEMAS']["archived_order_schema"]
     
     if not order:
         raise NotFoundError("Заказ не найден")
     
     # Проверка доступа (только владельцы и админы могут просматривать чужие заказы)
-    if current_user.role.value == 'employee' and order.user_id != current_user.id:
+    if current_user.role == UserRole.EMPLOYEE.value and order.user_id != current_user.id:
         return jsonify({"message": "Доступ запрещен"}), 403
     
-    order_schema = current_app.config['SCHEMAS']["order_schema"]
     return jsonify(order_schema.dump(order)), 200
 
 
@@ -144,7 +281,7 @@ def update_order_status(current_user, order_id):
         raise NotFoundError("Заказ не найден")
     
     # Проверка доступа (только владельцы и админы могут обновлять статус)
-    if current_user.role.value == 'employee' and order.user_id != current_user.id:
+    if current_user.role == UserRole.EMPLOYEE.value and order.user_id != current_user.id:
         return jsonify({"message": "Доступ запрещен"}), 403
     
     try:
@@ -160,29 +297,61 @@ def update_order_status(current_user, order_id):
         except ValueError:
             return jsonify({"message": f"Недопустимый статус. Допустимые значения: {[status.value for status in OrderStatus]}"}), 400
         
+        # Статус до изменения (нужен для проверок и события)
+        old_status = order.status
+        
         # Обновление статуса
-        order.status = new_status
+        order.status = new_status.value
         
         # Уменьшение количества товаров при отправке заказа
-        if new_status == OrderStatus.SHIPPED and order.status != OrderStatus.SHIPPED:
+        if new_status == OrderStatus.SHIPPED and old_status != OrderStatus.SHIPPED.value:
             for item in order.items:
                 product = item.product
                 if product.quantity < item.quantity:
+                    db.session.rollback()
                     return jsonify({
                         "message": f"Недостаточное количество товара {product.name} (доступно: {product.quantity}, требуется: {item.quantity})"
                     }), 400
                 
+                old_quantity = product.quantity
                 product.quantity -= item.quantity
                 db.session.add(product)
+                db.session.add(InventoryLog(
+                    product_id=product.id,
+                    user_id=current_user.id,
+                    quantity_change=-item.quantity,
+                    comment=f"Отгрузка заказа #{order.id}",
+                    order_id=order.id
+                ))
+                record_stock_changed(db.session, product, old_quantity, reason=f"order_shipped:{order.id}")
+                inventory_valuation.apply_stock_change(
+                    db.session, product, old_quantity, source="order_shipped", reference=str(order.id)
+                )
         
         # Возврат товаров в случае отмены заказа
-        if new_status == OrderStatus.CANCELLED and order.status == OrderStatus.SHIPPED:
+        if new_status == OrderStatus.CANCELLED and old_status == OrderStatus.SHIPPED.value:
             for item in order.items:
                 product = item.product
+                old_quantity = product.quantity
                 product.quantity += item.quantity
                 db.session.add(product)
+                db.session.add(InventoryLog(
+                    product_id=product.id,
+                    user_id=current_user.id,
+                    quantity_change=item.quantity,
+                    comment=f"Возврат по отмене заказа #{order.id}",
+                    order_id=order.id
+                ))
+                record_stock_changed(db.session, product, old_quantity, reason=f"order_cancelled:{order.id}")
+                # Возвращенные единицы принимаются по текущей средней себестоимости
+                inventory_valuation.apply_stock_change(
+                    db.session, product, old_quantity, source="order_cancelled", reference=str(order.id)
+                )
         
         db.session.add(order)
+        if old_status != new_status.value:
+            record_order_status_changed(db.session, order, old_status)
+            sales_rollup.apply_order(db.session, order, old_status=old_status)
         db.session.commit()
         
         order_schema = current_app.config['SCHEMAS']["order_schema"]
@@ -206,7 +375,7 @@ def upload_order_file(current_user, order_id):
         raise NotFoundError("Заказ не найден")
     
     # Проверка доступа (только владельцы и админы могут загружать файлы)
-    if current_user.role.value == 'employee' and order.user_id != current_user.id:
+    if current_user.role == UserRole.EMPLOYEE.value and order.user_id != current_user.id:
         return jsonify({"message": "Доступ запрещен"}), 403
     
     try:
@@ -255,6 +424,26 @@ def upload_order_file(current_user, order_id):
         return jsonify({"message": str(e)}), 400
 
 
+@orders_bp.route('/<int:order_id>/files/<int:file_id>/download', methods=['GET'])
+@token_required
+def download_order_file(current_user, order_id, file_id):
+    """Скачивание файла, прикрепленного к заказу"""
+    order_file = OrderFile.query.filter_by(id=file_id, order_id=order_id).first()
+    
+    if not order_file:
+        raise NotFoundError("Файл не найден")
+    
+    # Проверка доступа (сотрудники могут скачивать только файлы своих заказов)
+    if current_user.role == UserRole.EMPLOYEE.value and order_file.order.user_id != current_user.id:
+        return jsonify({"message": "Доступ запрещен"}), 403
+    
+    return send_protected_file(
+        order_file.file_path,
+        download_name=order_file.filename,
+        mimetype=order_file.file_type
+    )
+
+
 @orders_bp.route('/<int:order_id>', methods=['DELETE'])
 @owner_required
 def delete_order(current_user, order_id):
@@ -266,6 +455,7 @@ def delete_order(current_user, order_id):
     
     try:
         # Удаление заказа (каскадное удаление элементов и файлов настроено в модели)
+        sales_rollup.remove_order(db.session, order)
         db.session.delete(order)
         db.session.commit()
         
@@ -0,0 +1,35 @@
+"""
+Команды Flask CLI для обслуживания данных
+"""
+from datetime import datetime
+
+import click
+from flask import Flask
+
+from app.db.session import db
+
+
+def register_commands(app: Flask) -> None:
+    """Регистрация команд CLI приложения"""
+
+    @app.cli.command("rebuild-sales-rollup")
+    @click.option("--since", default=None, help="Пересчитать дни начиная с даты YYYY-MM-DD (по умолчанию - все)")
+    def rebuild_sales_rollup_command(since):
+        """Полный пересчет дневной витрины продаж"""
+        from app.services.sales_rollup import rebuild_sales_rollup
+        from app.services.analytics_cache import analytics_cache, ORDERS
+
+        start_date = datetime.strptime(since, "%Y-%m-%d").date() if since else None
+        rows = rebuild_sales_rollup(db.session, start_date=start_date)
+        # Пересчет выполняется массовыми запросами, которые не видны слушателям сессии
+        analytics_cache.bump([ORDERS])
+        click.echo(f"Витрина продаж пересчитана, строк: {rows}")
+
+    @app.cli.command("export-parquet")
+    @click.option("--full", is_flag=True, help="Удалить предыдущую выгрузку и выгрузить все строки заново")
+    def export_parquet_command(full):
+        """Выгрузка orders, order_items, products и inventory_logs в Parquet"""
+        from app.services.parquet_export import export_parquet_snapshot
+
+        manifest = export_parquet_snapshot(db.session, full=full)
+        click.echo(f"Выгрузка {manifest['run_id']} завершена, строк: {manifest['rows']}")
@@ -0,0 +1,163 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Маркер отсутствующего значения (None может быть допустимым значением)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU-кэш в памяти процесса с временем жизни записей
+
+    При превышении max_entries вытесняются давно не использованные записи.
+    get_or_compute объединяет конкурентные запросы: при промахе значение
+    вычисляет один поток, остальные потоки с тем же ключом ждут результат.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_lock(self, key: Hashable) -> threading.Lock:
+        """Блокировка вычисления значения для ключа"""
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получение значения, если оно не устарело"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self._key_locks.pop(key, None)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Сохранение значения на ttl секунд"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                evicted, _ = self._data.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, ttl: float, compute: Callable[[], Any]) -> Any:
+        """Получение значения из кэша или его вычисление одним потоком"""
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        with self.key_lock(key):
+            # Пока ждали блокировку, значение мог вычислить другой поток
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+
+            value = compute()
+            self.set(key, value, ttl)
+            return value
+
+    def version(self, namespace: str) -> int:
+        """Текущая версия пространства имен (входит в ключи зависимых записей)"""
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace: str) -> None:
+        """Инвалидация всех записей пространства имен сменой его версии"""
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def delete(self, key: Hashable) -> None:
+        """Удаление значения"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистка кэша"""
+        with self._lock:
+            self._data.clear()
+            self._key_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика использования"""
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCache:
+    """
+    Кэш в Redis, общий для всех воркеров gunicorn
+
+    Значения хранятся в JSON, версии пространств имен - счетчиками INCR.
+    """
+
+    def __init__(self, client, prefix: str = "cache:"):
+        self.client = client
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.setex(self.prefix + key, max(int(ttl), 1), json.dumps(value))
+
+    def versions(self, namespaces: Iterable[str]) -> List[int]:
+        """Версии нескольких пространств имен одним запросом"""
+        namespaces = list(namespaces)
+        values = self.client.mget([f"{self.prefix}version:{name}" for name in namespaces])
+        return [int(value or 0) for value in values]
+
+    def bump(self, namespaces: Iterable[str]) -> None:
+        pipeline = self.client.pipeline()
+        for name in namespaces:
+            pipeline.incr(f"{self.prefix}version:{name}")
+        pipeline.execute()
+
+    def clear(self) -> int:
+        """Удаление всех значений (версии сохраняются)"""
+        deleted = 0
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            if not key.decode().startswith(f"{self.prefix}version:"):
+                deleted += self.client.delete(key)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -1,30 +1,88 @@
+from datetime import timedelta
+
 from celery import Celery
 from flask import Flask
 
+# Модули с задачами, которые должен зарегистрировать воркер
+CELERY_TASK_MODULES = [
+    "app.tasks.notifications",
+    "app.tasks.outbox",
+    "app.tasks.archive",
+    "app.tasks.reports",
+    "app.tasks.exports",
+    "app.tasks.inventory_analytics",
+]
+
+# Периодические задачи (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-outbox": {
+        "task": "app.tasks.outbox.dispatch_outbox",
+        "schedule": timedelta(seconds=5),
+    },
+    "purge-outbox": {
+        "task": "app.tasks.outbox.purge_outbox",
+        "schedule": timedelta(days=1),
+    },
+    "archive-orders": {
+        "task": "app.tasks.archive.archive_orders",
+        "schedule": timedelta(days=1),
+    },
+    "export-parquet": {
+        "task": "app.tasks.exports.export_parquet",
+        "schedule": timedelta(days=1),
+    },
+    "classify-inventory": {
+        "task": "app.tasks.inventory_analytics.classify_inventory",
+        "schedule": timedelta(days=1),
+    },
+    "refresh-inventory-metrics": {
+        "task": "app.tasks.inventory_analytics.refresh_metrics",
+        "schedule": timedelta(days=1),
+    },
+    "refresh-stock-health": {
+        "task": "app.tasks.inventory_analytics.refresh_stock_health_task",
+        "schedule": timedelta(days=1),
+    },
+    "update-demand-forecasts": {
+        "task": "app.tasks.inventory_analytics.update_forecasts_task",
+        "schedule": timedelta(days=1),
+    },
+    "retrain-forecast-model": {
+        "task": "app.tasks.inventory_analytics.retrain_forecast_model",
+        "schedule": timedelta(weeks=1),
+    },
+    "purge-report-jobs": {
+        "task": "app.tasks.reports.purge_report_jobs",
+        "schedule": timedelta(hours=1),
+    },
+}
+
 
 def init_celery(app: Flask) -> Celery:
     """Инициализация Celery для фоновых задач"""
-    celery_instance = Celery(
-        app.import_name,
-        broker=app.config.get("CELERY_BROKER_URL", "redis://localhost:6379/0"),
-        backend=app.config.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    # Настраиваем общий экземпляр, на котором зарегистрированы задачи (@celery.task)
+    celery_instance = celery
+    celery_instance.conf.update(
+        broker_url=app.config.get("CELERY_BROKER_URL", "redis://localhost:6379/0"),
+        result_backend=app.config.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0"),
+        imports=CELERY_TASK_MODULES,
+        beat_schedule=CELERY_BEAT_SCHEDULE
     )
-    
-    celery_instance.conf.update(app.config)
-    
+
     class ContextTask(celery_instance.Task):
         def __call__(self, *args, **kwargs):
             with app.app_context():
                 return self.run(*args, **kwargs)
-    
+
     celery_instance.Task = ContextTask
     return celery_instance
 
 
 # Экземпляр Celery по умолчанию для использования в задачах
-# В реальном приложении будет перенастроен в init_celery при инициализации приложения
+# Перенастраивается в init_celery при инициализации приложения
+# (воркер запускается как `celery -A app.main.celery worker`)
 celery = Celery(
     'app',
     broker="redis://localhost:6379/0",
     backend="redis://localhost:6379/0"
-) 
\ No newline at end of file
+)
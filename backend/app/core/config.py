@@ -30,6 +30,80 @@ class BaseSettings:
     # Dadata
     DADATA_API_KEY: str = os.environ.get("DADATA_API_KEY", "")
     DADATA_SECRET_KEY: str = os.environ.get("DADATA_SECRET_KEY", "")
+    
+    # Отдача файлов
+    USE_X_ACCEL_REDIRECT: bool = os.environ.get("USE_X_ACCEL_REDIRECT", "false").lower() == "true"
+    X_ACCEL_REDIRECT_PREFIX: str = os.environ.get("X_ACCEL_REDIRECT_PREFIX", "/protected/uploads/")
+    
+    # Outbox доменных событий
+    OUTBOX_BATCH_SIZE: int = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 10))
+    OUTBOX_WEBHOOK_URLS: list = [url for url in os.environ.get("OUTBOX_WEBHOOK_URLS", "").split(",") if url]
+    OUTBOX_WEBHOOK_TIMEOUT: int = int(os.environ.get("OUTBOX_WEBHOOK_TIMEOUT", 5))
+    
+    # Архивация заказов
+    ORDER_ARCHIVE_AFTER_DAYS: int = int(os.environ.get("ORDER_ARCHIVE_AFTER_DAYS", 365))
+    ORDER_ARCHIVE_BATCH_SIZE: int = int(os.environ.get("ORDER_ARCHIVE_BATCH_SIZE", 500))
+    
+    # Аналитика
+    TOP_PRODUCTS_REFRESH_SECONDS: int = int(os.environ.get("TOP_PRODUCTS_REFRESH_SECONDS", 300))
+    DASHBOARD_STATS_TTL_SECONDS: int = int(os.environ.get("DASHBOARD_STATS_TTL_SECONDS", 5))
+    CATEGORY_DISTRIBUTION_TTL_SECONDS: int = int(os.environ.get("CATEGORY_DISTRIBUTION_TTL_SECONDS", 300))
+    
+    # Кэш результатов аналитики (Redis - общий для всех воркеров, пусто - только память процесса)
+    ANALYTICS_CACHE_TTL_SECONDS: int = int(os.environ.get("ANALYTICS_CACHE_TTL_SECONDS", 300))
+    ANALYTICS_CACHE_LOCAL_TTL_SECONDS: int = int(os.environ.get("ANALYTICS_CACHE_LOCAL_TTL_SECONDS", 30))
+    ANALYTICS_CACHE_MAX_ENTRIES: int = int(os.environ.get("ANALYTICS_CACHE_MAX_ENTRIES", 1024))
+    ANALYTICS_CACHE_REDIS_URL: str = os.environ.get("ANALYTICS_CACHE_REDIS_URL", "")
+    
+    # Фоновые отчеты: время хранения результата
+    REPORT_RESULT_TTL_HOURS: int = int(os.environ.get("REPORT_RESULT_TTL_HOURS", 24))
+    
+    # Поток событий (SSE): канал Redis (по умолчанию брокер Celery) и параметры соединений
+    EVENTS_REDIS_URL: str = os.environ.get("EVENTS_REDIS_URL", "")
+    EVENTS_CHANNEL: str = os.environ.get("EVENTS_CHANNEL", "inventory-events")
+    EVENTS_HEARTBEAT_SECONDS: int = int(os.environ.get("EVENTS_HEARTBEAT_SECONDS", 15))
+    EVENTS_STREAM_MAX_SECONDS: int = int(os.environ.get("EVENTS_STREAM_MAX_SECONDS", 600))
+    EVENTS_QUEUE_SIZE: int = int(os.environ.get("EVENTS_QUEUE_SIZE", 100))
+    EVENTS_REPLAY_LIMIT: int = int(os.environ.get("EVENTS_REPLAY_LIMIT", 200))
+    
+    # Выгрузка в Parquet: размер группы строк и запас (минуты) для транзакций,
+    # которые еще не зафиксированы на момент выгрузки
+    PARQUET_EXPORT_BATCH_SIZE: int = int(os.environ.get("PARQUET_EXPORT_BATCH_SIZE", 50000))
+    PARQUET_EXPORT_SAFETY_MINUTES: int = int(os.environ.get("PARQUET_EXPORT_SAFETY_MINUTES", 10))
+    
+    # ABC/XYZ-классификация: окно (недели), границы накопленной доли выручки (A, B) и CV спроса (X, Y)
+    ABC_XYZ_WEEKS: int = int(os.environ.get("ABC_XYZ_WEEKS", 26))
+    ABC_THRESHOLDS: tuple = (0.8, 0.95)
+    XYZ_THRESHOLDS: tuple = (0.25, 0.5)
+    
+    # Показатели оборачиваемости: окна расчета (дни)
+    INVENTORY_METRICS_WINDOWS: tuple = (30, 90, 365)
+    
+    # Прогнозирование: время жизни кэша дневных рядов спроса товаров
+    FORECAST_SERIES_TTL_SECONDS: int = int(os.environ.get("FORECAST_SERIES_TTL_SECONDS", 600))
+    # Сохраненные прогнозы: горизонт (дни) и возраст, после которого прогноз помечается устаревшим (часы)
+    FORECAST_HORIZON_DAYS: int = int(os.environ.get("FORECAST_HORIZON_DAYS", 30))
+    FORECAST_MAX_AGE_HOURS: int = int(os.environ.get("FORECAST_MAX_AGE_HOURS", 36))
+    # Обучение модели: число процессов fit в воркере Celery (-1 - все ядра), блокировка Redis (по умолчанию брокер Celery)
+    ML_TRAIN_N_JOBS: int = int(os.environ.get("ML_TRAIN_N_JOBS", -1))
+    ML_TRAIN_LOCK_REDIS_URL: str = os.environ.get("ML_TRAIN_LOCK_REDIS_URL", "")
+    ML_TRAIN_LOCK_TIMEOUT_SECONDS: int = int(os.environ.get("ML_TRAIN_LOCK_TIMEOUT_SECONDS", 3600))
+    # Каталог файлов модели (абсолютный путь; в prod - общий том backend и воркеров Celery)
+    ML_MODEL_PATH: str = os.environ.get(
+        "ML_MODEL_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services", "models")
+    )
+    # Инкрементальная модель: коэффициенты сглаживания уровня и сезонности, окно пересчета (дни), вес в прогнозе
+    FORECAST_SMOOTHING_ALPHA: float = float(os.environ.get("FORECAST_SMOOTHING_ALPHA", 0.3))
+    FORECAST_SMOOTHING_GAMMA: float = float(os.environ.get("FORECAST_SMOOTHING_GAMMA", 0.1))
+    FORECAST_SMOOTHING_INIT_DAYS: int = int(os.environ.get("FORECAST_SMOOTHING_INIT_DAYS", 90))
+    FORECAST_SMOOTHING_WEIGHT: float = float(os.environ.get("FORECAST_SMOOTHING_WEIGHT", 0.5))
+    
+    # Неликвиды: дни без отгрузок, порог покрытия спроса (месяцы) и окно расчета спроса (дни)
+    DEAD_STOCK_DAYS: int = int(os.environ.get("DEAD_STOCK_DAYS", 90))
+    SLOW_MOVER_COVERAGE_MONTHS: float = float(os.environ.get("SLOW_MOVER_COVERAGE_MONTHS", 6))
+    STOCK_HEALTH_DEMAND_DAYS: int = int(os.environ.get("STOCK_HEALTH_DEMAND_DAYS", 90))
 
 
 class DevelopmentSettings(BaseSettings):
@@ -63,4 +137,10 @@ def get_settings() -> Dict[str, Any]:
     }
     
     settings_class = settings_map.get(env, DevelopmentSettings)
-    return settings_class().__dict__ 
\ No newline at end of file
+    # Настройки объявлены атрибутами класса, поэтому собираем их через dir(),
+    # а не через __dict__ экземпляра (он пуст)
+    return {
+        key: getattr(settings_class, key)
+        for key in dir(settings_class)
+        if key.isupper()
+    } 
\ No newline at end of file
@@ -10,4 +10,8 @@ Base = db.Model
 # Импорт всех моделей для обнаружения их Alembic
 from ..models.user import User
 from ..models.inventory import Product, Category, Supplier
-from ..models.order import Order, OrderItem 
\ No newline at end of file
+from ..models.order import Order, OrderItem
+from ..models.event import OutboxEvent
+from ..models.archive import ArchivedOrder, ArchivedOrderItem, ArchivedOrderFile
+from ..models.analytics import DailySales, AnalyticsJob, ProductClassification, InventoryMetric, StockHealth, DemandForecast, DemandSmoothingState
+from ..models.valuation import CostLayer, ProductValuation
@@ -11,6 +11,9 @@ from app.schemas import register_schemas
 from app.core.errors import register_error_handlers
 from app.core.celery import init_celery, celery as celery_app
 from app.core.extensions import init_extensions
+from app.cli import register_commands
+from app.services.analytics_cache import analytics_cache
+from app.services.event_stream import event_broker
 
 # Настройка логирования
 logging.basicConfig(
@@ -31,7 +34,7 @@ def create_app():
     settings = get_settings()
     
     # Настройка приложения
-    app.config.from_object(settings)
+    app.config.from_mapping(settings)
     
     # Явно устанавливаем SQLALCHEMY_DATABASE_URI из переменной окружения
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
@@ -60,15 +63,25 @@ def create_app():
          supports_credentials=True,
          allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         expose_headers=["Content-Length", "Content-Range", "Content-Type"]
+         expose_headers=["Content-Length", "Content-Range", "Content-Type",
+                         "X-Forecast-Source", "X-Forecast-Generated-At", "X-Forecast-Model-Version", "X-Forecast-Stale"]
     )
     
     # Добавляем middleware для логирования запросов
     @app.before_request
     def log_request_info():
-        logger.debug('Headers: %s', request.headers)
+        # Токены (заголовок Authorization, параметр ?token= потока событий) в лог не попадают
+        headers = {
+            name: ('[REDACTED]' if name.lower() in ('authorization', 'cookie') else value)
+            for name, value in request.headers.items()
+        }
+        args = {
+            name: ('[REDACTED]' if name == 'token' else value)
+            for name, value in request.args.items()
+        }
+        logger.debug('Headers: %s', headers)
         logger.debug('Body: %s', request.get_data())
-        logger.debug('Method: %s, Path: %s', request.method, request.path)
+        logger.debug('Method: %s, Path: %s, Args: %s', request.method, request.path, args)
     
     # Инициализация расширений
     init_extensions(app)
@@ -76,6 +89,12 @@ def create_app():
     # Инициализация Celery
     init_celery(app)
     
+    # Инициализация кэша аналитики
+    analytics_cache.init_app(app)
+    
+    # Поток событий для клиентов (SSE)
+    event_broker.init_app(app)
+    
     # Регистрация схем после инициализации Marshmallow
     # Получаем словарь схем и добавляем его в глобальный объект g
     app.config['SCHEMAS'] = register_schemas()
@@ -92,6 +111,9 @@ def create_app():
     # Регистрация маршрутов
     init_routes(app)
     
+    # Регистрация команд CLI
+    register_commands(app)
+    
     # Добавляем корневой маршрут
     @app.route('/')
     def index():
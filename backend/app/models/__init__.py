@@ -2,6 +2,13 @@ from app.models.base import BaseModel
 from app.models.user import User, UserRole
 from app.models.inventory import Category, Supplier, Product, InventoryLog
 from app.models.order import Order, OrderItem, OrderFile, OrderStatus, OrderType
+from app.models.event import OutboxEvent, OutboxStatus
+from app.models.archive import ArchivedOrder, ArchivedOrderItem, ArchivedOrderFile
+from app.models.analytics import (
+    DailySales, AnalyticsJob, JobStatus, ProductClassification, InventoryMetric,
+    StockHealth, StockHealthStatus, DemandForecast, DemandSmoothingState
+)
+from app.models.valuation import CostLayer, ProductValuation
 
 # Для удобства импорта
 __all__ = [
@@ -17,4 +24,20 @@ __all__ = [
     "OrderFile", 
     "OrderStatus",
     "OrderType",
+    "OutboxEvent",
+    "OutboxStatus",
+    "ArchivedOrder",
+    "ArchivedOrderItem",
+    "ArchivedOrderFile",
+    "DailySales",
+    "AnalyticsJob",
+    "JobStatus",
+    "ProductClassification",
+    "InventoryMetric",
+    "StockHealth",
+    "StockHealthStatus",
+    "DemandForecast",
+    "DemandSmoothingState",
+    "CostLayer",
+    "ProductValuation",
 ] 
\ No newline at end of file
@@ -0,0 +1,252 @@
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Text, JSON, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.orm import relationship
+import enum
+
+from app.models.base import BaseModel
+
+
+class DailySales(BaseModel):
+    """Предагрегированные продажи за день в разрезе типа и статуса заказа"""
+    __tablename__ = "daily_sales"
+    __table_args__ = (
+        UniqueConstraint("sales_date", "order_type", "status", name="uq_daily_sales_date_type_status"),
+    )
+
+    sales_date = Column(Date, nullable=False, index=True)
+    order_type = Column(String(50), nullable=False)
+    status = Column(String(50), nullable=False)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<DailySales {self.sales_date} {self.order_type}/{self.status} count={self.order_count}>"
+
+
+class JobStatus(enum.Enum):
+    """Статусы фоновых заданий аналитики"""
+    PENDING = "pending"  # Ожидает выполнения
+    RUNNING = "running"  # Выполняется
+    COMPLETED = "completed"  # Результат готов
+    FAILED = "failed"  # Завершено с ошибкой
+    CANCELLED = "cancelled"  # Отменено пользователем
+
+
+# Статусы, из которых задание больше не меняется
+FINISHED_JOB_STATUSES = (JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value)
+
+
+class AnalyticsJob(BaseModel):
+    """Фоновое задание построения отчета с хранением результата до expires_at"""
+    __tablename__ = "analytics_jobs"
+    __table_args__ = (
+        Index("ix_analytics_jobs_user_created", "user_id", "created_at"),
+    )
+
+    job_type = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default=JobStatus.PENDING.value)
+    progress = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    celery_task_id = Column(String(155), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+    # Отношения
+    user = relationship("User")
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED_JOB_STATUSES
+
+    def to_dict(self, include_result=False):
+        """Представление задания для API"""
+        data = {
+            "id": self.id,
+            "job_type": self.job_type,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None
+        }
+        if include_result and self.status == JobStatus.COMPLETED.value:
+            data["result"] = self.result
+        return data
+
+    def __repr__(self):
+        return f"<AnalyticsJob {self.id} {self.job_type} ({self.status})>"
+
+
+class ProductClassification(BaseModel):
+    """ABC/XYZ-класс товара (пересчитывается по расписанию для всего каталога)"""
+    __tablename__ = "product_classifications"
+    __table_args__ = (
+        Index("ix_product_classifications_classes", "abc_class", "xyz_class"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, unique=True)
+    abc_class = Column(String(1), nullable=False)  # A - основная выручка, C - малая доля
+    xyz_class = Column(String(1), nullable=False)  # X - стабильный спрос, Z - нерегулярный
+    revenue = Column(Float, nullable=False, default=0.0)
+    revenue_share = Column(Float, nullable=False, default=0.0)
+    cumulative_share = Column(Float, nullable=False, default=0.0)
+    demand_mean = Column(Float, nullable=False, default=0.0)
+    demand_std = Column(Float, nullable=False, default=0.0)
+    demand_cv = Column(Float, nullable=True)  # Коэффициент вариации (None при нулевом спросе)
+    periods = Column(Integer, nullable=False)
+    computed_at = Column(DateTime, nullable=False)
+
+    # Отношения
+    product = relationship("Product")
+
+    def to_dict(self):
+        """Представление класса товара для API"""
+        return {
+            "product_id": self.product_id,
+            "abc_class": self.abc_class,
+            "xyz_class": self.xyz_class,
+            "class": f"{self.abc_class}{self.xyz_class}",
+            "revenue": self.revenue,
+            "revenue_share": self.revenue_share,
+            "cumulative_share": self.cumulative_share,
+            "demand_mean": self.demand_mean,
+            "demand_std": self.demand_std,
+            "demand_cv": self.demand_cv,
+            "periods": self.periods,
+            "computed_at": self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f"<ProductClassification product_id={self.product_id} {self.abc_class}{self.xyz_class}>"
+
+
+class InventoryMetric(BaseModel):
+    """Оборачиваемость, дни запаса и sell-through товара или категории за окно (пересчитывается ночью)"""
+    __tablename__ = "inventory_metrics"
+    __table_args__ = (
+        UniqueConstraint("scope", "window_days", "entity_id", name="uq_inventory_metrics_scope_window_entity"),
+    )
+
+    scope = Column(String(20), nullable=False)  # product или category
+    entity_id = Column(Integer, nullable=False)  # id товара или категории (0 - без категории)
+    name = Column(String(255), nullable=True)
+    window_days = Column(Integer, nullable=False)
+    units_sold = Column(Float, nullable=False, default=0.0)
+    units_received = Column(Float, nullable=False, default=0.0)
+    on_hand = Column(Float, nullable=False, default=0.0)
+    avg_inventory = Column(Float, nullable=False, default=0.0)
+    turnover = Column(Float, nullable=True)  # None при нулевом среднем запасе
+    days_of_supply = Column(Float, nullable=True)  # None при отсутствии продаж
+    sell_through = Column(Float, nullable=True)  # Доля проданного от доступного за окно
+    computed_at = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        """Представление показателей для API"""
+        return {
+            "scope": self.scope,
+            "id": self.entity_id,
+            "name": self.name,
+            "window_days": self.window_days,
+            "units_sold": self.units_sold,
+            "units_received": self.units_received,
+            "on_hand": self.on_hand,
+            "avg_inventory": self.avg_inventory,
+            "turnover": self.turnover,
+            "days_of_supply": self.days_of_supply,
+            "sell_through": self.sell_through,
+            "computed_at": self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f"<InventoryMetric {self.scope}:{self.entity_id} window={self.window_days}>"
+
+
+class StockHealthStatus(enum.Enum):
+    """Состояние запаса товара"""
+    DEAD = "dead"  # Нет отгрузок дольше DEAD_STOCK_DAYS
+    SLOW = "slow"  # Остаток покрывает спрос дольше SLOW_MOVER_COVERAGE_MONTHS
+    HEALTHY = "healthy"  # Нормальная оборачиваемость или нет остатка
+
+
+class StockHealth(BaseModel):
+    """Последнее движение и покрытие спроса товара (пересчитывается ночью)"""
+    __tablename__ = "stock_health"
+    __table_args__ = (
+        Index("ix_stock_health_status_value", "status", "stock_value"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(String(20), nullable=False, default=StockHealthStatus.HEALTHY.value)
+    on_hand = Column(Integer, nullable=False, default=0)
+    stock_value = Column(Float, nullable=False, default=0.0)
+    last_outbound_at = Column(DateTime, nullable=True)  # Последняя продажа или списание
+    last_movement_at = Column(DateTime, nullable=True)  # Последнее движение в любую сторону
+    days_since_outbound = Column(Integer, nullable=True)
+    monthly_demand = Column(Float, nullable=False, default=0.0)
+    coverage_months = Column(Float, nullable=True)  # None при нулевом спросе
+    computed_at = Column(DateTime, nullable=False)
+
+    # Отношения
+    product = relationship("Product")
+
+    def to_dict(self):
+        """Представление состояния запаса для API"""
+        return {
+            "product_id": self.product_id,
+            "status": self.status,
+            "on_hand": self.on_hand,
+            "stock_value": self.stock_value,
+            "last_outbound_at": self.last_outbound_at.isoformat() if self.last_outbound_at else None,
+            "last_movement_at": self.last_movement_at.isoformat() if self.last_movement_at else None,
+            "days_since_outbound": self.days_since_outbound,
+            "monthly_demand": self.monthly_demand,
+            "coverage_months": self.coverage_months,
+            "computed_at": self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f"<StockHealth product_id={self.product_id} ({self.status})>"
+
+
+class DemandForecast(BaseModel):
+    """Прогноз дневного спроса товара, построенный версией модели (генерируется по расписанию)"""
+    __tablename__ = "demand_forecasts"
+    __table_args__ = (
+        UniqueConstraint("model_version", "product_id", "forecast_date", name="uq_demand_forecasts_version_product_date"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    forecast_date = Column(Date, nullable=False)
+    model_version = Column(String(64), nullable=False)
+    predicted_quantity = Column(Float, nullable=False, default=0.0)
+    generated_at = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        """Представление прогноза для API (формат predict_future_demand)"""
+        return {
+            "date": self.forecast_date.isoformat(),
+            "predicted_quantity": int(self.predicted_quantity)
+        }
+
+    def __repr__(self):
+        return f"<DemandForecast product_id={self.product_id} {self.forecast_date} v={self.model_version}>"
+
+
+class DemandSmoothingState(BaseModel):
+    """Состояние экспоненциального сглаживания спроса товара (обновляется по новым дням)"""
+    __tablename__ = "demand_smoothing_states"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, unique=True)
+    level = Column(Float, nullable=False, default=0.0)
+    seasonal = Column(JSON, nullable=False, default=list)  # Поправки по дням недели (0 - понедельник)
+    observations = Column(Integer, nullable=False, default=0)
+    watermark = Column(Date, nullable=False)  # Последний учтенный день
+
+    def __repr__(self):
+        return f"<DemandSmoothingState product_id={self.product_id} level={self.level:.2f} до {self.watermark}>"
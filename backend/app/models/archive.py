@@ -0,0 +1,75 @@
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, DateTime, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.models.base import BaseModel
+
+
+class ArchivedOrder(BaseModel):
+    """Архивный (закрытый и устаревший) заказ. id совпадает с id исходного заказа"""
+    __tablename__ = "archived_orders"
+    __table_args__ = (
+        Index("ix_archived_orders_created_at", "created_at"),
+    )
+
+    order_number = Column(String(50), nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
+    supplier_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    order_type = Column(String, nullable=False)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    shipping_address = Column(Text, nullable=True)
+    notes = Column(Text, nullable=True)
+    expected_delivery_date = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Отношения
+    items = relationship("ArchivedOrderItem", back_populates="order", lazy="dynamic", cascade="all, delete-orphan")
+    files = relationship("ArchivedOrderFile", back_populates="order", lazy="dynamic", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<ArchivedOrder {self.order_number} ({self.status})>"
+
+
+class ArchivedOrderItem(BaseModel):
+    """Позиция архивного заказа"""
+    __tablename__ = "archived_order_items"
+    __table_args__ = (
+        Index("ix_archived_order_items_product_order", "product_id", "order_id"),
+    )
+
+    order_id = Column(Integer, ForeignKey("archived_orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False, default=1)
+    unit_price = Column(Float, nullable=False)
+    product_name = Column(String(255), nullable=True)
+    product_sku = Column(String(50), nullable=True)
+    category_id = Column(Integer, nullable=True)
+
+    # Отношения
+    order = relationship("ArchivedOrder", back_populates="items")
+
+    @property
+    def total_price(self):
+        """Рассчитать общую стоимость позиции"""
+        return self.quantity * self.unit_price
+
+    def __repr__(self):
+        return f"<ArchivedOrderItem order_id={self.order_id} product_id={self.product_id}>"
+
+
+class ArchivedOrderFile(BaseModel):
+    """Файл архивного заказа (сам файл остается в каталоге загрузок)"""
+    __tablename__ = "archived_order_files"
+
+    order_id = Column(Integer, ForeignKey("archived_orders.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    file_type = Column(String(50), nullable=True)
+    upload_date = Column(DateTime, nullable=True)
+
+    # Отношения
+    order = relationship("ArchivedOrder", back_populates="files")
+
+    def __repr__(self):
+        return f"<ArchivedOrderFile order_id={self.order_id} filename={self.filename}>"
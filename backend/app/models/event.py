@@ -0,0 +1,42 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, Index
+import enum
+
+from app.models.base import BaseModel
+
+
+class OutboxStatus(enum.Enum):
+    """Статусы событий в outbox"""
+    PENDING = "pending"  # Ожидает отправки
+    SENT = "sent"  # Доставлено
+    FAILED = "failed"  # Превышено число попыток доставки
+
+
+class OutboxEvent(BaseModel):
+    """Доменное событие, записанное в outbox в одной транзакции с изменением данных"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_id", "status", "id"),
+    )
+
+    event_type = Column(String(100), nullable=False, index=True)
+    aggregate_type = Column(String(50), nullable=False)
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default=OutboxStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+
+    def to_message(self):
+        """Представление события для доставки потребителям"""
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "aggregate_type": self.aggregate_type,
+            "aggregate_id": self.aggregate_id,
+            "payload": self.payload,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.event_type} {self.aggregate_type}={self.aggregate_id} ({self.status})>"
@@ -73,6 +73,8 @@ class InventoryLog(BaseModel):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     quantity_change = Column(Integer, nullable=False)  # Положительное - добавление, отрицательное - вычитание
     comment = Column(Text, nullable=True)
+    # Заказ, отгрузка или отмена которого изменила остаток (без внешнего ключа: заказы переносятся в архив)
+    order_id = Column(Integer, nullable=True, index=True)
 
     # Отношения
     product = relationship("Product", back_populates="inventory_logs")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, DateTime, Enum, Index
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -24,6 +25,11 @@ class OrderType(enum.Enum):
     RETURN = "return"  # Возврат
 
 
+# Заказы, учитываемые в аналитике продаж
+SALES_ORDER_TYPE = "outgoing"
+SALES_STATUSES = ("completed", "processing")
+
+
 class Order(BaseModel):
     """Модель заказа"""
     __tablename__ = "orders"
@@ -57,12 +63,22 @@ class Order(BaseModel):
 class OrderItem(BaseModel):
     """Модель элемента заказа"""
     __tablename__ = "order_items"
+    __table_args__ = (
+        # Обратный индекс: поиск заказов по товару
+        Index("ix_order_items_product_order", "product_id", "order_id"),
+    )
 
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False, default=1)
     unit_price = Column(Float, nullable=False)
     
+    # Снимок товара на момент создания заказа (не требует join с products
+    # и сохраняет историю при переименовании товара)
+    product_name = Column(String(255), nullable=True)
+    product_sku = Column(String(50), nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    
     # Отношения
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
@@ -72,6 +88,31 @@ class OrderItem(BaseModel):
         """Рассчитать общую стоимость позиции"""
         return self.quantity * self.unit_price
     
+    @classmethod
+    def count_orders_by_product(cls, session, product_ids):
+        """
+        Количество заказов, содержащих каждый из товаров
+        
+        Запрос выполняется только по индексу ix_order_items_product_order.
+        
+        Returns:
+            Словарь {product_id: количество заказов} (товары без заказов не включаются)
+        """
+        rows = session.query(
+            cls.product_id,
+            func.count(func.distinct(cls.order_id))
+        ).filter(
+            cls.product_id.in_(list(product_ids))
+        ).group_by(cls.product_id).all()
+        
+        return {product_id: count for product_id, count in rows}
+    
+    def snapshot_product(self, product):
+        """Сохранить снимок данных товара в позиции заказа"""
+        self.product_name = product.name
+        self.product_sku = product.sku
+        self.category_id = product.category_id
+    
     def __repr__(self):
         return f"<OrderItem order_id={self.order_id} product_id={self.product_id}>"
 
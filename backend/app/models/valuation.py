@@ -0,0 +1,70 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from app.models.base import BaseModel
+
+
+class CostLayer(BaseModel):
+    """Слой себестоимости: партия поступления с остатком для списания по FIFO"""
+    __tablename__ = "cost_layers"
+    __table_args__ = (
+        # Поиск самых старых открытых слоев товара при списании
+        Index("ix_cost_layers_product_received", "product_id", "received_at", "id"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    remaining_quantity = Column(Integer, nullable=False)
+    unit_cost = Column(Float, nullable=False)
+    source = Column(String(50), nullable=False)  # Причина поступления (product_created, product_updated, ...)
+    reference = Column(String(100), nullable=True)
+    received_at = Column(DateTime, nullable=False)
+
+    # Отношения
+    product = relationship("Product")
+
+    def to_dict(self):
+        """Представление слоя для API"""
+        return {
+            "id": self.id,
+            "quantity": self.quantity,
+            "remaining_quantity": self.remaining_quantity,
+            "unit_cost": self.unit_cost,
+            "source": self.source,
+            "reference": self.reference,
+            "received_at": self.received_at.isoformat() if self.received_at else None
+        }
+
+    def __repr__(self):
+        return f"<CostLayer product_id={self.product_id} {self.remaining_quantity}/{self.quantity} @ {self.unit_cost}>"
+
+
+class ProductValuation(BaseModel):
+    """Текущая оценка запаса товара (обновляется при каждом движении)"""
+    __tablename__ = "product_valuations"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, unique=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    avg_unit_cost = Column(Float, nullable=False, default=0.0)  # Средневзвешенная себестоимость
+    fifo_value = Column(Float, nullable=False, default=0.0)  # Стоимость открытых слоев FIFO
+
+    # Отношения
+    product = relationship("Product")
+
+    @property
+    def average_value(self):
+        return self.quantity * self.avg_unit_cost
+
+    def to_dict(self):
+        """Представление оценки для API"""
+        return {
+            "product_id": self.product_id,
+            "quantity": self.quantity,
+            "avg_unit_cost": self.avg_unit_cost,
+            "average_value": round(self.average_value, 2),
+            "fifo_value": round(self.fifo_value, 2),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f"<ProductValuation product_id={self.product_id} qty={self.quantity}>"
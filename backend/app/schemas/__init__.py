@@ -24,7 +24,8 @@ def register_schemas():
         OrderCreateSchema, 
         OrderItemSchema,
         OrderItemCreateSchema, 
-        OrderFileSchema
+        OrderFileSchema,
+        ArchivedOrderSchema
     )
     
     # Возвращаем словарь схем для использования в приложении
@@ -54,7 +55,9 @@ def register_schemas():
         "order_create_schema": OrderCreateSchema(),
         "order_item_schema": OrderItemSchema(),
         "order_item_create_schema": OrderItemCreateSchema(),
-        "order_file_schema": OrderFileSchema()
+        "order_file_schema": OrderFileSchema(),
+        "archived_order_schema": ArchivedOrderSchema(),
+        "archived_orders_schema": ArchivedOrderSchema(many=True)
     }
 
 # Экспортируем все схемы для использования в других модулях
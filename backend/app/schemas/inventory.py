@@ -37,6 +37,7 @@ class ProductCreateSchema(ma.Schema):
     description = fields.String()
     price = fields.Float(required=True, validate=validate.Range(min=0))
     quantity = fields.Integer(required=True, validate=validate.Range(min=0))
+    unit_cost = fields.Float(validate=validate.Range(min=0))  # Закупочная цена начального остатка
     min_stock = fields.Integer(validate=validate.Range(min=0), default=5)
     category_id = fields.Integer()
     supplier_id = fields.Integer()
@@ -55,6 +56,7 @@ class ProductUpdateSchema(ma.Schema):
     description = fields.String()
     price = fields.Float(validate=validate.Range(min=0))
     quantity = fields.Integer(validate=validate.Range(min=0))
+    unit_cost = fields.Float(validate=validate.Range(min=0))  # Закупочная цена поступления
     min_stock = fields.Integer(validate=validate.Range(min=0))
     category_id = fields.Integer()
     supplier_id = fields.Integer()
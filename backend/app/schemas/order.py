@@ -1,6 +1,7 @@
 from marshmallow import fields, validate, validates, ValidationError
 from app.schemas import ma
-from app.models.order import Order, OrderItem, OrderFile, OrderStatus
+from app.models.order import Order, OrderItem, OrderFile
+from app.models.archive import ArchivedOrder, ArchivedOrderItem, ArchivedOrderFile
 
 
 class OrderItemSchema(ma.SQLAlchemyAutoSchema):
@@ -9,8 +10,17 @@ class OrderItemSchema(ma.SQLAlchemyAutoSchema):
         model = OrderItem
         include_fk = True
     
-    product = fields.Nested('ProductSchema', only=("id", "name", "sku", "price"))
+    product = fields.Method("get_product")
     total_price = fields.Float()
+    
+    def get_product(self, obj):
+        """Данные товара из снимка в позиции заказа (без обращения к таблице products)"""
+        return {
+            "id": obj.product_id,
+            "name": obj.product_name,
+            "sku": obj.product_sku,
+            "price": obj.unit_price
+        }
 
 
 class OrderItemCreateSchema(ma.Schema):
@@ -35,11 +45,48 @@ class OrderSchema(ma.SQLAlchemyAutoSchema):
     
     user = fields.Nested('UserSchema', only=("id", "name", "email"))
     supplier = fields.Nested('SupplierSchema')
-    status = fields.Enum(OrderStatus, by_value=True)
+    status = fields.String()
     items = fields.Nested(OrderItemSchema, many=True)
     files = fields.Nested(OrderFileSchema, many=True)
 
 
+class ArchivedOrderItemSchema(ma.SQLAlchemyAutoSchema):
+    """Схема для элементов архивного заказа"""
+    class Meta:
+        model = ArchivedOrderItem
+        include_fk = True
+    
+    product = fields.Method("get_product")
+    total_price = fields.Float()
+    
+    def get_product(self, obj):
+        """Данные товара из снимка в позиции заказа"""
+        return {
+            "id": obj.product_id,
+            "name": obj.product_name,
+            "sku": obj.product_sku,
+            "price": obj.unit_price
+        }
+
+
+class ArchivedOrderFileSchema(ma.SQLAlchemyAutoSchema):
+    """Схема для файлов архивного заказа"""
+    class Meta:
+        model = ArchivedOrderFile
+        include_fk = True
+
+
+class ArchivedOrderSchema(ma.SQLAlchemyAutoSchema):
+    """Схема для архивных заказов (формат совпадает с OrderSchema)"""
+    class Meta:
+        model = ArchivedOrder
+        include_fk = True
+    
+    items = fields.Nested(ArchivedOrderItemSchema, many=True)
+    files = fields.Nested(ArchivedOrderFileSchema, many=True)
+    archived = fields.Constant(True)
+
+
 class OrderCreateSchema(ma.Schema):
     """Схема для создания заказа"""
     supplier_id = fields.Integer(required=True)
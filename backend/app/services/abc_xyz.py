@@ -0,0 +1,155 @@
+"""
+ABC/XYZ-классификация товаров
+
+ABC - по доле в выручке (накопленная доля до порога A, затем до порога B,
+остальные C). XYZ - по коэффициенту вариации недельного спроса (X - стабильный,
+Y - колеблющийся, Z - нерегулярный). Спрос всех товаров загружается одним
+агрегирующим запросом (товар x неделя), классы рассчитываются для всего
+каталога групповыми операциями pandas/NumPy без циклов по товарам.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import func, delete, insert
+
+from ..models.order import Order, OrderItem, SALES_ORDER_TYPE, SALES_STATUSES
+from ..models.inventory import Product
+from ..models.analytics import ProductClassification
+
+logger = logging.getLogger(__name__)
+
+
+def week_key(session, column):
+    """Выражение номера недели для группировки (date_trunc на PostgreSQL, strftime на SQLite)"""
+    if session.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("week", column)
+    return func.strftime("%Y-%W", column)
+
+
+def load_weekly_demand(session, start: datetime) -> pd.DataFrame:
+    """
+    Недельный спрос и выручка всех товаров одним запросом
+
+    Returns:
+        DataFrame с колонками product_id, week, quantity, revenue (только непустые недели)
+    """
+    week = week_key(session, Order.created_at)
+    rows = session.query(
+        OrderItem.product_id,
+        week.label("week"),
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.quantity * OrderItem.unit_price)
+    ).join(
+        Order, Order.id == OrderItem.order_id
+    ).filter(
+        Order.order_type == SALES_ORDER_TYPE,
+        Order.status.in_(SALES_STATUSES),
+        Order.created_at >= start
+    ).group_by(OrderItem.product_id, week).all()
+
+    return pd.DataFrame.from_records(rows, columns=["product_id", "week", "quantity", "revenue"])
+
+
+def classify(demand: pd.DataFrame, product_ids: np.ndarray, periods: int,
+             abc_thresholds: Tuple[float, float] = (0.8, 0.95),
+             xyz_thresholds: Tuple[float, float] = (0.25, 0.5)) -> pd.DataFrame:
+    """
+    Расчет ABC/XYZ-классов для всех товаров
+
+    Args:
+        demand: Недельный спрос (product_id, week, quantity, revenue)
+        product_ids: Все товары каталога (товары без продаж получают C/Z)
+        periods: Количество недель в окне (недели без продаж считаются нулевыми)
+        abc_thresholds: Границы накопленной доли выручки для A и B
+        xyz_thresholds: Границы коэффициента вариации для X и Y
+
+    Returns:
+        DataFrame по товарам с классами и показателями
+    """
+    demand = demand.astype({"quantity": float, "revenue": float})
+    demand["quantity_sq"] = demand["quantity"] ** 2
+
+    totals = demand.groupby("product_id")[["quantity", "quantity_sq", "revenue"]].sum()
+    totals = totals.reindex(product_ids, fill_value=0.0)
+    totals.index.name = "product_id"
+
+    # ABC: сортировка по выручке и накопленная доля до текущего товара
+    totals = totals.sort_values("revenue", ascending=False, kind="mergesort")
+    total_revenue = totals["revenue"].sum()
+    share = totals["revenue"] / total_revenue if total_revenue > 0 else totals["revenue"] * 0.0
+    cumulative = share.cumsum()
+    previous = cumulative - share
+    abc = np.select(
+        [(previous < abc_thresholds[0]) & (share > 0), (previous < abc_thresholds[1]) & (share > 0)],
+        ["A", "B"],
+        default="C"
+    )
+
+    # XYZ: среднее и стандартное отклонение по всем неделям окна (включая нулевые)
+    mean = totals["quantity"] / periods
+    variance = (totals["quantity_sq"] / periods - mean ** 2).clip(lower=0.0)
+    std = np.sqrt(variance)
+    cv = std.where(mean > 0) / mean.where(mean > 0)
+    xyz = np.select(
+        [cv <= xyz_thresholds[0], cv <= xyz_thresholds[1]],
+        ["X", "Y"],
+        default="Z"
+    )
+
+    return pd.DataFrame({
+        "product_id": totals.index.astype(int),
+        "abc_class": abc,
+        "xyz_class": xyz,
+        "revenue": totals["revenue"].to_numpy(),
+        "revenue_share": share.to_numpy(),
+        "cumulative_share": cumulative.to_numpy(),
+        "demand_mean": mean.to_numpy(),
+        "demand_std": std.to_numpy(),
+        "demand_cv": cv.to_numpy(),
+        "periods": periods
+    })
+
+
+def to_records(frame: pd.DataFrame):
+    """Строки DataFrame для executemany: типы Python вместо NumPy, NaN -> NULL"""
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None).to_dict("records")
+
+
+def run_classification(session, weeks: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Пересчет классификации всего каталога с заменой сохраненных результатов
+
+    Returns:
+        Количество товаров по сочетаниям классов
+    """
+    weeks = weeks or current_app.config.get("ABC_XYZ_WEEKS", 26)
+    computed_at = datetime.utcnow()
+    start = computed_at - timedelta(weeks=weeks)
+
+    product_ids = np.fromiter((row[0] for row in session.query(Product.id).all()), dtype=np.int64)
+    demand = load_weekly_demand(session, start)
+    result = classify(
+        demand, product_ids, weeks,
+        abc_thresholds=tuple(current_app.config.get("ABC_THRESHOLDS", (0.8, 0.95))),
+        xyz_thresholds=tuple(current_app.config.get("XYZ_THRESHOLDS", (0.25, 0.5)))
+    )
+
+    result["computed_at"] = computed_at
+    result["created_at"] = computed_at
+    result["updated_at"] = computed_at
+
+    # Полная замена в одной транзакции: читатели видят либо старый, либо новый расчет
+    session.execute(delete(ProductClassification.__table__))
+    if len(result):
+        session.execute(insert(ProductClassification.__table__), to_records(result))
+    session.commit()
+
+    summary = result.groupby(["abc_class", "xyz_class"]).size()
+    matrix = {f"{abc}{xyz}": int(count) for (abc, xyz), count in summary.items()}
+    logger.info(f"ABC/XYZ-классификация пересчитана для {len(result)} товаров: {matrix}")
+    return {"products": len(result), "matrix": matrix, "computed_at": computed_at.isoformat()}
@@ -0,0 +1,216 @@
+"""
+Кэш результатов аналитики
+
+Ответы эндпоинтов analytics_bp кэшируются по имени эндпоинта и нормализованным
+параметрам запроса. Первый уровень - LRU в памяти процесса, второй (при заданном
+ANALYTICS_CACHE_REDIS_URL) - Redis, общий для всех воркеров.
+
+Инвалидация выборочная: каждый эндпоинт зависит от тегов (orders, products),
+версия тега входит в ключ. После коммита транзакции, изменившей заказы или
+товары, версии соответствующих тегов увеличиваются, и старые записи перестают
+использоваться (вытесняются по LRU/TTL). Изменения через ORM отслеживаются
+автоматически; сервисы, меняющие данные запросами Core (upsert витрины продаж,
+архивация, пересчет витрины), инвалидируют теги явно.
+"""
+import logging
+from functools import wraps
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlencode
+
+from flask import Flask, current_app, jsonify, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..core.cache import TTLCache, RedisCache, MISSING
+from ..models.order import Order, OrderItem
+from ..models.archive import ArchivedOrder
+from ..models.analytics import DailySales
+from ..models.inventory import Product, Category, InventoryLog
+from ..models.valuation import ProductValuation
+
+logger = logging.getLogger(__name__)
+
+# Теги данных, от которых зависят результаты аналитики
+ORDERS = "orders"
+PRODUCTS = "products"
+
+# Модели, изменение которых инвалидирует тег
+TAGS_BY_MODEL = {
+    Order: ORDERS,
+    OrderItem: ORDERS,
+    ArchivedOrder: ORDERS,
+    DailySales: ORDERS,
+    Product: PRODUCTS,
+    Category: PRODUCTS,
+    InventoryLog: PRODUCTS,
+    ProductValuation: PRODUCTS,
+}
+
+# Ключ накопленных тегов в Session.info
+SESSION_TAGS_KEY = "analytics_cache_tags"
+
+
+class AnalyticsCache:
+    """Двухуровневый кэш результатов аналитики с версиями тегов"""
+
+    def __init__(self):
+        self.local = TTLCache()
+        self.redis: Optional[RedisCache] = None
+        self.redis_errors = 0
+
+    def init_app(self, app: Flask) -> None:
+        """Настройка размера LRU и подключения к Redis"""
+        self.local = TTLCache(max_entries=app.config.get("ANALYTICS_CACHE_MAX_ENTRIES", 1024))
+
+        redis_url = app.config.get("ANALYTICS_CACHE_REDIS_URL")
+        if redis_url:
+            import redis
+            self.redis = RedisCache(redis.Redis.from_url(redis_url), prefix="analytics:")
+            logger.info("Кэш аналитики использует Redis")
+
+    def _redis_call(self, method: Callable, *args, default: Any = None) -> Any:
+        """Обращение к Redis: при недоступности работаем только с локальным кэшем"""
+        try:
+            return method(*args)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Redis недоступен для кэша аналитики: {str(e)}")
+            return default
+
+    def versions(self, tags: Iterable[str]) -> List[int]:
+        """Текущие версии тегов"""
+        tags = list(tags)
+        if self.redis is not None:
+            versions = self._redis_call(self.redis.versions, tags)
+            if versions is not None:
+                return versions
+        return [self.local.version(tag) for tag in tags]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Инвалидация всех записей, зависящих от тегов"""
+        tags = list(tags)
+        for tag in tags:
+            self.local.bump(tag)
+        if self.redis is not None:
+            self._redis_call(self.redis.bump, tags)
+        logger.debug(f"Инвалидирован кэш аналитики: {', '.join(tags)}")
+
+    def get(self, key: str) -> Any:
+        value = self.local.get(key, MISSING)
+        if value is MISSING and self.redis is not None:
+            value = self._redis_call(self.redis.get, key, MISSING, default=MISSING)
+            if value is not MISSING:
+                self.local.set(key, value, current_app.config.get("ANALYTICS_CACHE_LOCAL_TTL_SECONDS", 30))
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.local.set(key, value, ttl)
+        if self.redis is not None:
+            self._redis_call(self.redis.set, key, value, ttl)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.redis is not None:
+            self._redis_call(self.redis.clear)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша для мониторинга"""
+        tags = sorted(set(TAGS_BY_MODEL.values()))
+        stats = {
+            "backend": "redis" if self.redis is not None else "memory",
+            "local": self.local.stats(),
+            "versions": dict(zip(tags, self.versions(tags))),
+        }
+        if self.redis is not None:
+            stats["redis"] = dict(self.redis.stats(), errors=self.redis_errors)
+        return stats
+
+
+# Экземпляр-одиночка
+analytics_cache = AnalyticsCache()
+
+
+def make_cache_key(tags: Iterable[str]) -> str:
+    """Ключ текущего запроса: эндпоинт, версии тегов и нормализованные параметры"""
+    params = sorted(
+        (name, ",".join(sorted(values)))
+        for name, values in request.args.lists()
+        if any(value != "" for value in values)
+    )
+    view_args = sorted((request.view_args or {}).items())
+    versions = ".".join(str(version) for version in analytics_cache.versions(tags))
+    return f"{request.endpoint}:{versions}:{urlencode(view_args + params)}"
+
+
+def cached_analytics(tags: Iterable[str], ttl_setting: str = "ANALYTICS_CACHE_TTL_SECONDS"):
+    """
+    Декоратор кэширования JSON-ответа эндпоинта аналитики
+
+    Кэшируются только ответы 200. Ответ сопровождается ETag, поэтому повторный
+    запрос с If-None-Match получает 304; заголовок X-Cache показывает HIT/MISS.
+
+    Args:
+        tags: Теги данных, от которых зависит результат
+        ttl_setting: Параметр конфигурации со временем жизни записи
+    """
+    tags = tuple(tags)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = make_cache_key(tags)
+            status = "HIT"
+
+            value = analytics_cache.get(key)
+            if value is MISSING:
+                with analytics_cache.local.key_lock(key):
+                    value = analytics_cache.get(key)
+                    if value is MISSING:
+                        status = "MISS"
+                        response = make_response(f(*args, **kwargs))
+                        if response.status_code != 200 or not response.is_json:
+                            return response
+                        value = response.get_json()
+                        ttl = current_app.config.get(ttl_setting, current_app.config.get("ANALYTICS_CACHE_TTL_SECONDS", 300))
+                        analytics_cache.set(key, value, ttl)
+
+            response = jsonify(value)
+            response.headers["X-Cache"] = status
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.add_etag()
+            return response.make_conditional(request)
+        return decorated
+    return decorator
+
+
+def invalidate_on_commit(session, tags: Iterable[str]) -> None:
+    """Инвалидация тегов после коммита текущей транзакции (для изменений запросами Core)"""
+    session.info.setdefault(SESSION_TAGS_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tags(session, flush_context):
+    """Сбор тегов измененных в транзакции объектов"""
+    tags = session.info.setdefault(SESSION_TAGS_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        tag = TAGS_BY_MODEL.get(type(obj))
+        if tag is not None and tag not in tags:
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            tags.add(tag)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    """Инвалидация кэша после фиксации изменений"""
+    tags = session.info.pop(SESSION_TAGS_KEY, None)
+    if tags:
+        analytics_cache.bump(sorted(tags))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tags(session):
+    """Откат транзакции: изменения не применены, инвалидация не нужна"""
+    session.info.pop(SESSION_TAGS_KEY, None)
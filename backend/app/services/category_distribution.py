@@ -0,0 +1,59 @@
+"""
+Распределение товаров по категориям
+"""
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import func
+
+from ..models.inventory import Product, Category
+
+
+def compute_category_distribution(session, supplier_id: Optional[int] = None,
+                                  low_stock: bool = False) -> List[Dict[str, Any]]:
+    """
+    Распределение товаров по категориям одним GROUP BY
+
+    Args:
+        session: Сессия SQLAlchemy
+        supplier_id: Только товары поставщика
+        low_stock: Только товары с остатком не выше минимального
+
+    Returns:
+        Категории с количеством товаров, суммарным остатком и стоимостью запаса
+    """
+    query = session.query(
+        Category.id,
+        Category.name,
+        func.count(Product.id),
+        func.coalesce(func.sum(Product.quantity), 0),
+        func.coalesce(func.sum(Product.quantity * Product.price), 0.0)
+    ).join(
+        Product, Product.category_id == Category.id
+    )
+
+    if supplier_id:
+        query = query.filter(Product.supplier_id == supplier_id)
+
+    if low_stock:
+        query = query.filter(Product.quantity <= Product.min_stock)
+
+    rows = query.group_by(Category.id, Category.name).all()
+
+    total_items = sum(row[2] for row in rows)
+    total_value = sum(float(row[4]) for row in rows)
+
+    result = []
+    for category_id, category_name, count, units, value in rows:
+        result.append({
+            'category_id': category_id,
+            'category': category_name,
+            'value': count,
+            'percentage': (count / total_items) * 100 if total_items > 0 else 0,
+            'total_units': int(units),
+            'total_value': float(value),
+            'value_percentage': (float(value) / total_value) * 100 if total_value > 0 else 0
+        })
+
+    # Сортировка по убыванию количества
+    result.sort(key=lambda x: x['value'], reverse=True)
+    return result
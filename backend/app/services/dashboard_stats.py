@@ -0,0 +1,90 @@
+"""
+Статистика для панели управления
+
+Продажи за сегодня, вчера, текущий и предыдущий месяц считаются одним
+запросом с условной агрегацией по витрине daily_sales, счетчики запасов
+и заказов - вторым запросом со скалярными подзапросами.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from sqlalchemy import func, case, select
+
+from ..models.inventory import Product
+from ..models.order import Order
+from ..models.analytics import DailySales
+from ..models.valuation import ProductValuation
+from . import sales_rollup
+
+
+def _period_sum(column, start, end=None):
+    """SUM(CASE ...) по витрине для диапазона дат [start, end)"""
+    condition = DailySales.sales_date >= start
+    if end is not None:
+        condition = condition & (DailySales.sales_date < end)
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def compute_dashboard_stats(session) -> Dict[str, Any]:
+    """Расчет статистики для панели управления двумя запросами"""
+    # Определение дат для разных периодов
+    today = datetime.utcnow().date()
+    yesterday = today - timedelta(days=1)
+    start_of_month = today.replace(day=1)
+    start_of_prev_month = (start_of_month - timedelta(days=1)).replace(day=1)
+
+    # Продажи за все периоды одним запросом
+    sales = sales_rollup.sales_filter(session.query(
+        _period_sum(DailySales.total_amount, today).label("today"),
+        _period_sum(DailySales.total_amount, yesterday, today).label("yesterday"),
+        _period_sum(DailySales.total_amount, start_of_month).label("this_month"),
+        _period_sum(DailySales.total_amount, start_of_prev_month, start_of_month).label("prev_month"),
+        _period_sum(DailySales.order_count, today).label("today_count")
+    )).filter(
+        DailySales.sales_date >= min(start_of_prev_month, yesterday)
+    ).one()
+
+    # Счетчики запасов и заказов одним запросом
+    counts = session.execute(select(
+        select(func.count(Product.id)).scalar_subquery().label("total_items"),
+        select(func.count(Product.id)).where(
+            Product.quantity <= Product.min_stock
+        ).scalar_subquery().label("low_stock_items"),
+        select(func.count(Order.id)).where(
+            Order.status == 'pending'
+        ).scalar_subquery().label("pending_count"),
+        # Стоимость запаса по FIFO из поддерживаемой оценки (без пересчета по движениям)
+        select(func.coalesce(func.sum(ProductValuation.fifo_value), 0)).scalar_subquery().label("inventory_value")
+    )).one()
+
+    total_sales_today = float(sales.today)
+    total_sales_yesterday = float(sales.yesterday)
+    total_sales_this_month = float(sales.this_month)
+    total_sales_prev_month = float(sales.prev_month)
+    total_inventory = counts.total_items
+    low_stock_items = counts.low_stock_items
+
+    # Расчет изменений в процентах
+    sales_change_daily = ((total_sales_today - total_sales_yesterday) / total_sales_yesterday * 100) if total_sales_yesterday > 0 else 0
+    sales_change_monthly = ((total_sales_this_month - total_sales_prev_month) / total_sales_prev_month * 100) if total_sales_prev_month > 0 else 0
+
+    return {
+        "sales": {
+            "today": total_sales_today,
+            "yesterday": total_sales_yesterday,
+            "this_month": total_sales_this_month,
+            "prev_month": total_sales_prev_month,
+            "daily_change_percent": sales_change_daily,
+            "monthly_change_percent": sales_change_monthly
+        },
+        "inventory": {
+            "total_items": total_inventory,
+            "low_stock_items": low_stock_items,
+            "low_stock_percent": (low_stock_items / total_inventory * 100) if total_inventory > 0 else 0,
+            "value": round(float(counts.inventory_value), 2)
+        },
+        "orders": {
+            "pending_count": counts.pending_count,
+            "today_count": int(sales.today_count)
+        }
+    }
@@ -0,0 +1,170 @@
+"""
+Сохраненные прогнозы спроса
+
+Прогнозы всех товаров с продажами на FORECAST_HORIZON_DAYS дней строятся
+пакетно (InventoryForecaster.predict_batch) задачей по расписанию и
+сохраняются в demand_forecasts с версией модели. Прогноз товара и данные для
+рекомендаций по пополнению читаются одним запросом по уникальному индексу
+(версия, товар, дата); время генерации отдается как признак свежести.
+Обучение новой модели удаляет прогнозы прежних версий.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import delete, func, insert
+
+from ..models.inventory import Product
+from ..models.analytics import DemandForecast
+from .abc_xyz import to_records
+
+logger = logging.getLogger(__name__)
+
+
+def get_horizon() -> int:
+    """Горизонт сохраняемых прогнозов (дни)"""
+    return int(current_app.config.get("FORECAST_HORIZON_DAYS", 30))
+
+
+def generate_forecasts(session, forecaster, horizon: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Генерация прогнозов всех товаров текущей версией модели с заменой сохраненных
+
+    Raises:
+        ValueError: Модель еще не обучена
+    """
+    version = forecaster.model_version
+    if version is None:
+        raise ValueError("Модель прогнозирования не обучена")
+
+    horizon = horizon or get_horizon()
+    generated_at = datetime.utcnow()
+    product_ids, dates, predictions = forecaster.predict_batch(days_ahead=horizon)
+
+    frame = pd.DataFrame({
+        "product_id": np.repeat(product_ids, len(dates)),
+        "forecast_date": np.tile(dates.date, len(product_ids)),
+        "predicted_quantity": predictions.ravel()
+    })
+    frame["model_version"] = version
+    frame["generated_at"] = generated_at
+    frame["created_at"] = generated_at
+    frame["updated_at"] = generated_at
+
+    # Полная замена в одной транзакции (прогнозы прежних версий тоже удаляются)
+    session.execute(delete(DemandForecast.__table__))
+    if len(frame):
+        session.execute(insert(DemandForecast.__table__), to_records(frame))
+    session.commit()
+
+    logger.info(f"Прогнозы спроса сгенерированы: {len(product_ids)} товаров, {horizon} дней, версия {version}")
+    return {
+        "products": len(product_ids),
+        "horizon": horizon,
+        "model_version": version,
+        "generated_at": generated_at.isoformat()
+    }
+
+
+def purge_forecasts(session, keep_version: Optional[str] = None) -> int:
+    """Удаление прогнозов всех версий, кроме keep_version"""
+    table = DemandForecast.__table__
+    stmt = delete(table)
+    if keep_version is not None:
+        stmt = stmt.where(table.c.model_version != keep_version)
+    deleted = session.execute(stmt).rowcount
+    logger.info(f"Удалены прогнозы прежних версий модели: {deleted}")
+    return deleted
+
+
+def _generated_at(session, version: str) -> Optional[datetime]:
+    """Время генерации прогнозов версии (None - прогнозы не генерировались)"""
+    return session.query(DemandForecast.generated_at).filter(
+        DemandForecast.model_version == version
+    ).limit(1).scalar()
+
+
+def get_stored_forecast(session, product_id: int, version: Optional[str],
+                        days: int) -> Optional[Tuple[List[Dict[str, Any]], datetime]]:
+    """
+    Сохраненный прогноз товара начиная с текущего дня
+
+    Returns:
+        (прогноз по дням, время генерации) или None, если для версии модели
+        прогнозы не генерировались
+    """
+    if version is None:
+        return None
+
+    rows = session.query(DemandForecast).filter(
+        DemandForecast.model_version == version,
+        DemandForecast.product_id == product_id,
+        DemandForecast.forecast_date >= date.today()
+    ).order_by(DemandForecast.forecast_date).limit(days).all()
+
+    if rows:
+        return [row.to_dict() for row in rows], rows[0].generated_at
+
+    # Товар без прогноза: нет продаж за окно истории или прогнозы еще не построены
+    generated_at = _generated_at(session, version)
+    return ([], generated_at) if generated_at else None
+
+
+def get_stored_demand(session, version: Optional[str],
+                      horizon: int = 14) -> Optional[Tuple[list, pd.Series, datetime]]:
+    """
+    Средний прогнозируемый дневной спрос товаров с минимальным порогом
+
+    Returns:
+        (строки товаров (id, name, quantity, min_stock), спрос по id товара,
+        время генерации) или None, если для версии модели прогнозы не генерировались
+    """
+    if version is None:
+        return None
+
+    start = date.today()
+    rows = session.query(
+        Product.id, Product.name, Product.quantity, Product.min_stock,
+        func.avg(DemandForecast.predicted_quantity),
+        func.min(DemandForecast.generated_at)
+    ).join(
+        DemandForecast, DemandForecast.product_id == Product.id
+    ).filter(
+        DemandForecast.model_version == version,
+        DemandForecast.forecast_date >= start,
+        DemandForecast.forecast_date < start + timedelta(days=horizon),
+        Product.min_stock.isnot(None)
+    ).group_by(Product.id, Product.name, Product.quantity, Product.min_stock).all()
+
+    generated_at = min((row[5] for row in rows), default=None) or _generated_at(session, version)
+    if generated_at is None:
+        return None
+
+    products = [row[:4] for row in rows]
+    demand = pd.Series([float(row[4]) for row in rows], index=[row[0] for row in rows], dtype=float)
+    return products, demand, generated_at
+
+
+def forecast_headers(version: Optional[str], generated_at: Optional[datetime]) -> Dict[str, str]:
+    """
+    Заголовки свежести ответа: источник (stored - сохраненный прогноз, live -
+    расчет в запросе), время генерации, версия модели и признак устаревания
+    """
+    if generated_at is None:
+        return {
+            "X-Forecast-Source": "live",
+            "X-Forecast-Generated-At": datetime.utcnow().isoformat(),
+            "X-Forecast-Model-Version": version or "",
+            "X-Forecast-Stale": "false"
+        }
+
+    max_age = timedelta(hours=current_app.config.get("FORECAST_MAX_AGE_HOURS", 36))
+    return {
+        "X-Forecast-Source": "stored",
+        "X-Forecast-Generated-At": generated_at.isoformat(),
+        "X-Forecast-Model-Version": version or "",
+        "X-Forecast-Stale": "true" if datetime.utcnow() - generated_at > max_age else "false"
+    }
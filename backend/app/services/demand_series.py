@@ -0,0 +1,263 @@
+"""
+Дневные ряды спроса для прогнозирования
+
+Спрос хранится матрицей товар x день на непрерывном календаре: дни без
+продаж заполнены нулями, поэтому лаг k - это спрос k дней назад, а не k
+строк заказов назад, и размер обучающей выборки зависит от числа дней, а не
+от числа строк заказов. Скользящие статистики считаются по предыдущим дням
+(без текущего) через накопленные суммы - векторно для всех товаров.
+
+Ряды отдельных товаров кэшируются в памяти процесса; ключ включает версию
+тега заказов кэша аналитики и текущую дату, поэтому новые заказы и смена
+дня дают новый ряд.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select
+
+from ..core.cache import TTLCache, MISSING
+from ..models.order import Order, OrderItem, SALES_ORDER_TYPE, SALES_STATUSES
+from .analytics_cache import analytics_cache, ORDERS
+
+logger = logging.getLogger(__name__)
+
+# Лаги спроса и окна скользящих статистик (в днях)
+LAGS = (1, 7, 14, 30)
+ROLLING_WINDOWS = (7, 28)
+
+SEASONAL_COLUMNS = ['day_sin', 'day_cos', 'month_sin', 'month_cos']
+LAG_COLUMNS = [f'lag_{lag}' for lag in LAGS]
+ROLLING_COLUMNS = [f'rolling_{stat}_{window}' for window in ROLLING_WINDOWS for stat in ('mean', 'std')]
+
+# Признаки модели в порядке столбцов матрицы
+FEATURE_COLUMNS = SEASONAL_COLUMNS + LAG_COLUMNS + ROLLING_COLUMNS
+
+# Дней истории, необходимых для расчета всех признаков
+HISTORY_DAYS = max(max(LAGS), max(ROLLING_WINDOWS))
+
+# Размер пачки строк потокового запроса
+DEMAND_BATCH_SIZE = 50000
+
+
+@dataclass
+class DemandSeries:
+    """Дневной спрос товаров на общем календаре"""
+    product_ids: np.ndarray  # (товары,)
+    dates: pd.DatetimeIndex  # (дни,)
+    values: np.ndarray  # (товары, дни)
+
+    def __len__(self):
+        return len(self.product_ids)
+
+
+def load_daily_demand(session, start: datetime, product_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """
+    Дневной спрос товаров одним потоковым запросом
+
+    Строки заказов читаются пачками и сразу сворачиваются до (товар, день),
+    поэтому память зависит от числа товаро-дней, а не строк заказов.
+
+    Returns:
+        DataFrame с колонками product_id, date, quantity (только дни с продажами)
+    """
+    stmt = select(OrderItem.product_id, Order.created_at, OrderItem.quantity).join(
+        Order, Order.id == OrderItem.order_id
+    ).where(
+        Order.created_at > start,
+        Order.order_type == SALES_ORDER_TYPE,
+        Order.status.in_(SALES_STATUSES)
+    )
+    if product_ids is not None:
+        stmt = stmt.where(OrderItem.product_id.in_(list(product_ids)))
+
+    result = session.execute(stmt.execution_options(stream_results=True, max_row_buffer=DEMAND_BATCH_SIZE))
+
+    chunks = []
+    for batch in result.partitions(DEMAND_BATCH_SIZE):
+        chunk = pd.DataFrame.from_records(batch, columns=['product_id', 'created_at', 'quantity'])
+        chunk['date'] = pd.to_datetime(chunk['created_at']).dt.normalize()
+        chunks.append(chunk.groupby(['product_id', 'date'], as_index=False)['quantity'].sum())
+
+    if not chunks:
+        return pd.DataFrame({
+            'product_id': pd.Series(dtype='int64'),
+            'date': pd.Series(dtype='datetime64[ns]'),
+            'quantity': pd.Series(dtype='float64')
+        })
+
+    # Пачки могут разрезать один день товара - повторная свертка
+    demand = pd.concat(chunks, ignore_index=True).groupby(['product_id', 'date'], as_index=False)['quantity'].sum()
+    demand['quantity'] = demand['quantity'].astype(float)
+    return demand
+
+
+def to_series(daily: pd.DataFrame, dates: pd.DatetimeIndex,
+              product_ids: Optional[Iterable[int]] = None) -> DemandSeries:
+    """
+    Матрица спроса на календаре dates с нулями в дни без продаж
+
+    Args:
+        daily: Дневной спрос (product_id, date, quantity)
+        dates: Непрерывный календарь
+        product_ids: Товары (по умолчанию - товары с продажами)
+    """
+    if product_ids is None:
+        product_ids = np.unique(daily['product_id'].to_numpy())
+    product_ids = np.asarray(list(product_ids), dtype=np.int64)
+    if daily.empty:
+        return DemandSeries(product_ids=product_ids, dates=dates, values=np.zeros((len(product_ids), len(dates))))
+
+    matrix = daily.pivot_table(index='product_id', columns='date', values='quantity', aggfunc='sum')
+    matrix = matrix.reindex(index=product_ids, columns=dates, fill_value=0.0).fillna(0.0)
+    return DemandSeries(product_ids=product_ids, dates=dates, values=matrix.to_numpy(dtype=float))
+
+
+def calendar(days: int, end: Optional[datetime] = None) -> pd.DatetimeIndex:
+    """Последние days дней, включая текущий"""
+    end = pd.Timestamp(end or datetime.now()).normalize()
+    return pd.date_range(end=end, periods=days, freq='D')
+
+
+def load_series(session, days: int = 90, product_ids: Optional[Iterable[int]] = None,
+                end: Optional[datetime] = None) -> DemandSeries:
+    """Ряды спроса за последние days дней одним запросом"""
+    dates = calendar(days, end)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+    daily = load_daily_demand(session, dates[0].to_pydatetime(), product_ids)
+    return to_series(daily, dates, product_ids)
+
+
+def seasonal_features(dates) -> np.ndarray:
+    """Сезонные признаки дат: (дни, 4)"""
+    dates = pd.DatetimeIndex(dates)
+    day_of_week = dates.weekday.to_numpy()
+    month = dates.month.to_numpy()
+    return np.column_stack([
+        np.sin(2 * np.pi * day_of_week / 7),
+        np.cos(2 * np.pi * day_of_week / 7),
+        np.sin(2 * np.pi * month / 12),
+        np.cos(2 * np.pi * month / 12)
+    ])
+
+
+def _rolling(values: np.ndarray, window: int):
+    """Среднее и стандартное отклонение за window предыдущих дней для каждого дня"""
+    zeros = np.zeros((values.shape[0], 1))
+    cumsum = np.hstack([zeros, np.cumsum(values, axis=1)])
+    cumsq = np.hstack([zeros, np.cumsum(values ** 2, axis=1)])
+
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    # День t: сумма values[t - window : t]
+    total = cumsum[:, window:-1] - cumsum[:, :-window - 1]
+    total_sq = cumsq[:, window:-1] - cumsq[:, :-window - 1]
+    mean[:, window:] = total / window
+    std[:, window:] = np.sqrt(np.clip(total_sq / window - (total / window) ** 2, 0.0, None))
+    return mean, std
+
+
+def feature_frame(series: DemandSeries) -> pd.DataFrame:
+    """
+    Обучающая выборка: строка на товар и день с полной историей признаков
+
+    Returns:
+        DataFrame с колонками product_id, date, quantity и FEATURE_COLUMNS
+    """
+    n_products, n_days = series.values.shape
+    if n_products == 0 or n_days <= HISTORY_DAYS:
+        return pd.DataFrame(columns=['product_id', 'date', 'quantity'] + FEATURE_COLUMNS)
+
+    columns = {}
+    seasonal = seasonal_features(series.dates)
+    for index, name in enumerate(SEASONAL_COLUMNS):
+        columns[name] = np.broadcast_to(seasonal[:, index], series.values.shape)
+
+    for lag in LAGS:
+        lagged = np.full(series.values.shape, np.nan)
+        lagged[:, lag:] = series.values[:, :-lag]
+        columns[f'lag_{lag}'] = lagged
+
+    for window in ROLLING_WINDOWS:
+        columns[f'rolling_mean_{window}'], columns[f'rolling_std_{window}'] = _rolling(series.values, window)
+
+    # Первые HISTORY_DAYS дней не имеют полной истории
+    keep = slice(HISTORY_DAYS, n_days)
+    kept_days = n_days - HISTORY_DAYS
+    frame = pd.DataFrame({
+        'product_id': np.repeat(series.product_ids, kept_days),
+        'date': np.tile(series.dates[keep].to_numpy(), n_products),
+        'quantity': series.values[:, keep].ravel()
+    })
+    for name in FEATURE_COLUMNS:
+        frame[name] = columns[name][:, keep].ravel()
+    return frame
+
+
+def next_day_features(history: np.ndarray, date) -> np.ndarray:
+    """
+    Признаки следующего дня по последним дням истории
+
+    Args:
+        history: Спрос (товары, дни), последний столбец - предыдущий день; не короче HISTORY_DAYS
+        date: Дата прогнозируемого дня
+
+    Returns:
+        Матрица (товары, len(FEATURE_COLUMNS))
+    """
+    seasonal = np.broadcast_to(seasonal_features([date])[0], (history.shape[0], len(SEASONAL_COLUMNS)))
+    lags = np.column_stack([history[:, -lag] for lag in LAGS])
+    rolling = []
+    for window in ROLLING_WINDOWS:
+        recent = history[:, -window:]
+        rolling.extend([recent.mean(axis=1), recent.std(axis=1)])
+    return np.hstack([seasonal, lags, np.column_stack(rolling)])
+
+
+class SeriesCache:
+    """Кэш дневных рядов отдельных товаров"""
+
+    def __init__(self):
+        self.cache = TTLCache(max_entries=4096)
+
+    def _key(self, product_id: int, days: int, end: pd.Timestamp, version: int) -> str:
+        return f"{product_id}:{days}:{end.date().isoformat()}:{version}"
+
+    def get(self, session, product_ids: Iterable[int], days: int = 90) -> DemandSeries:
+        """
+        Ряды товаров (в порядке product_ids); отсутствующие в кэше
+        загружаются одним запросом
+        """
+        product_ids = [int(product_id) for product_id in product_ids]
+        dates = calendar(days)
+        version = analytics_cache.versions([ORDERS])[0]
+        ttl = current_app.config.get("FORECAST_SERIES_TTL_SECONDS", 600)
+
+        rows = {}
+        for product_id in product_ids:
+            value = self.cache.get(self._key(product_id, days, dates[-1], version), MISSING)
+            if value is not MISSING:
+                rows[product_id] = value
+
+        missing = [product_id for product_id in product_ids if product_id not in rows]
+        if missing:
+            loaded = load_series(session, days, missing, end=dates[-1])
+            for product_id, values in zip(loaded.product_ids, loaded.values):
+                rows[int(product_id)] = values
+                self.cache.set(self._key(int(product_id), days, dates[-1], version), values, ttl)
+
+        values = np.vstack([rows[product_id] for product_id in product_ids]) if product_ids else np.zeros((0, days))
+        return DemandSeries(product_ids=np.asarray(product_ids, dtype=np.int64), dates=dates, values=values)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+# Экземпляр-одиночка (по одному на процесс)
+series_cache = SeriesCache()
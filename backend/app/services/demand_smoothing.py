@@ -0,0 +1,170 @@
+"""
+Инкрементальная модель спроса: экспоненциальное сглаживание по товарам
+
+Для каждого товара хранится состояние аддитивной модели Хольта-Винтерса без
+тренда: уровень спроса и поправки по дням недели, а также watermark -
+последний учтенный день. Ночное обновление читает только дни после watermark
+(последний день - вчерашний, текущий день еще не завершен) и обновляет
+состояния всех товаров векторно: цикл идет по новым дням, а не по товарам.
+
+Задним числом измененные заказы (отмена, смена статуса) в инкрементальном
+режиме не учитываются, поэтому еженедельное полное переобучение пересчитывает
+состояния с начала окна FORECAST_SMOOTHING_INIT_DAYS.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import delete, insert
+
+from ..models.analytics import DemandSmoothingState
+from .demand_series import load_daily_demand, to_series
+
+logger = logging.getLogger(__name__)
+
+# Длина сезона (дни недели)
+SEASON_LENGTH = 7
+
+
+def smooth(level: np.ndarray, seasonal: np.ndarray, observations: np.ndarray, watermarks: np.ndarray,
+           values: np.ndarray, dates: pd.DatetimeIndex, alpha: float,
+           gamma: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Обновление состояний по дням dates (векторно для всех товаров)
+
+    Args:
+        level: Уровни (товары,)
+        seasonal: Поправки по дням недели (товары, 7)
+        observations: Учтенных дней (товары,); товар без наблюдений
+            инициализируется первым днем
+        watermarks: Последний учтенный день товара, datetime64[D] (NaT - нет состояния)
+        values: Спрос (товары, дни)
+        alpha, gamma: Коэффициенты сглаживания уровня и сезонности
+
+    Returns:
+        Новые (level, seasonal, observations)
+    """
+    level = level.astype(float).copy()
+    seasonal = seasonal.astype(float).copy()
+    observations = observations.astype(int).copy()
+
+    days = dates.to_numpy().astype("datetime64[D]")
+    for index, day in enumerate(days):
+        # День учитывается только товарами, для которых он новый
+        active = np.isnat(watermarks) | (watermarks < day)
+        demand = values[:, index]
+        weekday = dates[index].weekday()
+
+        first = active & (observations == 0)
+        update = active & ~first
+        season = seasonal[:, weekday]
+        new_level = alpha * (demand - season) + (1 - alpha) * level
+        seasonal[update, weekday] = (gamma * (demand - new_level) + (1 - gamma) * season)[update]
+        level[update] = new_level[update]
+        level[first] = demand[first]
+        observations[active] += 1
+
+    return level, seasonal, observations
+
+
+def _load_states(session, product_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """Сохраненные состояния по товарам"""
+    query = session.query(
+        DemandSmoothingState.product_id,
+        DemandSmoothingState.level,
+        DemandSmoothingState.seasonal,
+        DemandSmoothingState.observations,
+        DemandSmoothingState.watermark
+    )
+    if product_ids is not None:
+        query = query.filter(DemandSmoothingState.product_id.in_([int(product_id) for product_id in product_ids]))
+    return pd.DataFrame.from_records(
+        query.all(), columns=["product_id", "level", "seasonal", "observations", "watermark"]
+    ).set_index("product_id")
+
+
+def _seasonal_matrix(states: pd.DataFrame) -> np.ndarray:
+    """Поправки по дням недели матрицей (товары, 7); товары без состояния - нули"""
+    return np.array([
+        seasonal if isinstance(seasonal, list) and len(seasonal) == SEASON_LENGTH else [0.0] * SEASON_LENGTH
+        for seasonal in states["seasonal"]
+    ], dtype=float).reshape(len(states), SEASON_LENGTH)
+
+
+def update_states(session, rebuild: bool = False, end: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Обновление состояний по дням после watermark (rebuild - пересчет с начала окна)
+
+    Returns:
+        Количество товаров, обработанных дней и новый watermark
+    """
+    alpha = float(current_app.config.get("FORECAST_SMOOTHING_ALPHA", 0.3))
+    gamma = float(current_app.config.get("FORECAST_SMOOTHING_GAMMA", 0.1))
+    init_days = int(current_app.config.get("FORECAST_SMOOTHING_INIT_DAYS", 90))
+
+    # Последний завершенный день
+    last_day = pd.Timestamp(end or datetime.now()).normalize() - pd.Timedelta(days=1)
+    window_start = last_day - pd.Timedelta(days=init_days - 1)
+
+    states = _load_states(session)
+    if rebuild:
+        states = states.iloc[0:0]
+    start = window_start
+    if len(states):
+        start = max(pd.Timestamp(states["watermark"].min()) + pd.Timedelta(days=1), window_start)
+    if start > last_day:
+        return {"products": len(states), "days": 0, "watermark": last_day.date().isoformat()}
+
+    dates = pd.date_range(start, last_day, freq="D")
+    daily = load_daily_demand(session, dates[0].to_pydatetime())
+    product_ids = np.union1d(states.index.to_numpy(dtype=np.int64), daily["product_id"].to_numpy(dtype=np.int64))
+    series = to_series(daily, dates, product_ids)
+
+    states = states.reindex(product_ids)
+    level, seasonal, observations = smooth(
+        states["level"].fillna(0.0).to_numpy(dtype=float),
+        _seasonal_matrix(states),
+        states["observations"].fillna(0).to_numpy(dtype=int),
+        pd.to_datetime(states["watermark"]).to_numpy().astype("datetime64[D]"),
+        series.values, dates, alpha, gamma
+    )
+
+    # Полная замена в одной транзакции
+    now = datetime.utcnow()
+    watermark = last_day.date()
+    session.execute(delete(DemandSmoothingState.__table__))
+    if len(product_ids):
+        session.execute(insert(DemandSmoothingState.__table__), [
+            {
+                "product_id": int(product_id),
+                "level": float(level[index]),
+                "seasonal": [float(value) for value in seasonal[index]],
+                "observations": int(observations[index]),
+                "watermark": watermark,
+                "created_at": now,
+                "updated_at": now
+            }
+            for index, product_id in enumerate(product_ids)
+        ])
+    session.commit()
+
+    logger.info(f"Состояния сглаживания спроса обновлены: {len(product_ids)} товаров, {len(dates)} дней")
+    return {"products": len(product_ids), "days": len(dates), "watermark": watermark.isoformat()}
+
+
+def smoothing_forecast(session, product_ids: Iterable[int], dates: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Прогноз сглаживания на даты dates: уровень плюс поправка дня недели
+
+    Returns:
+        Матрица (товары, дни); для товаров без состояния - NaN
+    """
+    product_ids = np.asarray(list(product_ids), dtype=np.int64)
+    states = _load_states(session, product_ids).reindex(product_ids)
+
+    weekdays = np.asarray(dates.weekday)
+    forecast = states["level"].to_numpy(dtype=float)[:, None] + _seasonal_matrix(states)[:, weekdays]
+    return np.maximum(0.0, forecast)
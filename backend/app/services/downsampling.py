@@ -0,0 +1,110 @@
+"""
+Прореживание временных рядов для графиков
+
+Длинные ряды (тренды продаж, история остатков) сокращаются до max_points
+точек с сохранением формы графика:
+- lttb: Largest-Triangle-Three-Buckets, из каждой корзины выбирается точка,
+  образующая наибольший треугольник с соседними корзинами;
+- minmax: из каждой корзины берутся минимум и максимум (сохраняет пики).
+
+Выбираются исходные точки, поэтому остальные поля записей не меняются.
+"""
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+# Поддерживаемые методы прореживания
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+# Минимальное количество точек, до которого прореживается ряд
+MIN_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Индексы точек, выбранных алгоритмом LTTB
+
+    Первая и последняя точки сохраняются всегда, остальные делятся на
+    max_points - 2 корзины; площади треугольников внутри корзины считаются векторно.
+    """
+    n = len(y)
+    if max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    edges = np.append(edges, n)
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+
+        # Вершина треугольника в следующей корзине - ее средняя точка
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Индексы минимума и максимума в каждой корзине (плюс первая и последняя точки)"""
+    n = len(y)
+    if max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    buckets = max(1, (max_points - 2) // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    bucket_ids = np.searchsorted(edges, np.arange(n), side="right") - 1
+
+    # Сортировка по (корзина, значение): первая точка корзины - минимум, последняя - максимум
+    order = np.lexsort((y, bucket_ids))
+    minimums = order[edges[:-1]]
+    maximums = order[edges[1:] - 1]
+
+    return np.unique(np.concatenate(([0, n - 1], minimums, maximums)))
+
+
+def downsample(points: Sequence[Dict[str, Any]], value_key: str, max_points: int,
+               method: str = "lttb", x_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Прореживание ряда записей
+
+    Args:
+        points: Записи ряда, упорядоченные по времени
+        value_key: Ключ значения (ось Y)
+        max_points: Максимальное количество точек в результате
+        method: Метод прореживания (lttb, minmax)
+        x_key: Ключ числовой оси X; None - точки считаются равноотстоящими
+
+    Returns:
+        Подмножество исходных записей в исходном порядке
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Недопустимый метод прореживания. Допустимые значения: {list(DOWNSAMPLE_METHODS)}")
+
+    if len(points) <= max_points:
+        return list(points)
+
+    y = np.fromiter((point[value_key] for point in points), dtype=float, count=len(points))
+
+    if method == "minmax":
+        indices = minmax_indices(y, max_points)
+    else:
+        if x_key is None:
+            x = np.arange(len(points), dtype=float)
+        else:
+            x = np.fromiter((point[x_key] for point in points), dtype=float, count=len(points))
+        indices = lttb_indices(x, y, max_points)
+
+    return [points[i] for i in indices]
@@ -0,0 +1,135 @@
+"""
+Поток событий для клиентов (Server-Sent Events)
+
+Outbox-диспетчер публикует доставленные события в канал Redis. В каждом
+воркере gunicorn один фоновый поток держит единственную подписку на канал
+и раздает события в очереди подключенных клиентов, поэтому количество
+подключений к Redis не зависит от количества открытых дашбордов.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from flask import Flask
+
+from ..models.user import UserRole
+from .events import ORDER_CREATED, ORDER_STATUS_CHANGED, STOCK_CHANGED, REPORT_FINISHED
+
+logger = logging.getLogger(__name__)
+
+# События, передаваемые клиентам
+STREAM_EVENT_TYPES = (ORDER_CREATED, ORDER_STATUS_CHANGED, STOCK_CHANGED, REPORT_FINISHED)
+
+# События, адресованные только пользователю из payload.user_id
+PRIVATE_EVENT_TYPES = (REPORT_FINISHED,)
+
+# События заказов: сотрудник видит только свои заказы (как в API заказов)
+ORDER_EVENT_TYPES = (ORDER_CREATED, ORDER_STATUS_CHANGED)
+
+
+def is_visible(message: Dict[str, Any], user_id: int, role: Optional[str] = None) -> bool:
+    """Должен ли пользователь с указанной ролью получить событие"""
+    event_type = message.get("event_type")
+    owner_id = (message.get("payload") or {}).get("user_id")
+    if event_type in PRIVATE_EVENT_TYPES:
+        return owner_id == user_id
+    if event_type in ORDER_EVENT_TYPES and role == UserRole.EMPLOYEE.value:
+        return owner_id == user_id
+    return True
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    """Сериализация события в формат text/event-stream"""
+    return f"id: {message['id']}\nevent: {message['event_type']}\ndata: {json.dumps(message)}\n\n"
+
+
+class EventBroker:
+    """Подписка воркера на канал событий Redis и раздача событий клиентам"""
+
+    def __init__(self):
+        self.redis_url: Optional[str] = None
+        self.channel = "inventory-events"
+        self.queue_size = 100
+        self._client = None
+        self._subscribers: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def init_app(self, app: Flask) -> None:
+        """Настройки подключения (поток подписки запускается при первом клиенте)"""
+        self.redis_url = app.config.get("EVENTS_REDIS_URL") or app.config.get("CELERY_BROKER_URL")
+        self.channel = app.config.get("EVENTS_CHANNEL", self.channel)
+        self.queue_size = app.config.get("EVENTS_QUEUE_SIZE", self.queue_size)
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        """Публикация события для всех воркеров (без гарантии доставки)"""
+        if message.get("event_type") not in STREAM_EVENT_TYPES:
+            return
+        try:
+            self._redis().publish(self.channel, json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Не удалось опубликовать событие {message.get('id')} в поток: {str(e)}")
+
+    def subscribe(self) -> queue.Queue:
+        """Очередь событий для нового клиента"""
+        subscriber: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name="event-broker", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _fan_out(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Медленный клиент: отбрасываем самое старое событие
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _listen(self) -> None:
+        """Фоновая подписка на канал с переподключением"""
+        delay = 1
+        while True:
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                logger.info(f"Подписка на канал событий {self.channel}")
+                delay = 1
+                for item in pubsub.listen():
+                    try:
+                        self._fan_out(json.loads(item["data"]))
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Некорректное сообщение в канале событий: {str(e)}")
+            except Exception as e:
+                logger.error(f"Ошибка подписки на канал событий: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+# Экземпляр-одиночка (по одному на процесс)
+event_broker = EventBroker()
@@ -0,0 +1,89 @@
+"""
+Доменные события (transactional outbox)
+
+События добавляются в текущую сессию и фиксируются одним коммитом
+вместе с изменением данных. Доставку выполняет задача app.tasks.outbox.dispatch_outbox.
+"""
+import logging
+from typing import Dict, Any, Optional
+
+from ..models.event import OutboxEvent
+from ..models.order import Order
+from ..models.inventory import Product
+
+logger = logging.getLogger(__name__)
+
+# Типы событий
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+STOCK_CHANGED = "stock.changed"
+REPORT_FINISHED = "report.finished"
+
+
+def record_event(session, event_type: str, aggregate_type: str, aggregate_id: int,
+                 payload: Optional[Dict[str, Any]] = None) -> OutboxEvent:
+    """
+    Запись события в outbox без фиксации транзакции
+
+    Args:
+        session: Сессия SQLAlchemy, в которой выполняется изменение
+        event_type: Тип события
+        aggregate_type: Тип агрегата (order, product)
+        aggregate_id: Идентификатор агрегата
+        payload: Данные события
+
+    Returns:
+        Созданное событие (будет сохранено при коммите сессии)
+    """
+    event = OutboxEvent(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload or {}
+    )
+    session.add(event)
+    logger.debug(f"Событие {event_type} для {aggregate_type}={aggregate_id} добавлено в outbox")
+    return event
+
+
+def order_payload(order: Order) -> Dict[str, Any]:
+    """Данные заказа для событий"""
+    return {
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "order_type": order.order_type,
+        "status": order.status,
+        "supplier_id": order.supplier_id,
+        "user_id": order.user_id,
+        "total_amount": order.total_amount,
+        "items": [
+            {"product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price}
+            for item in order.items
+        ]
+    }
+
+
+def record_order_created(session, order: Order) -> OutboxEvent:
+    """Событие создания заказа (заказ должен иметь id - выполните flush)"""
+    return record_event(session, ORDER_CREATED, "order", order.id, order_payload(order))
+
+
+def record_order_status_changed(session, order: Order, old_status: str) -> OutboxEvent:
+    """Событие изменения статуса заказа"""
+    payload = order_payload(order)
+    payload["old_status"] = old_status
+    return record_event(session, ORDER_STATUS_CHANGED, "order", order.id, payload)
+
+
+def record_stock_changed(session, product: Product, old_quantity: int, reason: str) -> OutboxEvent:
+    """Событие изменения остатка товара"""
+    return record_event(session, STOCK_CHANGED, "product", product.id, {
+        "product_id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "old_quantity": old_quantity,
+        "new_quantity": product.quantity,
+        "quantity_change": product.quantity - old_quantity,
+        "min_stock": product.min_stock,
+        "reason": reason
+    })
@@ -0,0 +1,271 @@
+"""
+Показатели оборачиваемости запасов
+
+Для каждого окна из INVENTORY_METRICS_WINDOWS рассчитываются:
+- turnover - проданные единицы / средний запас за окно;
+- days_of_supply - на сколько дней хватит текущего остатка при среднем спросе окна;
+- sell_through - доля проданного от доступного за окно (начальный запас + поступления).
+
+Суммы спроса и поступлений по всем окнам получаются агрегирующими
+запросами с условными суммами (по заказам продаж и по журналу остатков),
+показатели товаров и категорий считаются векторно в pandas. Результаты
+сохраняются в inventory_metrics ночной задачей и отдаются API с курсорной
+пагинацией по любому показателю.
+"""
+import base64
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import and_, case, delete, func, insert, or_
+
+from ..models.order import Order, OrderItem, SALES_ORDER_TYPE, SALES_STATUSES
+from ..models.inventory import Product, Category, InventoryLog
+from ..models.analytics import InventoryMetric
+from .abc_xyz import to_records
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("product", "category")
+
+# Показатели, по которым допускается сортировка
+SORTABLE_METRICS = (
+    "units_sold", "units_received", "on_hand", "avg_inventory",
+    "turnover", "days_of_supply", "sell_through"
+)
+
+# Товары без категории собираются в категорию с id 0
+NO_CATEGORY_ID = 0
+NO_CATEGORY_NAME = "Без категории"
+
+
+def get_windows() -> Tuple[int, ...]:
+    """Окна расчета (дни), заданные в настройках"""
+    return tuple(sorted(int(days) for days in current_app.config.get("INVENTORY_METRICS_WINDOWS", (30, 90, 365))))
+
+
+def _window_sums(query, date_column, value, windows: Iterable[int], now: datetime):
+    """Сумма value за каждое окно одним запросом (условные суммы по товару)"""
+    windows = list(windows)
+    columns = [
+        func.sum(case((date_column >= now - timedelta(days=days), value), else_=0))
+        for days in windows
+    ]
+    return query.add_columns(*columns).filter(date_column >= now - timedelta(days=max(windows))).all()
+
+
+def load_movements(session, windows: Iterable[int], now: datetime) -> pd.DataFrame:
+    """
+    Остатки, продажи и изменения остатков всех товаров по окнам
+
+    Returns:
+        DataFrame по товарам: name, category_id, category_name, on_hand и для
+        каждого окна колонки sold_<дни>, received_<дни>, net_<дни>
+    """
+    windows = list(windows)
+
+    products = pd.DataFrame.from_records(
+        session.query(Product.id, Product.name, Product.quantity, Product.category_id, Category.name)
+        .outerjoin(Category, Category.id == Product.category_id).all(),
+        columns=["product_id", "name", "on_hand", "category_id", "category_name"]
+    ).set_index("product_id")
+
+    sales = _window_sums(
+        session.query(OrderItem.product_id).join(Order, Order.id == OrderItem.order_id).filter(
+            Order.order_type == SALES_ORDER_TYPE,
+            Order.status.in_(SALES_STATUSES)
+        ).group_by(OrderItem.product_id),
+        Order.created_at, OrderItem.quantity, windows, now
+    )
+    sold = pd.DataFrame.from_records(
+        sales, columns=["product_id"] + [f"sold_{days}" for days in windows]
+    ).set_index("product_id")
+
+    # Журнал остатков: поступления (положительные изменения) и чистое изменение.
+    # Записи отгрузок и возвратов по заказам исключаются - продажи учитываются по заказам
+    logs_query = session.query(InventoryLog.product_id).filter(
+        InventoryLog.order_id.is_(None)
+    ).group_by(InventoryLog.product_id)
+    received = pd.DataFrame.from_records(
+        _window_sums(
+            logs_query, InventoryLog.created_at,
+            case((InventoryLog.quantity_change > 0, InventoryLog.quantity_change), else_=0),
+            windows, now
+        ),
+        columns=["product_id"] + [f"received_{days}" for days in windows]
+    ).set_index("product_id")
+    net = pd.DataFrame.from_records(
+        _window_sums(logs_query, InventoryLog.created_at, InventoryLog.quantity_change, windows, now),
+        columns=["product_id"] + [f"net_{days}" for days in windows]
+    ).set_index("product_id")
+
+    frame = products.join([sold, received, net])
+    movement_columns = [column for column in frame.columns if column.split("_")[0] in ("sold", "received", "net")]
+    frame[movement_columns] = frame[movement_columns].astype(float).fillna(0.0)
+    frame["on_hand"] = frame["on_hand"].astype(float)
+    frame["category_id"] = frame["category_id"].fillna(NO_CATEGORY_ID).astype(int)
+    frame["category_name"] = frame["category_name"].fillna(NO_CATEGORY_NAME)
+    return frame
+
+
+def compute_metrics(units_sold: pd.Series, units_received: pd.Series, net_change: pd.Series,
+                    on_hand: pd.Series, window_days: int) -> pd.DataFrame:
+    """
+    Показатели оборачиваемости (векторно для всех строк)
+
+    Начальный запас окна восстанавливается от текущего остатка: продажи
+    берутся по заказам, остальные изменения остатков - из журнала (без
+    записей отгрузок и возвратов по заказам).
+    """
+    beginning = (on_hand - net_change + units_sold).clip(lower=0.0)
+    avg_inventory = (beginning + on_hand) / 2
+    available = beginning + units_received
+
+    turnover = units_sold / avg_inventory.where(avg_inventory > 0)
+    days_of_supply = on_hand * window_days / units_sold.where(units_sold > 0)
+    sell_through = units_sold / available.where(available > 0)
+
+    return pd.DataFrame({
+        "units_sold": units_sold,
+        "units_received": units_received,
+        "on_hand": on_hand,
+        "avg_inventory": avg_inventory,
+        "turnover": turnover.round(4),
+        "days_of_supply": days_of_supply.round(2),
+        "sell_through": sell_through.clip(upper=1.0).round(4)
+    })
+
+
+def _window_frames(movements: pd.DataFrame, window_days: int) -> List[pd.DataFrame]:
+    """Показатели товаров и категорий за одно окно"""
+    columns = {f"sold_{window_days}": "units_sold", f"received_{window_days}": "units_received", f"net_{window_days}": "net"}
+    base = movements[["name", "category_id", "category_name", "on_hand", *columns]].rename(columns=columns)
+
+    products = compute_metrics(base["units_sold"], base["units_received"], base["net"], base["on_hand"], window_days)
+    products["scope"] = "product"
+    products["entity_id"] = base.index.astype(int)
+    products["name"] = base["name"]
+
+    # Категории: показатели пересчитываются из сумм, а не усредняются по товарам
+    grouped = base.groupby("category_id").agg(
+        name=("category_name", "first"),
+        units_sold=("units_sold", "sum"),
+        units_received=("units_received", "sum"),
+        net=("net", "sum"),
+        on_hand=("on_hand", "sum")
+    )
+    categories = compute_metrics(
+        grouped["units_sold"], grouped["units_received"], grouped["net"], grouped["on_hand"], window_days
+    )
+    categories["scope"] = "category"
+    categories["entity_id"] = grouped.index.astype(int)
+    categories["name"] = grouped["name"]
+
+    frames = [products, categories]
+    for frame in frames:
+        frame["window_days"] = window_days
+    return frames
+
+
+def refresh_inventory_metrics(session, windows: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """
+    Пересчет показателей по всем окнам с заменой сохраненных результатов
+
+    Returns:
+        Количество строк по окнам
+    """
+    windows = tuple(windows or get_windows())
+    computed_at = datetime.utcnow()
+
+    movements = load_movements(session, windows, computed_at)
+    frames = [frame for days in windows for frame in _window_frames(movements, days)]
+    result = pd.concat(frames, ignore_index=True)
+    result["computed_at"] = computed_at
+    result["created_at"] = computed_at
+    result["updated_at"] = computed_at
+
+    # Полная замена в одной транзакции
+    session.execute(delete(InventoryMetric.__table__))
+    if len(result):
+        session.execute(insert(InventoryMetric.__table__), to_records(result))
+    session.commit()
+
+    counts = {int(days): int(count) for days, count in result.groupby("window_days").size().items()}
+    logger.info(f"Показатели оборачиваемости пересчитаны: {counts}")
+    return {"rows": counts, "computed_at": computed_at.isoformat()}
+
+
+def encode_cursor(value: Any, entity_id: int) -> str:
+    """Курсор следующей страницы: значение сортировки и id последней строки"""
+    raw = json.dumps([value, entity_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    Разбор курсора
+
+    Raises:
+        ValueError: Некорректный курсор
+    """
+    try:
+        value, entity_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Некорректный курсор")
+    if not isinstance(entity_id, int) or not (value is None or isinstance(value, (int, float))):
+        raise ValueError("Некорректный курсор")
+    return value, entity_id
+
+
+def query_inventory_metrics(session, scope: str, window_days: int, sort: str = "turnover",
+                            descending: bool = True, limit: int = 50, cursor: Optional[str] = None,
+                            category_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Страница сохраненных показателей (keyset-пагинация)
+
+    Порядок: показатель (пустые значения в конце), затем id по возрастанию.
+
+    Raises:
+        ValueError: Некорректные параметры или курсор
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"Недопустимый разрез. Допустимые значения: {list(SCOPES)}")
+    if sort not in SORTABLE_METRICS:
+        raise ValueError(f"Недопустимый показатель сортировки. Допустимые значения: {list(SORTABLE_METRICS)}")
+
+    column = getattr(InventoryMetric, sort)
+    query = session.query(InventoryMetric).filter(
+        InventoryMetric.scope == scope,
+        InventoryMetric.window_days == window_days
+    )
+    if category_id is not None and scope == "product":
+        product_ids = session.query(Product.id).filter(Product.category_id == category_id)
+        query = query.filter(InventoryMetric.entity_id.in_(product_ids))
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        after_id = InventoryMetric.entity_id > last_id
+        if value is None:
+            query = query.filter(column.is_(None), after_id)
+        else:
+            beyond = column < value if descending else column > value
+            query = query.filter(or_(beyond, and_(column == value, after_id), column.is_(None)))
+
+    rows = query.order_by(
+        column.is_(None),
+        column.desc() if descending else column.asc(),
+        InventoryMetric.entity_id
+    ).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(getattr(rows[-1], sort), rows[-1].entity_id) if has_more else None
+
+    return {
+        "items": [row.to_dict() for row in rows],
+        "next_cursor": next_cursor,
+        "computed_at": rows[0].computed_at.isoformat() if rows else None
+    }
@@ -0,0 +1,181 @@
+"""
+Оценка запасов по слоям себестоимости
+
+Каждое поступление создает слой (количество и цена партии), каждое списание
+закрывает самые старые открытые слои (FIFO). Одновременно в product_valuations
+поддерживаются количество, средневзвешенная себестоимость и стоимость открытых
+слоев, поэтому итоговая оценка - одна агрегация по этой таблице без пересчета
+истории движений. Обновление выполняется в той же транзакции, что и изменение
+остатка товара (как и события outbox и витрина продаж).
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+
+from ..models.inventory import Product, Category
+from ..models.valuation import CostLayer, ProductValuation
+
+logger = logging.getLogger(__name__)
+
+# Источник слоя начального остатка (товары, принятые до появления оценки)
+OPENING_BALANCE = "opening_balance"
+
+
+def _get_valuation(session, product: Product, opening_quantity: int) -> ProductValuation:
+    """
+    Оценка товара с блокировкой строки
+
+    Если оценки еще нет, остаток до изменения принимается слоем начального
+    остатка по цене товара.
+    """
+    valuation = session.query(ProductValuation).filter_by(product_id=product.id).with_for_update().first()
+    if valuation is not None:
+        return valuation
+
+    unit_cost = float(product.price or 0.0)
+    valuation = ProductValuation(
+        product_id=product.id,
+        quantity=max(opening_quantity, 0),
+        avg_unit_cost=unit_cost,
+        fifo_value=max(opening_quantity, 0) * unit_cost
+    )
+    session.add(valuation)
+    if opening_quantity > 0:
+        session.add(CostLayer(
+            product_id=product.id,
+            quantity=opening_quantity,
+            remaining_quantity=opening_quantity,
+            unit_cost=unit_cost,
+            source=OPENING_BALANCE,
+            received_at=datetime.utcnow()
+        ))
+    return valuation
+
+
+def receive(session, product: Product, quantity: int, unit_cost: Optional[float], source: str,
+            reference: Optional[str] = None, opening_quantity: int = 0) -> ProductValuation:
+    """
+    Поступление: новый слой и пересчет средневзвешенной себестоимости
+
+    Args:
+        unit_cost: Цена единицы партии (по умолчанию - текущая средняя себестоимость)
+        opening_quantity: Остаток до поступления (для товаров без оценки)
+    """
+    valuation = _get_valuation(session, product, opening_quantity)
+    if unit_cost is None:
+        unit_cost = valuation.avg_unit_cost if valuation.quantity > 0 else float(product.price or 0.0)
+
+    session.add(CostLayer(
+        product_id=product.id,
+        quantity=quantity,
+        remaining_quantity=quantity,
+        unit_cost=unit_cost,
+        source=source,
+        reference=reference,
+        received_at=datetime.utcnow()
+    ))
+
+    new_quantity = valuation.quantity + quantity
+    valuation.avg_unit_cost = (valuation.quantity * valuation.avg_unit_cost + quantity * unit_cost) / new_quantity
+    valuation.quantity = new_quantity
+    valuation.fifo_value += quantity * unit_cost
+    return valuation
+
+
+def issue(session, product: Product, quantity: int, opening_quantity: int = 0) -> Dict[str, float]:
+    """
+    Списание: закрытие самых старых слоев
+
+    Returns:
+        Себестоимость списанного количества по FIFO и по средней
+    """
+    valuation = _get_valuation(session, product, opening_quantity)
+    average_cost = quantity * valuation.avg_unit_cost
+
+    # Читаются только слои, необходимые для покрытия количества
+    remaining = quantity
+    fifo_cost = 0.0
+    while remaining > 0:
+        layers = session.query(CostLayer).filter(
+            CostLayer.product_id == product.id,
+            CostLayer.remaining_quantity > 0
+        ).order_by(CostLayer.received_at, CostLayer.id).limit(10).with_for_update().all()
+        if not layers:
+            break
+        for layer in layers:
+            taken = min(layer.remaining_quantity, remaining)
+            layer.remaining_quantity -= taken
+            fifo_cost += taken * layer.unit_cost
+            remaining -= taken
+            if remaining == 0:
+                break
+        session.flush()
+
+    if remaining > 0:
+        # Слоев меньше, чем остаток (расхождение учета): недостающее - по средней
+        logger.warning(f"Недостаточно слоев себестоимости товара {product.id}: не покрыто {remaining} ед.")
+        fifo_cost += remaining * valuation.avg_unit_cost
+
+    valuation.quantity = max(valuation.quantity - quantity, 0)
+    valuation.fifo_value = max(valuation.fifo_value - fifo_cost, 0.0) if valuation.quantity > 0 else 0.0
+    return {"fifo_cost": fifo_cost, "average_cost": average_cost}
+
+
+def apply_stock_change(session, product: Product, old_quantity: int, source: str,
+                       unit_cost: Optional[float] = None, reference: Optional[str] = None) -> None:
+    """Отражение изменения остатка товара (product.quantity уже изменен)"""
+    change = product.quantity - old_quantity
+    if change > 0:
+        receive(session, product, change, unit_cost, source, reference=reference, opening_quantity=old_quantity)
+    elif change < 0:
+        issue(session, product, -change, opening_quantity=old_quantity)
+
+
+def get_valuation_summary(session, by_category: bool = False) -> Dict[str, Any]:
+    """
+    Итоговая оценка запасов на текущий момент
+
+    Returns:
+        Количество, стоимость по средневзвешенной себестоимости и по FIFO
+        (и разбивка по категориям при by_category)
+    """
+    average_value = func.coalesce(func.sum(ProductValuation.quantity * ProductValuation.avg_unit_cost), 0)
+    fifo_value = func.coalesce(func.sum(ProductValuation.fifo_value), 0)
+    quantity = func.coalesce(func.sum(ProductValuation.quantity), 0)
+
+    totals = session.query(
+        func.count(ProductValuation.id), quantity, average_value, fifo_value
+    ).one()
+
+    result: Dict[str, Any] = {
+        "products": totals[0],
+        "quantity": int(totals[1]),
+        "weighted_average_value": round(float(totals[2]), 2),
+        "fifo_value": round(float(totals[3]), 2),
+        "as_of": datetime.utcnow().isoformat()
+    }
+
+    if by_category:
+        rows = session.query(
+            Category.id, Category.name, quantity, average_value, fifo_value
+        ).select_from(ProductValuation).join(
+            Product, Product.id == ProductValuation.product_id
+        ).outerjoin(
+            Category, Category.id == Product.category_id
+        ).group_by(Category.id, Category.name).order_by(fifo_value.desc()).all()
+
+        categories: List[Dict[str, Any]] = [
+            {
+                "category_id": category_id,
+                "category": name or "Без категории",
+                "quantity": int(qty),
+                "weighted_average_value": round(float(avg), 2),
+                "fifo_value": round(float(fifo), 2)
+            }
+            for category_id, name, qty, avg, fifo in rows
+        ]
+        result["categories"] = categories
+
+    return result
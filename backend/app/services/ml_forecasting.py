@@ -1,271 +1,454 @@
 """
 Модуль машинного обучения для прогнозирования запасов
+
+Признаки строятся пакетно для всего каталога по дневным рядам спроса
+(app.services.demand_series): строки заказов продаж читаются одним потоковым
+запросом, дни без продаж заполняются нулями, лаги и скользящие статистики
+считаются по календарным дням векторно для всех товаров.
+
+Каждое обучение получает новую версию модели. Прогнозы генерируются по
+расписанию и сохраняются в demand_forecasts с версией модели
+(app.services.demand_forecasts); после обучения прогнозы прежних версий
+удаляются.
+
+Между полными переобучениями модель обновляется инкрементально: состояния
+экспоненциального сглаживания товаров (app.services.demand_smoothing)
+пересчитываются ночью только по новым дням спроса, и прогноз леса
+смешивается с прогнозом сглаживания с весом FORECAST_SMOOTHING_WEIGHT.
+Полное переобучение леса (с пересчетом состояний с начала окна) выполняется
+еженедельно.
+
+Обучение выполняется задачей Celery (задание train_model в
+app.services.reports) под распределенной блокировкой Redis, поэтому
+одновременно идет не больше одного обучения. Модель, скейлер и версия
+сохраняются одним файлом (запись во временный файл и os.replace); процессы,
+обслуживающие запросы, замечают новый файл по времени изменения и заменяют
+модель одним присваиванием, не прерывая выполняющиеся прогнозы.
 """
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import joblib
 import os
+import tempfile
+import uuid
 import logging
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Callable
+
+from flask import current_app
 
+from ..core.config import BaseSettings
 from ..models.inventory import Product
-from ..models.order import Order
 from ..db.session import db_session
+from .demand_forecasts import purge_forecasts
+from .demand_smoothing import smoothing_forecast, update_states
+from .demand_series import (
+    DemandSeries, FEATURE_COLUMNS, load_series, feature_frame, next_day_features, series_cache
+)
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
-MODEL_PATH = "app/services/models/"
+# Модель читается при импорте (вне контекста приложения), поэтому путь берется из настроек напрямую.
+# Абсолютный путь не зависит от рабочего каталога процесса: обученная воркером модель видна backend
+MODEL_PATH = os.path.abspath(BaseSettings.ML_MODEL_PATH)
 os.makedirs(MODEL_PATH, exist_ok=True)
 
+# Дней истории, загружаемых для обучения и прогноза
+HISTORY_WINDOW_DAYS = 90
+
+# Количество деревьев и шаг их добавления при обучении (между шагами - прогресс и отмена)
+N_ESTIMATORS = 100
+ESTIMATORS_STEP = 10
+
+# Ключ распределенной блокировки обучения
+TRAINING_LOCK_KEY = "ml:train-model"
+
+
+class TrainingInProgress(Exception):
+    """Обучение модели уже выполняется другим воркером"""
+
+
+def _lock_redis():
+    import redis
+    url = current_app.config.get("ML_TRAIN_LOCK_REDIS_URL") or current_app.config.get("CELERY_BROKER_URL")
+    return redis.Redis.from_url(url or "redis://localhost:6379/0")
+
+
+def is_training() -> bool:
+    """Выполняется ли сейчас обучение (в любом воркере)"""
+    return bool(_lock_redis().exists(TRAINING_LOCK_KEY))
+
+
+@contextmanager
+def training_lock():
+    """
+    Распределенная блокировка обучения
+
+    Raises:
+        TrainingInProgress: Блокировка удерживается другим обучением
+    """
+    from redis.exceptions import LockError
+
+    timeout = current_app.config.get("ML_TRAIN_LOCK_TIMEOUT_SECONDS", 3600)
+    lock = _lock_redis().lock(TRAINING_LOCK_KEY, timeout=timeout)
+    if not lock.acquire(blocking=False):
+        raise TrainingInProgress("Обучение модели уже выполняется")
+    try:
+        yield
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # Блокировка истекла раньше завершения обучения
+            logger.warning("Блокировка обучения модели истекла до завершения обучения")
+
+
+@dataclass
+class ModelBundle:
+    """Модель, скейлер и версия - заменяются в процессе одним присваиванием"""
+    model: Any
+    scaler: Any
+    version: Optional[str] = None  # None - модель не обучена
+    trained_at: Optional[str] = None
+    mtime: Optional[float] = None  # Время изменения файла, из которого загружена модель
+
+
+def _new_bundle() -> ModelBundle:
+    return ModelBundle(model=RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=42), scaler=StandardScaler())
+
+
 class InventoryForecaster:
     """Модель МО для прогнозирования потребностей в запасах на основе исторических данных"""
     
     def __init__(self):
-        self.model = None
-        self.scaler = None
+        self.bundle_path = os.path.join(MODEL_PATH, "inventory_forecast_bundle.joblib")
+        # Файлы модели и скейлера прежнего формата (читаются, если нет общего файла)
         self.model_path = os.path.join(MODEL_PATH, "inventory_forecast_model.joblib")
         self.scaler_path = os.path.join(MODEL_PATH, "inventory_scaler.joblib")
-        self._load_or_create_model()
+        self.bundle = self._load_bundle() or _new_bundle()
+    
+    @property
+    def model(self):
+        return self.bundle.model
+    
+    @property
+    def scaler(self):
+        return self.bundle.scaler
     
-    def _load_or_create_model(self):
-        """Загрузка существующей модели или создание новой, если не существует"""
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.bundle.version
+    
+    def _load_bundle(self) -> Optional[ModelBundle]:
+        """Загрузка сохраненной модели (None - модели нет или она несовместима)"""
         try:
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
-                logger.info("Модель МО успешно загружена")
+            if os.path.exists(self.bundle_path):
+                mtime = os.path.getmtime(self.bundle_path)
+                data = joblib.load(self.bundle_path)
+                bundle = ModelBundle(data["model"], data["scaler"], data["version"], data.get("trained_at"), mtime)
+            elif os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
+                mtime = os.path.getmtime(self.model_path)
+                bundle = ModelBundle(
+                    joblib.load(self.model_path), joblib.load(self.scaler_path), f"legacy-{int(mtime)}", mtime=mtime
+                )
             else:
-                # Инициализация новой модели
-                self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-                self.scaler = StandardScaler()
                 logger.info("Инициализирована новая модель МО")
+                return None
+            
+            if getattr(bundle.scaler, 'n_features_in_', len(FEATURE_COLUMNS)) != len(FEATURE_COLUMNS):
+                # Модель обучена на другом наборе признаков - требуется переобучение
+                logger.warning("Сохраненная модель МО несовместима с текущими признаками")
+                return None
+            
+            logger.info(f"Модель МО успешно загружена (версия {bundle.version})")
+            return bundle
         except Exception as e:
             logger.error(f"Ошибка загрузки модели МО: {str(e)}")
-            # Инициализация новой модели при ошибке
-            self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-            self.scaler = StandardScaler()
+            return None
+    
+    def refresh(self) -> bool:
+        """
+        Подхват модели, сохраненной другим процессом (по времени изменения файла)
+        
+        Returns:
+            True, если модель заменена
+        """
+        try:
+            mtime = os.path.getmtime(self.bundle_path)
+        except OSError:
+            return False
+        if mtime == self.bundle.mtime:
+            return False
+        
+        bundle = self._load_bundle()
+        if bundle is None:
+            return False
+        self.bundle = bundle
+        return True
     
-    def _prepare_features(self, product_id: int, days: int = 90) -> Optional[pd.DataFrame]:
-        """Подготовка признаков из исторических данных"""
-        # Получение даты отсечения
-        cutoff_date = datetime.now() - timedelta(days=days)
+    def _save_bundle(self, bundle: ModelBundle) -> None:
+        """Атомарная запись модели: временный файл в том же каталоге и os.replace"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.bundle_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                joblib.dump({
+                    "model": bundle.model,
+                    "scaler": bundle.scaler,
+                    "version": bundle.version,
+                    "trained_at": bundle.trained_at
+                }, tmp_file)
+            os.replace(tmp_path, self.bundle_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        bundle.mtime = os.path.getmtime(self.bundle_path)
+    
+    def prepare_features_batch(self, product_ids: Optional[Iterable[int]] = None,
+                               days: int = HISTORY_WINDOW_DAYS) -> pd.DataFrame:
+        """Признаки всех товаров с продажами (или указанных товаров) за последние days дней"""
+        with db_session() as session:
+            series = load_series(session, days, product_ids)
         
-        # Получение исторических уровней запасов
+        return feature_frame(series)
+    
+    def _prepare_features(self, product_id: int, days: int = HISTORY_WINDOW_DAYS) -> Optional[pd.DataFrame]:
+        """Подготовка признаков из исторических данных одного товара (ряд берется из кэша)"""
         with db_session() as session:
-            # Получение истории запасов через детали заказов
-            order_details = session.query(Order).filter(
-                Order.created_at > cutoff_date
-            ).all()
-            
-            # Извлечение соответствующих данных для конкретного продукта
-            data = []
-            for order in order_details:
-                for item in order.items:
-                    if item.product_id == product_id:
-                        data.append({
-                            'date': order.created_at,
-                            'quantity': item.quantity,
-                            'order_type': order.order_type,
-                            'day_of_week': order.created_at.weekday(),
-                            'day_of_month': order.created_at.day,
-                            'month': order.created_at.month
-                        })
+            series = series_cache.get(session, [product_id], days)
         
-        if not data:
+        if not series.values.any():
             logger.warning(f"Исторические данные для продукта {product_id} не найдены")
             return None
         
-        df = pd.DataFrame(data)
+        return feature_frame(series)
+
+    def fit(self, product_id: Optional[int] = None,
+            progress: Optional[Callable[[int], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Обучение новой модели, ее сохранение и замена текущей
         
-        # Добавление временных признаков
-        df['day_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['day_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
+        Деревья добавляются шагами по ESTIMATORS_STEP (warm_start); после
+        каждого шага вызывается progress, исключение из него прерывает
+        обучение без сохранения модели.
         
-        # Создание признаков с временным лагом
-        for lag in [1, 7, 14, 30]:
-            df[f'lag_{lag}'] = df['quantity'].shift(lag)
+        Returns:
+            Версия и размер выборки или None при недостатке данных
+        """
+        progress = progress or (lambda percent: None)
         
-        # Удаление строк с отсутствующими значениями
-        df = df.dropna()
+        # Признаки всего каталога одним проходом
+        df = self.prepare_features_batch([product_id] if product_id else None)
+        progress(10)
         
+        # Необходимо минимальное количество данных для обучения по товару
+        df = df[df.groupby('product_id')['quantity'].transform('size') >= 10]
         if df.empty:
-            logger.warning("После подготовки признаков DataFrame пуст")
+            logger.warning("Недостаточно данных для обучения")
             return None
         
-        return df
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=float)
+        y = df['quantity'].to_numpy(dtype=float)
+        
+        # Масштабирование признаков (новые объекты - текущая модель продолжает обслуживать прогнозы)
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        
+        n_jobs = current_app.config.get("ML_TRAIN_N_JOBS", -1)
+        model = RandomForestRegressor(n_estimators=ESTIMATORS_STEP, random_state=42, n_jobs=n_jobs, warm_start=True)
+        for built in range(ESTIMATORS_STEP, N_ESTIMATORS + 1, ESTIMATORS_STEP):
+            model.set_params(n_estimators=built)
+            model.fit(X_scaled, y)
+            progress(10 + 80 * built // N_ESTIMATORS)
+        
+        # Прогнозы в запросах - небольшими матрицами, без пула потоков
+        model.set_params(n_jobs=None, warm_start=False)
+        
+        # Новая версия модели: прогнозы прежних версий больше не действительны
+        trained_at = datetime.utcnow()
+        bundle = ModelBundle(
+            model=model,
+            scaler=scaler,
+            version=f"{trained_at:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}",
+            trained_at=trained_at.isoformat()
+        )
+        self._save_bundle(bundle)
+        self.bundle = bundle
+        with db_session() as session:
+            purge_forecasts(session, keep_version=bundle.version)
+        
+        logger.info(f"Модель успешно обучена и сохранена (версия {bundle.version})")
+        return {"model_version": bundle.version, "trained_at": bundle.trained_at, "samples": len(y)}
 
     def train(self, product_id: Optional[int] = None) -> bool:
         """Обучение модели прогнозирования для конкретного продукта или всех продуктов"""
         try:
             with db_session() as session:
                 if product_id:
-                    products = [session.query(Product).filter_by(id=product_id).first()]
-                    if not products[0]:
+                    if not session.query(Product.id).filter_by(id=product_id).first():
                         logger.warning(f"Продукт с ID {product_id} не найден")
                         return False
-                else:
-                    products = session.query(Product).all()
-            
-            all_features = []
-            all_targets = []
-            
-            for product in products:
-                df = self._prepare_features(product.id)
-                if df is None or len(df) < 10:  # Необходимо минимальное количество данных для обучения
-                    continue
-                
-                features = df[['day_sin', 'day_cos', 'month_sin', 'month_cos', 
-                               'lag_1', 'lag_7', 'lag_14', 'lag_30']].values
-                target = df['quantity'].values
-                
-                all_features.append(features)
-                all_targets.append(target)
-            
-            if not all_features:
-                logger.warning("Недостаточно данных для обучения")
-                return False
-            
-            X = np.vstack(all_features)
-            y = np.concatenate(all_targets)
-            
-            # Проверяем, что self.scaler не равен None
-            if self.scaler is None:
-                self.scaler = StandardScaler()
-                
-            # Масштабирование признаков
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Проверяем, что self.model не равен None
-            if self.model is None:
-                self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-                
-            # Обучение модели
-            self.model.fit(X_scaled, y)
-            
-            # Сохранение модели и скейлера
-            joblib.dump(self.model, self.model_path)
-            joblib.dump(self.scaler, self.scaler_path)
             
-            logger.info("Модель успешно обучена и сохранена")
-            return True
+            return self.fit(product_id) is not None
             
         except Exception as e:
             logger.error(f"Ошибка обучения модели: {str(e)}")
             return False
     
+    def _forecast(self, series: DemandSeries, days_ahead: int) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Рекурсивный прогноз всех товаров ряда одновременно
+
+        На каждом шаге горизонта строится матрица признаков всех товаров и
+        выполняется один вызов transform/predict; прогноз шага дописывается
+        в историю для лагов и скользящих статистик следующего шага.
+
+        Returns:
+            (даты прогноза, матрица прогнозов (товары, days_ahead))
+        """
+        # Одна версия модели на весь прогноз, даже если модель заменят во время расчета
+        bundle = self.bundle
+        n_products, n_days = series.values.shape
+        dates = pd.date_range(series.dates[-1] + timedelta(days=1), periods=days_ahead, freq='D')
+
+        history = np.zeros((n_products, n_days + days_ahead))
+        history[:, :n_days] = series.values
+        if n_products == 0:
+            return dates, history[:, n_days:]
+
+        for step, future_date in enumerate(dates):
+            end = n_days + step
+            features = next_day_features(history[:, :end], future_date)
+            predicted = bundle.model.predict(bundle.scaler.transform(features))
+            history[:, end] = np.maximum(0, np.round(predicted))
+
+        return dates, history[:, n_days:]
+
+    def predict_batch(self, product_ids: Optional[Iterable[int]] = None,
+                      days_ahead: int = 14) -> Tuple[np.ndarray, pd.DatetimeIndex, np.ndarray]:
+        """
+        Прогноз спроса для набора товаров (по умолчанию - всех товаров с продажами)
+
+        Returns:
+            (id товаров, даты прогноза, матрица прогнозов (товары, days_ahead))
+        """
+        if self.model_version is None:
+            raise RuntimeError("Модель прогнозирования не обучена")
+
+        with db_session() as session:
+            if product_ids is None:
+                series = load_series(session, HISTORY_WINDOW_DAYS)
+            else:
+                series = series_cache.get(session, product_ids, HISTORY_WINDOW_DAYS)
+
+        # Товары без продаж за окно не прогнозируются
+        has_history = series.values.any(axis=1)
+        series = DemandSeries(series.product_ids[has_history], series.dates, series.values[has_history])
+
+        dates, predictions = self._forecast(series, days_ahead)
+        
+        # Смешивание с прогнозом сглаживания: уровень спроса обновляется каждую ночь,
+        # лес - при полном переобучении
+        weight = float(current_app.config.get("FORECAST_SMOOTHING_WEIGHT", 0.5))
+        if weight > 0 and len(series):
+            with db_session() as session:
+                smoothed = smoothing_forecast(session, series.product_ids, dates)
+            has_state = ~np.isnan(smoothed[:, 0]) if days_ahead else np.zeros(len(series), dtype=bool)
+            predictions[has_state] = np.round((1 - weight) * predictions[has_state] + weight * smoothed[has_state])
+        
+        return series.product_ids, dates, predictions
+    
+    def update_incremental(self, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Инкрементальное обновление: состояния сглаживания всех товаров только
+        по дням после watermark (rebuild - пересчет с начала окна)
+        """
+        with db_session() as session:
+            return update_states(session, rebuild=rebuild)
+
     def predict_future_demand(self, product_id: int, days_ahead: int = 30) -> List[Dict[str, Any]]:
         """Прогнозирование будущего спроса на запасы для конкретного продукта"""
         try:
-            df = self._prepare_features(product_id)
-            if df is None or df.empty:
-                logger.warning(f"Нет доступных данных для прогнозирования продукта {product_id}")
-                return []
-            
-            # Получение последних значений для признаков с лагом
-            last_row = df.iloc[-1]
-            
-            predictions = []
-            current_date = datetime.now()
+            product_ids, dates, predictions = self.predict_batch([product_id], days_ahead)
             
-            # Проверяем наличие self.model и self.scaler
-            if self.model is None or self.scaler is None:
-                logger.error("Модель или скейлер не инициализированы")
+            if len(product_ids) == 0:
+                logger.warning(f"Нет доступных данных для прогнозирования продукта {product_id}")
                 return []
             
-            # Прогнозирование на каждый день вперед
-            for i in range(1, days_ahead + 1):
-                future_date = current_date + timedelta(days=i)
-                
-                # Создание вектора признаков для прогнозирования
-                features = np.array([
-                    np.sin(2 * np.pi * future_date.weekday() / 7),  # day_sin
-                    np.cos(2 * np.pi * future_date.weekday() / 7),  # day_cos
-                    np.sin(2 * np.pi * future_date.month / 12),     # month_sin
-                    np.cos(2 * np.pi * future_date.month / 12),     # month_cos
-                    last_row['quantity'] if i == 1 else predictions[-1]['predicted_quantity'],  # lag_1
-                    df['quantity'].iloc[-7] if i <= 7 else predictions[i-8]['predicted_quantity'],  # lag_7
-                    df['quantity'].iloc[-14] if i <= 14 else predictions[i-15]['predicted_quantity'],  # lag_14
-                    df['quantity'].iloc[-30] if i <= 30 else predictions[i-31]['predicted_quantity'],  # lag_30
-                ]).reshape(1, -1)
-                
-                # Масштабирование признаков
-                scaled_features = self.scaler.transform(features)
-                
-                # Прогнозирование
-                predicted_quantity = max(0, round(self.model.predict(scaled_features)[0]))
-                
-                predictions.append({
-                    'date': future_date.strftime('%Y-%m-%d'),
-                    'predicted_quantity': predicted_quantity
-                })
-            
-            return predictions
+            return [
+                {'date': date.strftime('%Y-%m-%d'), 'predicted_quantity': int(quantity)}
+                for date, quantity in zip(dates, predictions[0])
+            ]
             
         except Exception as e:
             logger.error(f"Ошибка прогнозирования будущего спроса: {str(e)}")
             return []
     
-    def get_restock_recommendations(self) -> List[Dict[str, Any]]:
+    def get_restock_recommendations(self, horizon: int = 14) -> List[Dict[str, Any]]:
         """Получение рекомендаций по пополнению запасов на основе прогнозов"""
-        recommendations = []
-        
         try:
-            with db_session() as session:
-                products = session.query(Product).all()
-                
-                for product in products:
-                    # Пропуск, если минимальный порог не установлен
-                    if product.min_stock is None:
-                        continue
-                    
-                    # Прогнозирование на следующие 14 дней
-                    predictions = self.predict_future_demand(product.id, days_ahead=14)
-                    if not predictions:
-                        continue
-                    
-                    # Расчет среднего прогнозируемого спроса
-                    total_predicted = sum(p['predicted_quantity'] for p in predictions)
-                    avg_daily_demand = total_predicted / len(predictions)
-                    
-                    # Дни до достижения минимального порога
-                    if avg_daily_demand > 0:
-                        days_until_min = (product.quantity - product.min_stock) / avg_daily_demand
-                    else:
-                        days_until_min = float('inf')
-                    
-                    # Если запас достигнет минимального порога в течение 14 дней
-                    if 0 <= days_until_min <= 14:
-                        # Расчет рекомендуемого количества заказа (для 30 дней запаса)
-                        recommended_qty = max(0, round(avg_daily_demand * 30) - product.quantity)
-                        
-                        recommendations.append({
-                            'product_id': product.id,
-                            'product_name': product.name,
-                            'current_quantity': product.quantity,
-                            'min_threshold': product.min_stock,
-                            'days_until_threshold': round(days_until_min, 1),
-                            'recommended_order_quantity': recommended_qty
-                        })
+            # Прогноз на горизонт для всех товаров с продажами - по вызову модели на день
+            product_ids, _, predictions = self.predict_batch(days_ahead=horizon)
             
-            # Сортировка по срочности (дни до порога)
-            recommendations.sort(key=lambda x: x['days_until_threshold'])
+            with db_session() as session:
+                products = session.query(
+                    Product.id, Product.name, Product.quantity, Product.min_stock
+                ).filter(Product.min_stock.isnot(None)).all()
             
-            return recommendations
+            demand = pd.Series(predictions.mean(axis=1), index=product_ids, dtype=float)
+            return restock_recommendations(products, demand, horizon)
             
         except Exception as e:
             logger.error(f"Ошибка получения рекомендаций по пополнению запасов: {str(e)}")
             return []
 
 
+def restock_recommendations(products, avg_daily_demand: pd.Series, horizon: int = 14) -> List[Dict[str, Any]]:
+    """
+    Товары, запас которых достигнет минимального порога в течение горизонта
+
+    Args:
+        products: Строки (id, name, quantity, min_stock)
+        avg_daily_demand: Средний прогнозируемый дневной спрос по id товара
+        horizon: Горизонт прогноза (дни)
+    """
+    frame = pd.DataFrame.from_records(products, columns=['product_id', 'product_name', 'quantity', 'min_stock'])
+    frame['demand'] = frame['product_id'].map(avg_daily_demand)
+    # Товары без прогноза пропускаются
+    frame = frame[frame['demand'].notna()]
+
+    # Дни до достижения минимального порога
+    days_until_min = (frame['quantity'] - frame['min_stock']) / frame['demand'].where(frame['demand'] > 0)
+    frame = frame.assign(days_until_min=days_until_min)
+    frame = frame[(frame['days_until_min'] >= 0) & (frame['days_until_min'] <= horizon)]
+
+    # Рекомендуемое количество заказа (для 30 дней запаса)
+    recommended = (np.round(frame['demand'] * 30) - frame['quantity']).clip(lower=0)
+
+    # Сортировка по срочности (дни до порога)
+    frame = frame.assign(recommended=recommended).sort_values('days_until_min', kind='mergesort')
+    return [
+        {
+            'product_id': int(row.product_id),
+            'product_name': row.product_name,
+            'current_quantity': int(row.quantity),
+            'min_threshold': int(row.min_stock),
+            'days_until_threshold': round(float(row.days_until_min), 1),
+            'recommended_order_quantity': int(row.recommended)
+        }
+        for row in frame.itertuples(index=False)
+    ]
+
+
 # Экземпляр-одиночка
 forecaster = InventoryForecaster()
 
 def get_forecaster() -> InventoryForecaster:
-    """Получение экземпляра прогнозирующей модели"""
+    """Получение экземпляра прогнозирующей модели (с подхватом модели, обученной другим процессом)"""
+    forecaster.refresh()
     return forecaster 
\ No newline at end of file
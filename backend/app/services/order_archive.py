@@ -0,0 +1,130 @@
+"""
+Архивирование закрытых заказов (холодное хранилище)
+
+Закрытые заказы старше ORDER_ARCHIVE_AFTER_DAYS переносятся вместе с позициями
+и файлами в таблицы archived_*, поэтому рабочие таблицы orders/order_items
+остаются небольшими. Чтение архива выполняется только тогда, когда фильтр
+по дате заходит за границу архивации.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from flask import current_app
+from sqlalchemy import insert, select, delete, literal
+
+from ..models.order import Order, OrderItem, OrderFile, OrderStatus
+from ..models.archive import ArchivedOrder, ArchivedOrderItem, ArchivedOrderFile
+from .analytics_cache import analytics_cache, ORDERS
+
+logger = logging.getLogger(__name__)
+
+# Статусы закрытых заказов, подлежащих архивации
+CLOSED_STATUSES = (OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value, "completed")
+
+# Переносимые колонки (одинаковые в рабочих и архивных таблицах)
+ORDER_COLUMNS = [
+    "id", "created_at", "updated_at", "order_number", "user_id", "supplier_id", "status",
+    "order_type", "total_amount", "shipping_address", "notes", "expected_delivery_date"
+]
+ORDER_ITEM_COLUMNS = [
+    "id", "created_at", "updated_at", "order_id", "product_id", "quantity", "unit_price",
+    "product_name", "product_sku", "category_id"
+]
+ORDER_FILE_COLUMNS = [
+    "id", "created_at", "updated_at", "order_id", "filename", "file_path", "file_type", "upload_date"
+]
+
+
+def get_archive_cutoff() -> datetime:
+    """Граница архива: заказы, созданные раньше нее, могут находиться в архиве"""
+    days = current_app.config.get("ORDER_ARCHIVE_AFTER_DAYS", 365)
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def reaches_archive(start: Optional[datetime], end: Optional[datetime] = None) -> bool:
+    """
+    Заходит ли фильтр по датам в архивный период: начало фильтра раньше границы
+    архива или не задано при заданном конце. Без фильтра по дате архив не читается
+    """
+    if start is None:
+        return end is not None
+    return start < get_archive_cutoff()
+
+
+def _copy_rows(session, source, target, columns, condition, archived_at=None) -> None:
+    """INSERT ... SELECT строк из рабочей таблицы в архивную"""
+    source_columns = [getattr(source, name) for name in columns]
+    target_columns = list(columns)
+    if archived_at is not None:
+        source_columns.append(literal(archived_at))
+        target_columns.append("archived_at")
+
+    session.execute(
+        insert(target.__table__).from_select(
+            target_columns,
+            select(*source_columns).where(condition)
+        )
+    )
+
+
+def archive_batch(session, cutoff: datetime, batch_size: int) -> int:
+    """
+    Перенос одной пачки закрытых заказов в архив в рамках одной транзакции
+
+    Returns:
+        Количество перенесенных заказов
+    """
+    order_ids = [
+        row[0] for row in session.query(Order.id).filter(
+            Order.status.in_(CLOSED_STATUSES),
+            Order.created_at < cutoff
+        ).order_by(Order.id).limit(batch_size).with_for_update(skip_locked=True).all()
+    ]
+
+    if not order_ids:
+        return 0
+
+    archived_at = datetime.utcnow()
+    _copy_rows(session, Order, ArchivedOrder, ORDER_COLUMNS, Order.id.in_(order_ids), archived_at)
+    _copy_rows(session, OrderItem, ArchivedOrderItem, ORDER_ITEM_COLUMNS, OrderItem.order_id.in_(order_ids))
+    _copy_rows(session, OrderFile, ArchivedOrderFile, ORDER_FILE_COLUMNS, OrderFile.order_id.in_(order_ids))
+
+    session.execute(delete(OrderFile.__table__).where(OrderFile.order_id.in_(order_ids)))
+    session.execute(delete(OrderItem.__table__).where(OrderItem.order_id.in_(order_ids)))
+    session.execute(delete(Order.__table__).where(Order.id.in_(order_ids)))
+    session.commit()
+    analytics_cache.bump([ORDERS])
+
+    return len(order_ids)
+
+
+def archive_closed_orders(session, older_than_days: Optional[int] = None,
+                          batch_size: Optional[int] = None, max_batches: int = 100) -> Dict[str, Any]:
+    """
+    Архивация закрытых заказов пачками
+
+    Args:
+        session: Сессия SQLAlchemy
+        older_than_days: Возраст заказов для архивации (по умолчанию ORDER_ARCHIVE_AFTER_DAYS)
+        batch_size: Размер пачки (по умолчанию ORDER_ARCHIVE_BATCH_SIZE)
+        max_batches: Ограничение количества пачек за один запуск
+
+    Returns:
+        Статистика архивации
+    """
+    if older_than_days is None:
+        cutoff = get_archive_cutoff()
+    else:
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    batch_size = batch_size or current_app.config.get("ORDER_ARCHIVE_BATCH_SIZE", 500)
+
+    archived = 0
+    for _ in range(max_batches):
+        count = archive_batch(session, cutoff, batch_size)
+        archived += count
+        if count < batch_size:
+            break
+
+    logger.info(f"Перенесено в архив заказов: {archived} (созданных до {cutoff.isoformat()})")
+    return {"archived": archived, "cutoff": cutoff.isoformat()}
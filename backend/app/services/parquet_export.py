@@ -0,0 +1,459 @@
+"""
+Выгрузка данных для аналитиков в Parquet
+
+Таблицы orders, order_items и inventory_logs выгружаются с разбиением по
+месяцу created_at (каталоги month=YYYY-MM). Таблицы, в которые строки только
+добавляются (order_items, inventory_logs), дописываются инкрементально: каждый
+запуск добавляет в разделы новые файлы только со строками, id которых больше
+сохраненного водяного знака. Строки моложе PARQUET_EXPORT_SAFETY_MINUTES и все
+следующие за ними по id откладываются до следующего запуска: id выдаются до
+коммита, и строка с меньшим id из еще не зафиксированной транзакции иначе
+оказалась бы ниже водяного знака и не попала бы в выгрузку. Заказы меняются (статус, сумма) и переносятся в
+архив, поэтому для orders водяной знак - updated_at: разделы, в которых
+после прошлого запуска появились или изменились заказы, перезаписываются
+целиком вместе с архивными заказами того же месяца. Удаленные заказы
+исчезают из выгрузки только при полной выгрузке (full). Справочник products
+выгружается целиком.
+
+Состав колонок таблиц сохраняется в состоянии; при его изменении (например,
+новая колонка inventory_logs.order_id) таблица выгружается заново целиком,
+чтобы все файлы раздела имели одну схему. Такие таблицы перечисляются в
+манифесте (schema_changed).
+
+Строки читаются потоком (stream_results) и записываются группами строк через
+pyarrow.parquet.ParquetWriter, поэтому память не зависит от объема таблиц.
+Файлы сначала пишутся во временные имена и переименовываются после успешной
+записи всех таблиц; состояние и манифест последнего снимка хранятся рядом.
+"""
+import enum
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import current_app
+from sqlalchemy import and_, or_, select, types
+
+from ..models.order import Order, OrderItem
+from ..models.inventory import Product, InventoryLog
+from ..models.archive import ArchivedOrder
+from ..utils.file_delivery import get_upload_root, UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Каталог выгрузки внутри каталога загрузок (отдается через send_protected_file)
+EXPORT_DIR = "exports"
+
+# Инкрементально дописываемые таблицы (только вставки), изменяемые таблицы
+# (рабочая и архивная, с одинаковыми id) и справочники, выгружаемые целиком
+INCREMENTAL_TABLES = {
+    "order_items": OrderItem,
+    "inventory_logs": InventoryLog,
+}
+MUTABLE_TABLES = {
+    "orders": (Order, ArchivedOrder),
+}
+SNAPSHOT_TABLES = {
+    "products": Product,
+}
+
+STATE_FILE = "_state.json"
+MANIFEST_FILE = "manifest.json"
+
+# Раздел строк без created_at
+UNKNOWN_PARTITION = "unknown"
+
+
+def get_export_root() -> str:
+    """Абсолютный путь к каталогу выгрузки"""
+    return os.path.join(get_upload_root(), EXPORT_DIR)
+
+
+def export_relative_path(path: str) -> str:
+    """Путь файла выгрузки относительно root_path приложения (для send_protected_file)"""
+    return os.path.join(UPLOADS_DIR, EXPORT_DIR, path)
+
+
+def _arrow_type(column_type) -> pa.DataType:
+    """Тип Arrow для колонки SQLAlchemy"""
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _arrow_schema(model) -> pa.Schema:
+    return pa.schema([(column.name, _arrow_type(column.type)) for column in model.__table__.columns])
+
+
+def _normalize(value: Any) -> Any:
+    """Значения, не имеющие прямого типа Arrow (JSON, Enum), сохраняются строками"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _partition_of(created_at: Optional[datetime]) -> str:
+    return created_at.strftime("%Y-%m") if created_at else UNKNOWN_PARTITION
+
+
+def _partition_condition(model, partitions: Set[str]):
+    """Условие отбора строк разделов по created_at"""
+    conditions = []
+    for partition in sorted(partitions):
+        if partition == UNKNOWN_PARTITION:
+            conditions.append(model.created_at.is_(None))
+            continue
+        start = datetime.strptime(partition, "%Y-%m")
+        end = (start + timedelta(days=32)).replace(day=1)
+        conditions.append(and_(model.created_at >= start, model.created_at < end))
+    return or_(*conditions)
+
+
+def _batch_table(rows: List[Tuple], schema: pa.Schema) -> pa.Table:
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array([_normalize(value) for value in column], type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def _load_json(path: str, default: Any) -> Any:
+    if not os.path.isfile(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Any) -> None:
+    """Атомарная запись JSON (временный файл + os.replace)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class _PartitionWriters:
+    """Открытые ParquetWriter по разделам month=YYYY-MM одной таблицы"""
+
+    def __init__(self, table_dir: str, schema: pa.Schema, run_id: str):
+        self.table_dir = table_dir
+        self.schema = schema
+        self.file_name = f"part-{run_id}.parquet"
+        self.writers: Dict[str, pq.ParquetWriter] = {}
+        self.pending: List[Tuple[str, str]] = []
+
+    def write(self, partition: str, table: pa.Table) -> None:
+        writer = self.writers.get(partition)
+        if writer is None:
+            partition_dir = os.path.join(self.table_dir, f"month={partition}")
+            os.makedirs(partition_dir, exist_ok=True)
+            final_path = os.path.join(partition_dir, self.file_name)
+            tmp_path = f"{final_path}.tmp"
+            writer = self.writers[partition] = pq.ParquetWriter(tmp_path, self.schema, compression="snappy")
+            self.pending.append((tmp_path, final_path))
+        writer.write_table(table)
+
+    def write_rows(self, rows, created_index: int) -> None:
+        """Запись пачки строк с раскладкой по разделам"""
+        by_partition: Dict[str, List[Tuple]] = {}
+        for row in rows:
+            by_partition.setdefault(_partition_of(row[created_index]), []).append(tuple(row))
+
+        for partition, partition_rows in by_partition.items():
+            self.write(partition, _batch_table(partition_rows, self.schema))
+
+    def close(self) -> None:
+        for writer in self.writers.values():
+            writer.close()
+
+    def discard(self) -> None:
+        self.close()
+        for tmp_path, _ in self.pending:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _table_columns(model) -> List[str]:
+    return [column.name for column in model.__table__.columns]
+
+
+def _export_incremental(session, name: str, model, watermark: int, run_id: str,
+                        export_root: str, batch_size: int, settled_before: datetime) -> Tuple[_PartitionWriters, int, int]:
+    """
+    Выгрузка новых строк таблицы пачками (каждая пачка - группа строк Parquet)
+
+    Выгрузка останавливается на первой строке, созданной не раньше settled_before:
+    водяной знак не должен обгонять id транзакций, которые еще могут быть зафиксированы.
+
+    Returns:
+        (писатели разделов с временными файлами, количество строк, новый водяной знак)
+    """
+    schema = _arrow_schema(model)
+    columns = list(model.__table__.columns)
+    created_index = [column.name for column in columns].index("created_at")
+    writers = _PartitionWriters(os.path.join(export_root, name), schema, run_id)
+
+    result = session.execute(
+        select(*columns).where(model.id > watermark).order_by(model.id).execution_options(stream_results=True, max_row_buffer=batch_size)
+    )
+
+    rows_written = 0
+    try:
+        for batch in result.partitions(batch_size):
+            # Строки идут по id, поэтому берется только начало пачки до первой свежей строки
+            fresh = next(
+                (i for i, row in enumerate(batch) if row.created_at is not None and row.created_at >= settled_before),
+                len(batch)
+            )
+            settled = batch[:fresh]
+            if settled:
+                writers.write_rows(settled, created_index)
+                rows_written += len(settled)
+                watermark = settled[-1].id
+            if len(settled) < len(batch):
+                break
+    except Exception:
+        writers.discard()
+        raise
+    finally:
+        result.close()
+
+    return writers, rows_written, watermark
+
+
+def _changed_partitions(session, model, since: datetime) -> Set[str]:
+    """Разделы, в которых после since добавлены или изменены строки"""
+    result = session.execute(
+        select(model.created_at).where(model.updated_at > since).execution_options(stream_results=True)
+    )
+    return {_partition_of(created_at) for (created_at,) in result}
+
+
+def _export_mutable(session, name: str, models: Tuple, partitions: Optional[Set[str]], run_id: str,
+                    export_root: str, batch_size: int) -> Tuple[_PartitionWriters, int]:
+    """
+    Перезапись разделов изменяемой таблицы строками рабочей и архивной таблиц
+
+    Args:
+        partitions: Перезаписываемые разделы (None - все)
+
+    Returns:
+        (писатели разделов с временными файлами, количество строк)
+    """
+    schema = _arrow_schema(models[0])
+    column_names = [column.name for column in models[0].__table__.columns]
+    created_index = column_names.index("created_at")
+    writers = _PartitionWriters(os.path.join(export_root, name), schema, run_id)
+    if partitions is not None and not partitions:
+        return writers, 0
+
+    rows_written = 0
+    try:
+        for model in models:
+            query = select(*[model.__table__.c[column_name] for column_name in column_names])
+            if partitions is not None:
+                query = query.where(_partition_condition(model, partitions))
+            result = session.execute(
+                query.order_by(model.id).execution_options(stream_results=True, max_row_buffer=batch_size)
+            )
+            for batch in result.partitions(batch_size):
+                writers.write_rows(batch, created_index)
+                rows_written += len(batch)
+    except Exception:
+        writers.discard()
+        raise
+
+    return writers, rows_written
+
+
+def _stale_files(table_dir: str, partitions: Optional[Set[str]], keep_name: str) -> List[str]:
+    """Прежние файлы перезаписанных разделов (partitions=None - всех разделов)"""
+    stale = []
+    if not os.path.isdir(table_dir):
+        return stale
+    for partition_dir in os.listdir(table_dir):
+        if partitions is not None and partition_dir[len("month="):] not in partitions:
+            continue
+        directory = os.path.join(table_dir, partition_dir)
+        stale.extend(
+            os.path.join(directory, file_name) for file_name in os.listdir(directory)
+            if file_name.endswith(".parquet") and file_name != keep_name
+        )
+    return stale
+
+
+def _export_snapshot(session, name: str, model, run_id: str, export_root: str, batch_size: int) -> Tuple[str, str, int]:
+    """Полная выгрузка справочника во временный файл"""
+    schema = _arrow_schema(model)
+    table_dir = os.path.join(export_root, name)
+    os.makedirs(table_dir, exist_ok=True)
+    final_path = os.path.join(table_dir, f"{name}.parquet")
+    tmp_path = f"{final_path}.{run_id}.tmp"
+
+    result = session.execute(
+        select(*model.__table__.columns).order_by(model.id).execution_options(stream_results=True, max_row_buffer=batch_size)
+    )
+    rows_written = 0
+    with pq.ParquetWriter(tmp_path, schema, compression="snappy") as writer:
+        for batch in result.partitions(batch_size):
+            writer.write_table(_batch_table([tuple(row) for row in batch], schema))
+            rows_written += len(batch)
+        if rows_written == 0:
+            writer.write_table(schema.empty_table())
+
+    return tmp_path, final_path, rows_written
+
+
+def _list_files(export_root: str) -> List[Dict[str, Any]]:
+    """Все файлы выгрузки для манифеста"""
+    files = []
+    for directory, _, names in os.walk(export_root):
+        for file_name in sorted(names):
+            if not file_name.endswith(".parquet"):
+                continue
+            full_path = os.path.join(directory, file_name)
+            relative = os.path.relpath(full_path, export_root).replace(os.sep, "/")
+            files.append({
+                "path": relative,
+                "table": relative.split("/", 1)[0],
+                "size": os.path.getsize(full_path)
+            })
+    return sorted(files, key=lambda f: f["path"])
+
+
+def export_parquet_snapshot(session, full: bool = False, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Выгрузка таблиц в Parquet
+
+    Args:
+        session: Сессия SQLAlchemy
+        full: Удалить предыдущую выгрузку и выгрузить все строки заново
+        batch_size: Размер группы строк (по умолчанию PARQUET_EXPORT_BATCH_SIZE)
+
+    Returns:
+        Манифест выгрузки
+    """
+    batch_size = batch_size or current_app.config.get("PARQUET_EXPORT_BATCH_SIZE", 50000)
+    safety = timedelta(minutes=current_app.config.get("PARQUET_EXPORT_SAFETY_MINUTES", 10))
+    export_root = get_export_root()
+
+    if full and os.path.isdir(export_root):
+        shutil.rmtree(export_root)
+    os.makedirs(export_root, exist_ok=True)
+
+    state_path = os.path.join(export_root, STATE_FILE)
+    state = _load_json(state_path, {"watermarks": {}})
+    started_at = datetime.utcnow()
+    run_id = started_at.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    settled_before = started_at - safety
+
+    pending: List[Tuple[str, str]] = []
+    incremental_writers: List[_PartitionWriters] = []
+    rewritten: Dict[str, Optional[Set[str]]] = {}
+    rows: Dict[str, int] = {}
+    watermarks = {name: value for name, value in state.get("watermarks", {}).items() if name in INCREMENTAL_TABLES}
+    changed_since = dict(state.get("changed_since", {}))
+
+    # Таблицы, состав колонок которых изменился с прошлого запуска, выгружаются заново
+    # (для состояния без сохраненных схем - тоже, если таблица уже выгружалась)
+    schemas = {name: _table_columns(models[0]) for name, models in MUTABLE_TABLES.items()}
+    schemas.update({name: _table_columns(model) for name, model in INCREMENTAL_TABLES.items()})
+    previous_schemas = state.get("schemas", {})
+    schema_changed = sorted(
+        name for name, columns in schemas.items()
+        if (name in watermarks or name in changed_since) and previous_schemas.get(name) != columns
+    )
+    for name in schema_changed:
+        watermarks.pop(name, None)
+        changed_since.pop(name, None)
+
+    try:
+        for name, models in MUTABLE_TABLES.items():
+            # Без сохраненного updated_at (первый запуск) перезаписываются все разделы
+            since = changed_since.get(name)
+            partitions = _changed_partitions(session, models[0], datetime.fromisoformat(since)) if since else None
+            writers, rows[name] = _export_mutable(
+                session, name, models, partitions, run_id, export_root, batch_size
+            )
+            incremental_writers.append(writers)
+            rewritten[name] = partitions
+            # Изменения во время выгрузки и незафиксированные транзакции попадут в следующий запуск
+            changed_since[name] = settled_before.isoformat()
+
+        for name, model in INCREMENTAL_TABLES.items():
+            writers, count, watermarks[name] = _export_incremental(
+                session, name, model, watermarks.get(name, 0), run_id, export_root, batch_size, settled_before
+            )
+            incremental_writers.append(writers)
+            rows[name] = count
+            if name in schema_changed:
+                rewritten[name] = None
+
+        for name, model in SNAPSHOT_TABLES.items():
+            tmp_path, final_path, rows[name] = _export_snapshot(session, name, model, run_id, export_root, batch_size)
+            pending.append((tmp_path, final_path))
+
+        for writers in incremental_writers:
+            writers.close()
+            pending.extend(writers.pending)
+    except Exception:
+        for writers in incremental_writers:
+            writers.discard()
+        for tmp_path, _ in pending:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+
+    # Публикация: переименование файлов, удаление прежних файлов перезаписанных
+    # разделов, затем сохранение водяных знаков
+    for tmp_path, final_path in pending:
+        os.replace(tmp_path, final_path)
+
+    for name, partitions in rewritten.items():
+        for path in _stale_files(os.path.join(export_root, name), partitions, f"part-{run_id}.parquet"):
+            os.remove(path)
+
+    _write_json(state_path, {
+        "watermarks": watermarks,
+        "changed_since": changed_since,
+        "schemas": schemas,
+        "last_run_id": run_id
+    })
+
+    manifest = {
+        "run_id": run_id,
+        "generated_at": datetime.utcnow().isoformat(),
+        "incremental": not full and bool(state.get("watermarks")),
+        "rewritten_partitions": {
+            name: sorted(partitions) if partitions is not None else None
+            for name, partitions in rewritten.items()
+        },
+        "schema_changed": schema_changed,
+        "schemas": schemas,
+        "rows": rows,
+        "files": _list_files(export_root)
+    }
+    _write_json(os.path.join(export_root, MANIFEST_FILE), manifest)
+
+    logger.info(f"Выгрузка Parquet {run_id} завершена: {rows}")
+    return manifest
+
+
+def get_latest_manifest() -> Optional[Dict[str, Any]]:
+    """Манифест последней выгрузки (None, если выгрузок не было)"""
+    return _load_json(os.path.join(get_export_root(), MANIFEST_FILE), None)
@@ -0,0 +1,236 @@
+"""
+Фоновые отчеты аналитики
+
+Тяжелые отчеты (длинные периоды, большие выборки) строятся задачей Celery
+app.tasks.reports.run_report, а не в запросе gunicorn. Задание хранится в
+analytics_jobs: статус, прогресс и результат, который удаляется после
+expires_at. Отмена меняет статус задания, а построитель отчета прерывается
+при следующем обновлении прогресса.
+
+Служебные задания (обучение модели прогнозирования) выполняются тем же
+механизмом, но не создаются через API отчетов.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+from ..models.analytics import AnalyticsJob, JobStatus, FINISHED_JOB_STATUSES
+from .category_distribution import compute_category_distribution
+from .dashboard_stats import compute_dashboard_stats
+from .downsampling import downsample, DOWNSAMPLE_METHODS
+from .events import record_event, REPORT_FINISHED
+from .inventory_valuation import get_valuation_summary
+from .demand_forecasts import generate_forecasts
+from .ml_forecasting import get_forecaster, training_lock
+from .sales_trends import build_sales_trends
+from .top_products import query_top_products
+
+logger = logging.getLogger(__name__)
+
+# Построители отчетов: (session, params, progress) -> результат, сериализуемый в JSON
+ReportBuilder = Callable[[Any, Dict[str, Any], Callable[[int], None]], Any]
+REPORT_BUILDERS: Dict[str, ReportBuilder] = {}
+
+# Служебные задания, которые нельзя запустить через API отчетов
+INTERNAL_JOB_TYPES = set()
+
+
+class JobCancelled(Exception):
+    """Задание отменено во время выполнения"""
+
+
+def report_builder(job_type: str, internal: bool = False):
+    """Регистрация построителя отчета (internal - служебное задание)"""
+    def decorator(f: ReportBuilder) -> ReportBuilder:
+        REPORT_BUILDERS[job_type] = f
+        if internal:
+            INTERNAL_JOB_TYPES.add(job_type)
+        return f
+    return decorator
+
+
+@report_builder("sales_trends")
+def _sales_trends_report(session, params, progress):
+    result = build_sales_trends(
+        session,
+        period=int(params.get("period", 30)),
+        granularity=params.get("granularity", "day"),
+        tz_name=params.get("tz", "UTC")
+    )
+    progress(80)
+
+    max_points = params.get("max_points")
+    if max_points:
+        method = params.get("downsample", "lttb")
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Недопустимый метод прореживания. Допустимые значения: {list(DOWNSAMPLE_METHODS)}")
+        result = downsample(result, "total_sales", int(max_points), method)
+    return result
+
+
+@report_builder("top_products")
+def _top_products_report(session, params, progress):
+    return query_top_products(
+        session,
+        period=int(params.get("period", 30)),
+        limit=min(max(int(params.get("limit", 100)), 1), 10000),
+        offset=max(int(params.get("offset", 0)), 0)
+    )
+
+
+@report_builder("category_distribution")
+def _category_distribution_report(session, params, progress):
+    supplier_id = params.get("supplier_id")
+    return compute_category_distribution(
+        session,
+        supplier_id=int(supplier_id) if supplier_id else None,
+        low_stock=bool(params.get("low_stock", False))
+    )
+
+
+@report_builder("dashboard_stats")
+def _dashboard_stats_report(session, params, progress):
+    return compute_dashboard_stats(session)
+
+
+@report_builder("valuation")
+def _valuation_report(session, params, progress):
+    return get_valuation_summary(session, by_category=bool(params.get("by_category", True)))
+
+
+@report_builder("train_model", internal=True)
+def _train_model_job(session, params, progress):
+    product_id = params.get("product_id")
+    forecaster = get_forecaster()
+
+    # Одно обучение на все воркеры
+    with training_lock():
+        result = forecaster.fit(int(product_id) if product_id else None, progress=progress)
+    if result is None:
+        raise ValueError("Недостаточно данных для обучения модели")
+
+    # Прогнозы новой версии строятся сразу, не дожидаясь расписания
+    progress(95)
+    result["forecasts"] = generate_forecasts(session, forecaster)
+    return result
+
+
+def create_job(session, job_type: str, params: Optional[Dict[str, Any]], user_id: Optional[int],
+               internal: bool = False) -> AnalyticsJob:
+    """
+    Создание задания отчета (задача Celery запускается вызывающей стороной)
+
+    Args:
+        internal: Разрешить служебные типы заданий
+
+    Raises:
+        ValueError: Неизвестный тип отчета или некорректные параметры
+    """
+    if job_type not in REPORT_BUILDERS or (job_type in INTERNAL_JOB_TYPES and not internal):
+        allowed = sorted(set(REPORT_BUILDERS) - INTERNAL_JOB_TYPES)
+        raise ValueError(f"Неизвестный тип отчета. Допустимые значения: {allowed}")
+    if params is not None and not isinstance(params, dict):
+        raise ValueError("Параметры отчета должны быть объектом")
+
+    job = AnalyticsJob(job_type=job_type, params=params or {}, user_id=user_id)
+    session.add(job)
+    session.commit()
+    return job
+
+
+def _update_running(session, job_id: int, values: Dict[str, Any]) -> bool:
+    """Обновление выполняющегося задания; False, если задание уже отменено"""
+    updated = session.query(AnalyticsJob).filter(
+        AnalyticsJob.id == job_id,
+        AnalyticsJob.status == JobStatus.RUNNING.value
+    ).update(values, synchronize_session=False)
+    session.commit()
+    return updated > 0
+
+
+def _finish(session, job: AnalyticsJob, status: str, result: Any = None, error: Optional[str] = None) -> bool:
+    """Завершение задания с сохранением результата и событием для уведомления клиента"""
+    now = datetime.utcnow()
+    ttl = timedelta(hours=current_app.config.get("REPORT_RESULT_TTL_HOURS", 24))
+    values = {
+        "status": status,
+        "progress": 100 if status == JobStatus.COMPLETED.value else job.progress,
+        "result": result,
+        "error": error,
+        "finished_at": now,
+        "expires_at": now + ttl
+    }
+
+    updated = session.query(AnalyticsJob).filter(
+        AnalyticsJob.id == job.id,
+        AnalyticsJob.status == JobStatus.RUNNING.value
+    ).update(values, synchronize_session=False)
+    if updated:
+        record_event(session, REPORT_FINISHED, "analytics_job", job.id, {
+            "job_id": job.id,
+            "job_type": job.job_type,
+            "user_id": job.user_id,
+            "status": status
+        })
+    session.commit()
+    return updated > 0
+
+
+def run_job(session, job_id: int) -> Dict[str, Any]:
+    """
+    Выполнение задания отчета
+
+    Returns:
+        Итоговый статус задания
+    """
+    job = session.query(AnalyticsJob).filter_by(id=job_id).first()
+    if job is None or job.status != JobStatus.PENDING.value:
+        # Задание удалено или отменено до начала выполнения
+        return {"job_id": job_id, "status": job.status if job else None}
+
+    job.status = JobStatus.RUNNING.value
+    job.started_at = datetime.utcnow()
+    session.commit()
+
+    def progress(percent: int) -> None:
+        if not _update_running(session, job_id, {"progress": max(0, min(int(percent), 99))}):
+            raise JobCancelled()
+
+    try:
+        result = REPORT_BUILDERS[job.job_type](session, job.params or {}, progress)
+        status = JobStatus.COMPLETED.value
+        _finish(session, job, status, result=result)
+    except JobCancelled:
+        session.rollback()
+        status = JobStatus.CANCELLED.value
+        logger.info(f"Отчет {job_id} ({job.job_type}) отменен")
+    except Exception as e:
+        session.rollback()
+        status = JobStatus.FAILED.value
+        _finish(session, job, status, error=str(e))
+        logger.error(f"Ошибка построения отчета {job_id} ({job.job_type}): {str(e)}")
+
+    return {"job_id": job_id, "status": status}
+
+
+def cancel_job(session, job: AnalyticsJob) -> bool:
+    """Отмена незавершенного задания; False, если задание уже завершено"""
+    if job.status in FINISHED_JOB_STATUSES:
+        return False
+
+    job.status = JobStatus.CANCELLED.value
+    job.finished_at = datetime.utcnow()
+    job.expires_at = job.finished_at + timedelta(hours=current_app.config.get("REPORT_RESULT_TTL_HOURS", 24))
+    session.commit()
+    return True
+
+
+def purge_expired_jobs(session) -> int:
+    """Удаление заданий с истекшим сроком хранения результата"""
+    deleted = session.query(AnalyticsJob).filter(
+        AnalyticsJob.expires_at < datetime.utcnow()
+    ).delete(synchronize_session=False)
+    session.commit()
+    return deleted
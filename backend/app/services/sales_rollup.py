@@ -0,0 +1,176 @@
+"""
+Дневная витрина продаж (daily_sales)
+
+Витрина обновляется инкрементально в той же транзакции, что и создание заказа
+или смена его статуса, и может быть полностью пересчитана командой
+`flask rebuild-sales-rollup`. Аналитика читает агрегаты из витрины вместо
+загрузки заказов.
+"""
+import logging
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, union_all, delete, insert, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..models.order import Order, SALES_ORDER_TYPE, SALES_STATUSES
+from ..models.archive import ArchivedOrder
+from ..models.analytics import DailySales
+from .analytics_cache import analytics_cache, invalidate_on_commit, ORDERS
+
+logger = logging.getLogger(__name__)
+
+
+def _add_to_bucket(session, sales_date: date, order_type: str, status: str,
+                   count_delta: int, amount_delta: float) -> None:
+    """Изменение одной строки витрины (создается при отсутствии)"""
+    if session.get_bind().dialect.name == "postgresql":
+        # Атомарный upsert без гонки между конкурентными транзакциями
+        stmt = pg_insert(DailySales.__table__).values(
+            sales_date=sales_date,
+            order_type=order_type,
+            status=status,
+            order_count=count_delta,
+            total_amount=amount_delta,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sales_date", "order_type", "status"],
+            set_={
+                "order_count": DailySales.__table__.c.order_count + stmt.excluded.order_count,
+                "total_amount": DailySales.__table__.c.total_amount + stmt.excluded.total_amount,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        session.execute(stmt)
+        # Upsert выполняется без ORM и не виден обработчику after_flush
+        invalidate_on_commit(session, [ORDERS])
+        return
+
+    row = session.query(DailySales).filter_by(
+        sales_date=sales_date, order_type=order_type, status=status
+    ).with_for_update().first()
+
+    if row is None:
+        session.add(DailySales(
+            sales_date=sales_date,
+            order_type=order_type,
+            status=status,
+            order_count=count_delta,
+            total_amount=amount_delta
+        ))
+    else:
+        row.order_count = DailySales.order_count + count_delta
+        row.total_amount = DailySales.total_amount + amount_delta
+
+
+def apply_order(session, order: Order, old_status: Optional[str] = None) -> None:
+    """
+    Учет заказа в витрине (без коммита)
+
+    Args:
+        session: Сессия SQLAlchemy
+        order: Созданный или измененный заказ (должен иметь created_at - выполните flush)
+        old_status: Предыдущий статус при смене статуса, None для нового заказа
+    """
+    sales_date = order.created_at.date()
+    amount = order.total_amount or 0.0
+    new_status = order.status
+
+    if old_status is not None:
+        if old_status == new_status:
+            return
+        _add_to_bucket(session, sales_date, order.order_type, old_status, -1, -amount)
+
+    _add_to_bucket(session, sales_date, order.order_type, new_status, 1, amount)
+
+
+def remove_order(session, order: Order) -> None:
+    """Исключение удаляемого заказа из витрины (без коммита)"""
+    _add_to_bucket(
+        session, order.created_at.date(), order.order_type, order.status,
+        -1, -(order.total_amount or 0.0)
+    )
+
+
+def rebuild_sales_rollup(session, start_date: Optional[date] = None) -> int:
+    """
+    Полный пересчет витрины по рабочим и архивным заказам
+
+    Args:
+        session: Сессия SQLAlchemy
+        start_date: Пересчитать только дни начиная с этой даты (None - все)
+
+    Returns:
+        Количество строк витрины после пересчета
+    """
+    sources = []
+    for model in (Order, ArchivedOrder):
+        source = select(
+            func.date(model.created_at).label("sales_date"),
+            model.order_type.label("order_type"),
+            model.status.label("status"),
+            model.total_amount.label("total_amount")
+        )
+        if start_date is not None:
+            source = source.where(model.created_at >= datetime.combine(start_date, datetime.min.time()))
+        sources.append(source)
+
+    orders = union_all(*sources).subquery()
+    aggregated = select(
+        orders.c.sales_date,
+        orders.c.order_type,
+        orders.c.status,
+        func.count().label("order_count"),
+        func.coalesce(func.sum(orders.c.total_amount), 0.0).label("total_amount"),
+        literal_column("CURRENT_TIMESTAMP").label("created_at"),
+        literal_column("CURRENT_TIMESTAMP").label("updated_at")
+    ).group_by(orders.c.sales_date, orders.c.order_type, orders.c.status)
+
+    cleanup = delete(DailySales.__table__)
+    if start_date is not None:
+        cleanup = cleanup.where(DailySales.sales_date >= start_date)
+    session.execute(cleanup)
+
+    session.execute(insert(DailySales.__table__).from_select(
+        ["sales_date", "order_type", "status", "order_count", "total_amount", "created_at", "updated_at"],
+        aggregated
+    ))
+    session.commit()
+    analytics_cache.bump([ORDERS])
+
+    rows = session.query(func.count(DailySales.id)).scalar()
+    logger.info(f"Витрина продаж пересчитана: {rows} строк (с {start_date or 'начала истории'})")
+    return rows
+
+
+def sales_filter(query):
+    """Фильтр витрины по заказам, учитываемым как продажи"""
+    return query.filter(
+        DailySales.order_type == SALES_ORDER_TYPE,
+        DailySales.status.in_(SALES_STATUSES)
+    )
+
+
+def sales_totals(session, start_date: date, end_date: Optional[date] = None) -> Tuple[float, int]:
+    """
+    Сумма и количество продаж за период по витрине
+
+    Args:
+        start_date: Начальная дата (включительно)
+        end_date: Конечная дата (не включительно), None - без ограничения
+
+    Returns:
+        (сумма продаж, количество заказов)
+    """
+    query = sales_filter(session.query(
+        func.coalesce(func.sum(DailySales.total_amount), 0.0),
+        func.coalesce(func.sum(DailySales.order_count), 0)
+    )).filter(DailySales.sales_date >= start_date)
+
+    if end_date is not None:
+        query = query.filter(DailySales.sales_date < end_date)
+
+    total, count = query.one()
+    return float(total), int(count)
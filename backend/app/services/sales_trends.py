@@ -0,0 +1,236 @@
+"""
+Тренды продаж с произвольной гранулярностью
+
+На PostgreSQL разбиение на интервалы (date_trunc) и заполнение пропусков
+(generate_series) выполняются одним запросом. Дневные, недельные и месячные
+тренды в UTC читаются из витрины daily_sales, почасовые и тренды в другом
+часовом поясе - из заказов. Для остальных СУБД (SQLite в тестах) агрегаты
+группируются по часу/дню в базе, а интервалы и пропуски собираются в Python.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func, select, union_all, cast, literal_column, DateTime
+
+from ..models.order import Order, SALES_ORDER_TYPE, SALES_STATUSES
+from ..models.archive import ArchivedOrder
+from ..models.analytics import DailySales
+from .order_archive import reaches_archive
+
+logger = logging.getLogger(__name__)
+
+# Допустимые интервалы группировки
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Формат подписи интервала в ответе
+BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+
+def get_timezone(name: str) -> ZoneInfo:
+    """Часовой пояс по имени IANA (ValueError для неизвестного)"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Неизвестный часовой пояс: {name}")
+
+
+def truncate(value: datetime, granularity: str) -> datetime:
+    """Начало интервала, содержащего момент времени (аналог date_trunc, неделя с понедельника)"""
+    if granularity == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value: datetime, granularity: str) -> datetime:
+    """Начало следующего интервала"""
+    if granularity == "hour":
+        return value + timedelta(hours=1)
+    if granularity == "week":
+        return value + timedelta(days=7)
+    if granularity == "month":
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def _bounds(period: int, granularity: str, tz: ZoneInfo) -> Tuple[datetime, datetime, datetime]:
+    """
+    Границы периода
+
+    Returns:
+        (начало первого интервала и начало последнего интервала в местном времени,
+         начало первого интервала в UTC для фильтра по created_at)
+    """
+    now_local = datetime.now(timezone.utc).astimezone(tz).replace(tzinfo=None)
+    first = truncate(now_local - timedelta(days=period), granularity)
+    last = truncate(now_local, granularity)
+    start_utc = first.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+    return first, last, start_utc
+
+
+def _use_rollup(granularity: str, tz_name: str) -> bool:
+    """Витрина хранит дни в UTC, поэтому подходит только для дневных и более крупных интервалов в UTC"""
+    return granularity != "hour" and tz_name == "UTC"
+
+
+def _orders_source(start_utc: datetime):
+    """Продажи (created_at, total_amount) из рабочих и, при необходимости, архивных заказов"""
+    models = [Order, ArchivedOrder] if reaches_archive(start_utc) else [Order]
+    sources = [
+        select(
+            model.created_at.label("created_at"),
+            model.total_amount.label("total_amount")
+        ).where(
+            model.order_type == SALES_ORDER_TYPE,
+            model.status.in_(SALES_STATUSES),
+            model.created_at >= start_utc
+        )
+        for model in models
+    ]
+    return (union_all(*sources) if len(sources) > 1 else sources[0]).subquery()
+
+
+def _format(rows, granularity: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "date": bucket.strftime(BUCKET_FORMATS[granularity]),
+            "total_sales": float(total_sales or 0),
+            "order_count": int(order_count or 0)
+        }
+        for bucket, total_sales, order_count in rows
+    ]
+
+
+def _postgres_trends(session, granularity: str, tz_name: str,
+                     first: datetime, last: datetime, start_utc: datetime) -> List[Dict[str, Any]]:
+    """Интервалы и заполнение пропусков одним запросом (date_trunc + generate_series)"""
+    if _use_rollup(granularity, tz_name):
+        buckets = select(
+            func.date_trunc(granularity, cast(DailySales.sales_date, DateTime)).label("bucket"),
+            DailySales.total_amount.label("total_sales"),
+            DailySales.order_count.label("order_count")
+        ).where(
+            DailySales.order_type == SALES_ORDER_TYPE,
+            DailySales.status.in_(SALES_STATUSES),
+            DailySales.sales_date >= first.date()
+        ).subquery()
+        order_count = func.sum(buckets.c.order_count)
+    else:
+        orders = _orders_source(start_utc)
+        # created_at хранится в UTC без пояса: переводим в местное время до усечения
+        local_time = func.timezone(tz_name, func.timezone("UTC", orders.c.created_at))
+        buckets = select(
+            func.date_trunc(granularity, local_time).label("bucket"),
+            orders.c.total_amount.label("total_sales")
+        ).subquery()
+        order_count = func.count()
+
+    aggregated = select(
+        buckets.c.bucket,
+        func.sum(buckets.c.total_sales).label("total_sales"),
+        order_count.label("order_count")
+    ).group_by(buckets.c.bucket).subquery()
+
+    # Значение granularity проверено по GRANULARITIES, поэтому безопасно в тексте интервала
+    series = select(
+        func.generate_series(
+            cast(first, DateTime), cast(last, DateTime),
+            literal_column(f"interval '1 {granularity}'")
+        ).label("bucket")
+    ).subquery()
+
+    rows = session.execute(
+        select(
+            series.c.bucket,
+            func.coalesce(aggregated.c.total_sales, 0),
+            func.coalesce(aggregated.c.order_count, 0)
+        ).select_from(
+            series.outerjoin(aggregated, aggregated.c.bucket == series.c.bucket)
+        ).order_by(series.c.bucket)
+    ).all()
+
+    return _format(rows, granularity)
+
+
+def _portable_trends(session, granularity: str, tz_name: str, tz: ZoneInfo,
+                     first: datetime, last: datetime, start_utc: datetime) -> List[Dict[str, Any]]:
+    """Запасной вариант: агрегаты по дню/часу из базы, интервалы и пропуски в Python"""
+    totals: Dict[datetime, List[float]] = {}
+
+    if _use_rollup(granularity, tz_name):
+        rows = session.query(
+            DailySales.sales_date,
+            func.sum(DailySales.total_amount),
+            func.sum(DailySales.order_count)
+        ).filter(
+            DailySales.order_type == SALES_ORDER_TYPE,
+            DailySales.status.in_(SALES_STATUSES),
+            DailySales.sales_date >= first.date()
+        ).group_by(DailySales.sales_date).all()
+        points = [(datetime.combine(day, datetime.min.time()), total, count) for day, total, count in rows]
+    else:
+        orders = _orders_source(start_utc)
+        hour = func.strftime("%Y-%m-%d %H:00:00", orders.c.created_at)
+        rows = session.execute(
+            select(hour, func.sum(orders.c.total_amount), func.count()).group_by(hour)
+        ).all()
+        points = [
+            (
+                datetime.strptime(hour_utc, "%Y-%m-%d %H:%M:%S")
+                .replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None),
+                total,
+                count
+            )
+            for hour_utc, total, count in rows
+        ]
+
+    for moment, total, count in points:
+        bucket = totals.setdefault(truncate(moment, granularity), [0.0, 0])
+        bucket[0] += float(total or 0)
+        bucket[1] += int(count or 0)
+
+    result = []
+    bucket = first
+    while bucket <= last:
+        total, count = totals.get(bucket, (0.0, 0))
+        result.append((bucket, total, count))
+        bucket = next_bucket(bucket, granularity)
+
+    return _format(result, granularity)
+
+
+def build_sales_trends(session, period: int = 30, granularity: str = "day",
+                     tz_name: str = "UTC") -> List[Dict[str, Any]]:
+    """
+    Тренды продаж за период
+
+    Args:
+        session: Сессия SQLAlchemy
+        period: Период в днях
+        granularity: Интервал группировки (hour, day, week, month)
+        tz_name: Часовой пояс IANA, в котором строятся интервалы
+
+    Returns:
+        Непрерывный ряд интервалов с суммой и количеством продаж
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Недопустимая гранулярность. Допустимые значения: {list(GRANULARITIES)}")
+    tz = get_timezone(tz_name)
+
+    first, last, start_utc = _bounds(period, granularity, tz)
+
+    if session.get_bind().dialect.name == "postgresql":
+        return _postgres_trends(session, granularity, tz_name, first, last, start_utc)
+    return _portable_trends(session, granularity, tz_name, tz, first, last, start_utc)
@@ -0,0 +1,147 @@
+"""
+Неликвидные и медленно оборачиваемые запасы
+
+Для всех товаров двумя агрегирующими запросами (по строкам заказов продаж и
+по журналу остатков) определяются дата последней отгрузки/списания, дата
+последнего движения и спрос за окно STOCK_HEALTH_DEMAND_DAYS. Покрытие
+(месяцы запаса) и статус рассчитываются векторно в pandas:
+- dead - остаток есть, отгрузок не было дольше DEAD_STOCK_DAYS;
+- slow - остаток покрывает спрос дольше SLOW_MOVER_COVERAGE_MONTHS;
+- healthy - остальные товары.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import case, delete, func, insert
+
+from ..models.order import Order, OrderItem, SALES_ORDER_TYPE, SALES_STATUSES
+from ..models.inventory import Product, InventoryLog
+from ..models.valuation import ProductValuation
+from ..models.analytics import StockHealth, StockHealthStatus
+from .abc_xyz import to_records
+
+logger = logging.getLogger(__name__)
+
+# Средняя длина месяца для пересчета дневного спроса в месячный
+DAYS_PER_MONTH = 30.4375
+
+
+def load_stock_movements(session, demand_start: datetime) -> pd.DataFrame:
+    """
+    Остатки, даты последних движений и спрос всех товаров
+
+    Returns:
+        DataFrame по товарам: on_hand, stock_value, created_at, last_sale_at,
+        demand_units, last_issue_at, last_log_at
+    """
+    products = pd.DataFrame.from_records(
+        session.query(
+            Product.id,
+            Product.quantity,
+            # Стоимость по FIFO из оценки запасов, для товаров без оценки - по цене
+            func.coalesce(ProductValuation.fifo_value, Product.quantity * Product.price),
+            Product.created_at
+        ).outerjoin(ProductValuation, ProductValuation.product_id == Product.id).all(),
+        columns=["product_id", "on_hand", "stock_value", "created_at"]
+    ).set_index("product_id")
+
+    sales = pd.DataFrame.from_records(
+        session.query(
+            OrderItem.product_id,
+            func.max(Order.created_at),
+            func.sum(case((Order.created_at >= demand_start, OrderItem.quantity), else_=0))
+        ).join(
+            Order, Order.id == OrderItem.order_id
+        ).filter(
+            Order.order_type == SALES_ORDER_TYPE,
+            Order.status.in_(SALES_STATUSES)
+        ).group_by(OrderItem.product_id).all(),
+        columns=["product_id", "last_sale_at", "demand_units"]
+    ).set_index("product_id")
+
+    logs = pd.DataFrame.from_records(
+        session.query(
+            InventoryLog.product_id,
+            func.max(case((InventoryLog.quantity_change < 0, InventoryLog.created_at))),
+            func.max(InventoryLog.created_at)
+        ).group_by(InventoryLog.product_id).all(),
+        columns=["product_id", "last_issue_at", "last_log_at"]
+    ).set_index("product_id")
+
+    frame = products.join([sales, logs])
+    for column in ("created_at", "last_sale_at", "last_issue_at", "last_log_at"):
+        frame[column] = pd.to_datetime(frame[column])
+    frame["on_hand"] = frame["on_hand"].astype(int)
+    frame["stock_value"] = frame["stock_value"].astype(float)
+    frame["demand_units"] = frame["demand_units"].astype(float).fillna(0.0)
+    return frame
+
+
+def classify_stock(movements: pd.DataFrame, now: datetime, demand_days: int,
+                   dead_days: int, slow_months: float) -> pd.DataFrame:
+    """Покрытие спроса и статус запаса (векторно для всех товаров)"""
+    last_outbound = movements[["last_sale_at", "last_issue_at"]].max(axis=1)
+    last_movement = pd.concat([last_outbound, movements["last_log_at"]], axis=1).max(axis=1)
+
+    # Товар без отгрузок считается с даты заведения
+    since = last_outbound.fillna(movements["created_at"])
+    days_since = (pd.Timestamp(now) - since).dt.days
+
+    monthly_demand = movements["demand_units"] * DAYS_PER_MONTH / demand_days
+    coverage = movements["on_hand"] / monthly_demand.where(monthly_demand > 0)
+
+    in_stock = movements["on_hand"] > 0
+    dead = in_stock & (days_since > dead_days)
+    slow = in_stock & ~dead & (coverage.isna() | (coverage > slow_months))
+    status = np.select(
+        [dead, slow],
+        [StockHealthStatus.DEAD.value, StockHealthStatus.SLOW.value],
+        default=StockHealthStatus.HEALTHY.value
+    )
+
+    return pd.DataFrame({
+        "product_id": movements.index.astype(int),
+        "status": status,
+        "on_hand": movements["on_hand"].to_numpy(),
+        "stock_value": movements["stock_value"].round(2).to_numpy(),
+        "last_outbound_at": last_outbound.to_numpy(),
+        "last_movement_at": last_movement.to_numpy(),
+        "days_since_outbound": days_since.astype("Int64").to_numpy(),
+        "monthly_demand": monthly_demand.round(4).to_numpy(),
+        "coverage_months": coverage.round(2).to_numpy()
+    })
+
+
+def refresh_stock_health(session, dead_days: Optional[int] = None,
+                         slow_months: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Пересчет состояния запасов всех товаров с заменой сохраненных результатов
+
+    Returns:
+        Количество товаров по статусам
+    """
+    dead_days = dead_days or current_app.config.get("DEAD_STOCK_DAYS", 90)
+    slow_months = slow_months or current_app.config.get("SLOW_MOVER_COVERAGE_MONTHS", 6)
+    demand_days = current_app.config.get("STOCK_HEALTH_DEMAND_DAYS", 90)
+    computed_at = datetime.utcnow()
+
+    movements = load_stock_movements(session, computed_at - timedelta(days=demand_days))
+
+    # Полная замена в одной транзакции
+    session.execute(delete(StockHealth.__table__))
+    counts: Dict[str, int] = {}
+    if len(movements):
+        result = classify_stock(movements, computed_at, demand_days, dead_days, slow_months)
+        result["computed_at"] = computed_at
+        result["created_at"] = computed_at
+        result["updated_at"] = computed_at
+        session.execute(insert(StockHealth.__table__), to_records(result))
+        counts = {status: int(count) for status, count in result.groupby("status").size().items()}
+    session.commit()
+
+    logger.info(f"Состояние запасов пересчитано: {counts}")
+    return {"statuses": counts, "computed_at": computed_at.isoformat()}
@@ -0,0 +1,115 @@
+"""
+Топ продаваемых товаров
+
+Рейтинг считается одним GROUP BY по order_items и orders. Для стандартных
+периодов (7, 30, 90 дней) первые TOP_N строк хранятся в памяти процесса
+и пересчитываются не чаще одного раза в TOP_PRODUCTS_REFRESH_SECONDS.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from ..models.order import Order, OrderItem, SALES_ORDER_TYPE, SALES_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Периоды, для которых рейтинг хранится в памяти
+STANDARD_PERIODS = (7, 30, 90)
+
+# Количество строк рейтинга, хранимых для каждого периода
+TOP_N = 100
+
+
+def query_top_products(session, period: int, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Рейтинг товаров по выручке за период одним агрегирующим запросом
+
+    Args:
+        session: Сессия SQLAlchemy
+        period: Период в днях
+        limit: Количество строк
+        offset: Смещение
+
+    Returns:
+        Список товаров с количеством продаж и выручкой по убыванию выручки
+    """
+    start_date = datetime.utcnow() - timedelta(days=period)
+    revenue = func.sum(OrderItem.quantity * OrderItem.unit_price)
+
+    rows = session.query(
+        OrderItem.product_id,
+        func.max(OrderItem.product_name),
+        func.sum(OrderItem.quantity),
+        revenue
+    ).join(
+        Order, Order.id == OrderItem.order_id
+    ).filter(
+        Order.created_at >= start_date,
+        Order.order_type == SALES_ORDER_TYPE,
+        Order.status.in_(SALES_STATUSES)
+    ).group_by(
+        OrderItem.product_id
+    ).order_by(
+        revenue.desc(), OrderItem.product_id
+    ).limit(limit).offset(offset).all()
+
+    return [
+        {
+            'product_id': product_id,
+            'product_name': product_name,
+            'quantity_sold': int(quantity_sold or 0),
+            'revenue': float(product_revenue or 0)
+        }
+        for product_id, product_name, quantity_sold, product_revenue in rows
+    ]
+
+
+class TopProductsCache:
+    """Рейтинги товаров для стандартных периодов в памяти процесса"""
+
+    def __init__(self):
+        self._rankings: Dict[int, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, period: int, max_age: float) -> bool:
+        entry = self._rankings.get(period)
+        return entry is not None and time.monotonic() - entry[0] < max_age
+
+    def refresh(self, session, period: int) -> List[Dict[str, Any]]:
+        """Пересчет рейтинга для периода"""
+        ranking = query_top_products(session, period, TOP_N)
+        self._rankings[period] = (time.monotonic(), ranking)
+        return ranking
+
+    def get(self, session, period: int, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Рейтинг товаров за период
+
+        Для стандартных периодов в пределах TOP_N строк ответ берется из памяти,
+        остальные запросы выполняются напрямую.
+        """
+        if period not in STANDARD_PERIODS or offset + limit > TOP_N:
+            return query_top_products(session, period, limit, offset)
+
+        max_age = current_app.config.get("TOP_PRODUCTS_REFRESH_SECONDS", 300)
+        if not self._is_fresh(period, max_age):
+            # Один поток пересчитывает рейтинг, остальные ждут готовый результат
+            with self._lock:
+                if not self._is_fresh(period, max_age):
+                    logger.debug(f"Пересчет топа товаров за {period} дней")
+                    self.refresh(session, period)
+
+        return self._rankings[period][1][offset:offset + limit]
+
+    def clear(self) -> None:
+        """Сброс сохраненных рейтингов"""
+        self._rankings.clear()
+
+
+# Экземпляр-одиночка
+top_products_cache = TopProductsCache()
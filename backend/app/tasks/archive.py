@@ -0,0 +1,21 @@
+import logging
+from typing import Dict, Any, Optional
+
+from app.core.celery import celery
+from app.db.session import db
+from app.services.order_archive import archive_closed_orders
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task
+def archive_orders(older_than_days: Optional[int] = None) -> Dict[str, Any]:
+    """Перенос закрытых заказов старше заданного срока в архивные таблицы"""
+    try:
+        result = archive_closed_orders(db.session, older_than_days=older_than_days)
+        return {"success": True, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка архивации заказов: {str(e)}")
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,21 @@
+import logging
+from typing import Dict, Any
+
+from app.core.celery import celery
+from app.db.session import db
+from app.services.parquet_export import export_parquet_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task
+def export_parquet(full: bool = False) -> Dict[str, Any]:
+    """Выгрузка таблиц для аналитиков в Parquet (по умолчанию инкрементально)"""
+    try:
+        manifest = export_parquet_snapshot(db.session, full=full)
+        return {"success": True, "run_id": manifest["run_id"], "rows": manifest["rows"]}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка выгрузки Parquet: {str(e)}")
+        return {"success": False, "error": str(e)}
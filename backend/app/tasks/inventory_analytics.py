@@ -0,0 +1,82 @@
+import logging
+from typing import Dict, Any, Optional
+
+from app.core.celery import celery
+from app.db.session import db
+from app.services.abc_xyz import run_classification
+from app.services.inventory_metrics import refresh_inventory_metrics
+from app.services.stock_health import refresh_stock_health
+from app.services.demand_forecasts import generate_forecasts
+from app.services.ml_forecasting import get_forecaster
+from app.services.reports import create_job, run_job
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task
+def classify_inventory(weeks: Optional[int] = None) -> Dict[str, Any]:
+    """Пересчет ABC/XYZ-классов всего каталога"""
+    try:
+        result = run_classification(db.session, weeks=weeks)
+        return {"success": True, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка ABC/XYZ-классификации: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@celery.task
+def refresh_metrics() -> Dict[str, Any]:
+    """Пересчет оборачиваемости, дней запаса и sell-through по всем окнам"""
+    try:
+        result = refresh_inventory_metrics(db.session)
+        return {"success": True, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка расчета показателей оборачиваемости: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@celery.task
+def refresh_stock_health_task() -> Dict[str, Any]:
+    """Поиск неликвидов и медленно оборачиваемых товаров"""
+    try:
+        result = refresh_stock_health(db.session)
+        return {"success": True, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка расчета состояния запасов: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@celery.task
+def update_forecasts_task() -> Dict[str, Any]:
+    """Инкрементальное обновление модели по новым дням спроса и генерация прогнозов"""
+    try:
+        forecaster = get_forecaster()
+        smoothing = forecaster.update_incremental()
+        result = generate_forecasts(db.session, forecaster)
+        return {"success": True, "smoothing": smoothing, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка обновления прогнозов спроса: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@celery.task
+def retrain_forecast_model() -> Dict[str, Any]:
+    """Полное переобучение: состояния сглаживания с начала окна и обучение леса (задание train_model)"""
+    try:
+        smoothing = get_forecaster().update_incremental(rebuild=True)
+        job = create_job(db.session, "train_model", {}, None, internal=True)
+        result = run_job(db.session, job.id)
+        return {"success": True, "smoothing": smoothing, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка полного переобучения модели прогнозирования: {str(e)}")
+        return {"success": False, "error": str(e)}
@@ -124,4 +124,46 @@ def check_low_stock() -> Dict[str, Any]:
         
     except Exception as e:
         logger.error(f"Ошибка проверки товаров с низким запасом: {str(e)}")
-        return {"success": False, "error": str(e)} 
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+
+@celery.task
+def notify_low_stock_product(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Уведомление о переходе товара через минимальный запас (по событию stock.changed)"""
+    try:
+        payload = event.get("payload", {})
+        min_stock = payload.get("min_stock")
+        if min_stock is None:
+            return {"success": True, "message": "Минимальный запас не задан"}
+        
+        # Уведомляем только при пересечении порога, а не при каждом изменении
+        if not (payload["old_quantity"] > min_stock >= payload["new_quantity"]):
+            return {"success": True, "message": "Порог минимального запаса не пересечен"}
+        
+        admins = User.query.filter(User.role.in_([UserRole.ADMIN.value, UserRole.OWNER.value]), User.is_active == True).all()
+        
+        if not admins:
+            return {"success": False, "error": "Нет активных администраторов для отправки уведомлений"}
+        
+        html_content = f"""
+        <html>
+        <body>
+            <h2>Низкий уровень запаса товара</h2>
+            <p>Остаток товара <b>{payload.get("name")}</b> (SKU {payload.get("sku")}) снизился
+            до {payload["new_quantity"]} при минимальном запасе {min_stock}.</p>
+            <p>Пожалуйста, примите необходимые меры для пополнения запасов.</p>
+        </body>
+        </html>
+        """
+        
+        send_email.delay(
+            to_emails=[admin.email for admin in admins],
+            subject=f"Низкий запас: {payload.get('name')}",
+            html_content=html_content
+        )
+        
+        return {"success": True, "message": f"Уведомление о товаре {payload.get('product_id')} отправлено"}
+        
+    except Exception as e:
+        logger.error(f"Ошибка уведомления о низком запасе товара: {str(e)}")
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,110 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+import requests
+from flask import current_app
+
+from app.core.celery import celery
+from app.models import OutboxEvent, OutboxStatus
+from app.db.session import db
+from app.services.events import STOCK_CHANGED
+from app.services.event_stream import event_broker
+
+logger = logging.getLogger(__name__)
+
+# Задачи Celery, получающие события каждого типа (сообщение события передается первым аргументом)
+EVENT_TASK_ROUTES: Dict[str, List[str]] = {
+    STOCK_CHANGED: ["app.tasks.notifications.notify_low_stock_product"],
+}
+
+
+def _deliver_to_celery(message: Dict[str, Any]) -> None:
+    """Передача события подписанным задачам Celery"""
+    for task_name in EVENT_TASK_ROUTES.get(message["event_type"], []):
+        celery.send_task(task_name, args=[message])
+
+
+def _deliver_to_webhooks(message: Dict[str, Any]) -> None:
+    """Отправка события на настроенные вебхуки"""
+    timeout = current_app.config.get("OUTBOX_WEBHOOK_TIMEOUT", 5)
+    for url in current_app.config.get("OUTBOX_WEBHOOK_URLS", []):
+        response = requests.post(url, json=message, timeout=timeout)
+        response.raise_for_status()
+
+
+def _dispatch_batch(batch_size: int, max_attempts: int) -> int:
+    """
+    Доставка одной пачки событий
+
+    Строки блокируются через FOR UPDATE SKIP LOCKED, поэтому несколько
+    воркеров могут разбирать outbox параллельно без двойной доставки.
+    """
+    session = db.session
+    events = session.query(OutboxEvent).filter(
+        OutboxEvent.status == OutboxStatus.PENDING.value
+    ).order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    for event in events:
+        message = event.to_message()
+        try:
+            _deliver_to_celery(message)
+            _deliver_to_webhooks(message)
+            event.status = OutboxStatus.SENT.value
+            event.processed_at = datetime.utcnow()
+            event.last_error = None
+            # Живые обновления клиентов (SSE) - без повторных попыток
+            event_broker.publish(message)
+        except Exception as e:
+            event.attempts += 1
+            event.last_error = str(e)
+            if event.attempts >= max_attempts:
+                event.status = OutboxStatus.FAILED.value
+                logger.error(f"Событие {event.id} ({event.event_type}) не доставлено после {event.attempts} попыток: {str(e)}")
+            else:
+                logger.warning(f"Ошибка доставки события {event.id} ({event.event_type}): {str(e)}")
+
+    # Коммит снимает блокировки строк
+    session.commit()
+    return len(events)
+
+
+@celery.task
+def dispatch_outbox(max_batches: int = 10) -> Dict[str, Any]:
+    """Доставка накопленных событий outbox пачками"""
+    batch_size = current_app.config.get("OUTBOX_BATCH_SIZE", 100)
+    max_attempts = current_app.config.get("OUTBOX_MAX_ATTEMPTS", 10)
+    processed = 0
+
+    try:
+        for _ in range(max_batches):
+            count = _dispatch_batch(batch_size, max_attempts)
+            processed += count
+            if count < batch_size:
+                break
+
+        return {"success": True, "processed": processed}
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка обработки outbox: {str(e)}")
+        return {"success": False, "error": str(e), "processed": processed}
+
+
+@celery.task
+def purge_outbox(days: int = 7) -> Dict[str, Any]:
+    """Удаление доставленных событий старше указанного количества дней"""
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = OutboxEvent.query.filter(
+            OutboxEvent.status == OutboxStatus.SENT.value,
+            OutboxEvent.processed_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        return {"success": True, "deleted": deleted}
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка очистки outbox: {str(e)}")
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,34 @@
+import logging
+from typing import Dict, Any
+
+from app.core.celery import celery
+from app.db.session import db
+from app.services.reports import run_job, purge_expired_jobs
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task
+def run_report(job_id: int) -> Dict[str, Any]:
+    """Построение отчета аналитики по заданию"""
+    try:
+        result = run_job(db.session, job_id)
+        return {"success": True, **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка выполнения задания отчета {job_id}: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+@celery.task
+def purge_report_jobs() -> Dict[str, Any]:
+    """Удаление заданий отчетов с истекшим сроком хранения"""
+    try:
+        deleted = purge_expired_jobs(db.session)
+        return {"success": True, "deleted": deleted}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка очистки заданий отчетов: {str(e)}")
+        return {"success": False, "error": str(e)}
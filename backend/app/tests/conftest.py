@@ -1,30 +1,29 @@
 import pytest
 from flask_jwt_extended import create_access_token
 import os
-import tempfile
 import sys
 
-# Добавляем путь проекта в PYTHONPATH
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+# Добавляем каталог backend в PYTHONPATH (модули приложения импортируются как app.*)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from backend.app.main import create_app
-from backend.app.core.extensions import db as _db
-from backend.app.models import User, UserRole, Category, Supplier, Product
+# Переменные окружения задаются до импорта приложения: app.main создает
+# приложение при импорте, а адрес БД читается в create_app. Тесты создают и
+# удаляют таблицы, поэтому рабочий DATABASE_URL не используется: по умолчанию
+# SQLite в памяти, для прогона на PostgreSQL - TEST_DATABASE_URL
+os.environ["ENVIRONMENT"] = "test"
+os.environ["FLASK_DEBUG"] = "1"
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", "sqlite://")
+
+from app.main import create_app
+from app.core.extensions import db as _db
+from app.models import User, UserRole, Category, Supplier, Product
 
 
 @pytest.fixture(scope="session")
 def app():
     """Создание экземпляра приложения Flask для тестирования."""
-    # Устанавливаем переменные окружения для тестирования
-    os.environ["ENVIRONMENT"] = "test"
-    os.environ["FLASK_DEBUG"] = "1"
-    
-    # Создаем экземпляр приложения
     app = create_app()
     
-    # Настройка тестовой базы данных
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
-    
     with app.app_context():
         _db.create_all()
         yield app
@@ -1,26 +1,48 @@
 """
 Тесты для API аналитики
 """
+import json
+import os
 import pytest
-from flask import Flask
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
 from flask_jwt_extended import create_access_token
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-from ..core.config import TestSettings
-from ..models.user import User
-from ..models.inventory import Product, Category
-from ..models.order import Order, OrderItem
-from ..db.session import db, init_db
-from ..core.security import get_password_hash
+from app.models.user import User
+from app.models.inventory import Product, Category, Supplier, InventoryLog
+from app.models.order import Order, OrderItem
+from app.db.session import db
+from app.core.security import get_password_hash
+from app.services.sales_rollup import rebuild_sales_rollup
+from app.services.top_products import top_products_cache
+from app.services.analytics_cache import analytics_cache, ORDERS
+from app.services.order_archive import archive_closed_orders
+from app.services.reports import create_job, run_job, cancel_job
+from app.models.analytics import JobStatus, DemandForecast
+from app.services.parquet_export import export_parquet_snapshot, get_export_root
+from app.services.abc_xyz import run_classification
+from app.services.inventory_metrics import refresh_inventory_metrics
+from app.services.inventory_valuation import apply_stock_change, get_valuation_summary
+from app.services.stock_health import refresh_stock_health
+from app.services.demand_series import (
+    DemandSeries, load_daily_demand, to_series, feature_frame, next_day_features, series_cache,
+    FEATURE_COLUMNS, HISTORY_DAYS
+)
+from app.services.ml_forecasting import InventoryForecaster, ModelBundle, restock_recommendations
+from app.services.demand_smoothing import smooth, update_states, smoothing_forecast
+from app.services.demand_forecasts import (
+    get_stored_forecast, get_stored_demand, purge_forecasts, forecast_headers
+)
 
 @pytest.fixture
-def app():
-    """Создание тестового приложения Flask"""
-    app = Flask(__name__)
-    app.config.from_object(TestSettings())
-    
-    # Инициализация базы данных
-    init_db(app)
+def app(app, db):
+    """Тестовое приложение с тестовыми данными (таблицы создает фикстура db из conftest)"""
+    # Кэш аналитики общий для процесса - сбрасываем результаты предыдущих тестов
+    analytics_cache.clear()
+    series_cache.clear()
     
     # Создание тестовых данных
     with app.app_context():
@@ -28,15 +50,15 @@ def app():
         user = User(
             email="test@example.com",
             password_hash=get_password_hash("password"),
-            first_name="Test",
-            last_name="User",
+            name="Test User",
             role="admin"
         )
         db.session.add(user)
         
-        # Создание тестовой категории
+        # Создание тестовой категории и поставщика
         category = Category(name="Test Category")
         db.session.add(category)
+        db.session.add(Supplier(name="Test Supplier"))
         
         # Создание тестовых товаров
         for i in range(3):
@@ -56,9 +78,11 @@ def app():
         # Создание тестовых заказов
         for i in range(5):
             order = Order(
+                order_number=f"ORD-TEST-{i+1}",
                 order_type="outgoing" if i % 2 == 0 else "incoming",
                 status="completed",
                 user_id=1,
+                supplier_id=1,
                 created_at=datetime.now() - timedelta(days=i*3)
             )
             db.session.add(order)
@@ -77,10 +101,6 @@ def app():
         db.session.commit()
     
     yield app
-    
-    # Очистка после тестов
-    with app.app_context():
-        db.drop_all()
 
 @pytest.fixture
 def client(app):
@@ -148,4 +168,572 @@ def test_get_dashboard_stats(app, client, auth_headers):
     assert "sales_prev_month" in response.json
     assert "inventory_stats" in response.json
     assert "total_inventory" in response.json["inventory_stats"]
-    assert "low_stock_items" in response.json["inventory_stats"] 
\ No newline at end of file
+    assert "low_stock_items" in response.json["inventory_stats"]
+
+def test_sales_trends_from_rollup(app, client, auth_headers):
+    """Тест чтения трендов продаж из дневной витрины"""
+    with app.app_context():
+        expected_total = sum(
+            order.total_amount for order in Order.query.filter(
+                Order.order_type == "outgoing",
+                Order.status.in_(["completed", "processing"])
+            ).all()
+        )
+        rows = rebuild_sales_rollup(db.session)
+        assert rows > 0
+    
+    response = client.get("/api/analytics/sales-trends?period=30", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert len(response.json) == 31
+    assert sum(day["total_sales"] for day in response.json) == pytest.approx(expected_total)
+
+def test_get_top_products_pagination(app, client, auth_headers):
+    """Тест пагинации топ продуктов"""
+    top_products_cache.clear()
+    
+    response = client.get("/api/analytics/top-products?period=30", headers=auth_headers)
+    assert response.status_code == 200
+    full = response.json
+    assert [p["revenue"] for p in full] == sorted((p["revenue"] for p in full), reverse=True)
+    
+    response = client.get("/api/analytics/top-products?period=30&limit=1&offset=1", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json == full[1:2]
+
+def test_category_distribution_weighting(app, client, auth_headers):
+    """Тест распределения по категориям с количеством и стоимостью запаса"""
+    analytics_cache.clear()
+    
+    response = client.get("/api/analytics/category-distribution", headers=auth_headers)
+    assert response.status_code == 200
+    category = response.json[0]
+    assert category["value"] == 3
+    assert category["total_units"] == 100 + 90 + 80
+    assert category["total_value"] == pytest.approx(10.99 * 100 + 11.99 * 90 + 12.99 * 80)
+    
+    # Повторный запрос с тем же ETag возвращает 304
+    response = client.get(
+        "/api/analytics/category-distribution",
+        headers={**auth_headers, "If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+    
+    response = client.get("/api/analytics/category-distribution?low_stock=true", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json == []
+
+def test_sales_trends_granularity(app, client, auth_headers):
+    """Тест трендов продаж с гранулярностью и часовым поясом"""
+    response = client.get("/api/analytics/sales-trends?period=90&granularity=month", headers=auth_headers)
+    assert response.status_code == 200
+    assert 3 <= len(response.json) <= 4
+    assert len(response.json[0]["date"]) == len("2024-01")
+    
+    response = client.get(
+        "/api/analytics/sales-trends?period=2&granularity=hour&tz=Europe/Moscow",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert 48 <= len(response.json) <= 49
+    
+    response = client.get("/api/analytics/sales-trends?granularity=minute", headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.get("/api/analytics/sales-trends?tz=Mars/Olympus", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_sales_trends_downsampling(app, client, auth_headers):
+    """Тест прореживания длинного ряда трендов продаж"""
+    response = client.get("/api/analytics/sales-trends?period=730", headers=auth_headers)
+    full = response.json
+    
+    response = client.get("/api/analytics/sales-trends?period=730&max_points=50", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json) == 50
+    assert response.json[0] == full[0]
+    assert response.json[-1] == full[-1]
+    
+    response = client.get(
+        "/api/analytics/sales-trends?period=730&max_points=50&downsample=minmax",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert len(response.json) <= 50
+    assert max(p["total_sales"] for p in response.json) == max(p["total_sales"] for p in full)
+
+def test_analytics_cache_invalidation(app, client, auth_headers):
+    """Тест кэширования аналитики и инвалидации при изменении товаров"""
+    analytics_cache.clear()
+    
+    response = client.get("/api/analytics/category-distribution", headers=auth_headers)
+    assert response.headers["X-Cache"] == "MISS"
+    units = response.json[0]["total_units"]
+    
+    response = client.get("/api/analytics/category-distribution", headers=auth_headers)
+    assert response.headers["X-Cache"] == "HIT"
+    
+    # Изменение товара после коммита сбрасывает зависящие от товаров записи
+    with app.app_context():
+        product = Product.query.first()
+        product.quantity += 10
+        db.session.commit()
+    
+    response = client.get("/api/analytics/category-distribution", headers=auth_headers)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json[0]["total_units"] == units + 10
+    
+    stats = analytics_cache.stats()
+    assert stats["backend"] == "memory"
+    assert stats["local"]["hits"] >= 1
+    
+    # Изменения запросами Core (пересчет витрины, архивация) тоже инвалидируют кэш
+    client.get("/api/analytics/sales-trends", headers=auth_headers)
+    response = client.get("/api/analytics/sales-trends", headers=auth_headers)
+    assert response.headers["X-Cache"] == "HIT"
+    
+    with app.app_context():
+        rebuild_sales_rollup(db.session)
+    
+    response = client.get("/api/analytics/sales-trends", headers=auth_headers)
+    assert response.headers["X-Cache"] == "MISS"
+    
+    with app.app_context():
+        order = Order.query.first()
+        order.created_at = datetime.utcnow() - timedelta(days=400)
+        db.session.commit()
+        version = analytics_cache.versions([ORDERS])[0]
+        assert archive_closed_orders(db.session, older_than_days=365)["archived"] == 1
+        assert analytics_cache.versions([ORDERS])[0] > version
+
+def test_report_job_lifecycle(app):
+    """Тест выполнения и отмены фонового задания отчета"""
+    with app.app_context():
+        job = create_job(db.session, "sales_trends", {"period": 365, "max_points": 20}, user_id=1)
+        assert job.status == JobStatus.PENDING.value
+        
+        result = run_job(db.session, job.id)
+        assert result["status"] == JobStatus.COMPLETED.value
+        
+        db.session.refresh(job)
+        assert job.progress == 100
+        assert len(job.result) == 20
+        assert job.expires_at is not None
+        assert job.to_dict(include_result=True)["result"] == job.result
+        
+        # Отмененное до запуска задание не выполняется
+        cancelled = create_job(db.session, "dashboard_stats", None, user_id=1)
+        assert cancel_job(db.session, cancelled)
+        assert run_job(db.session, cancelled.id)["status"] == JobStatus.CANCELLED.value
+        assert not cancel_job(db.session, cancelled)
+        
+        with pytest.raises(ValueError):
+            create_job(db.session, "unknown", {}, user_id=1)
+
+def test_report_job_api_errors(app, client, auth_headers):
+    """Тест кодов ответа API заданий отчетов"""
+    response = client.get("/api/analytics/reports/999", headers=auth_headers)
+    assert response.status_code == 404
+    
+    response = client.post("/api/analytics/reports", json={"type": "unknown"}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    # Результат с истекшим сроком хранения
+    with app.app_context():
+        job = create_job(db.session, "dashboard_stats", None, user_id=1)
+        job.expires_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+        job_id = job.id
+    
+    response = client.get(f"/api/analytics/reports/{job_id}", headers=auth_headers)
+    assert response.status_code == 410
+
+def test_parquet_export_incremental(app, tmp_path, monkeypatch):
+    """Тест инкрементальной выгрузки в Parquet"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    app.root_path = str(tmp_path)
+    # Тестовые строки только что созданы: без запаса они выгружаются сразу
+    monkeypatch.setitem(app.config, "PARQUET_EXPORT_SAFETY_MINUTES", 0)
+    
+    with app.app_context():
+        manifest = export_parquet_snapshot(db.session, batch_size=2)
+        assert manifest["rows"]["orders"] == 5
+        assert manifest["rows"]["order_items"] == 10
+        assert manifest["rows"]["products"] == 3
+        
+        orders = pq.read_table(f"{get_export_root()}/orders")
+        assert orders.num_rows == 5
+        
+        # Повторный запуск дописывает только новые позиции, а раздел нового заказа перезаписывается
+        order = Order(order_number="ORD-TEST-6", order_type="outgoing", status="completed", user_id=1, supplier_id=1)
+        db.session.add(order)
+        db.session.commit()
+        
+        manifest = export_parquet_snapshot(db.session)
+        assert manifest["incremental"]
+        assert manifest["rows"]["order_items"] == 0
+        assert manifest["rewritten_partitions"]["orders"] == [order.created_at.strftime("%Y-%m")]
+        orders = pq.read_table(f"{get_export_root()}/orders").to_pydict()
+        assert sorted(orders["id"]) == sorted(set(orders["id"]))
+        assert len(orders["id"]) == 6
+        
+        # Изменение старого заказа перезаписывает его раздел без дублей
+        old_order = Order.query.order_by(Order.created_at).first()
+        old_order.status = "cancelled"
+        db.session.commit()
+        
+        manifest = export_parquet_snapshot(db.session)
+        assert manifest["rewritten_partitions"]["orders"] == [old_order.created_at.strftime("%Y-%m")]
+        orders = pq.read_table(f"{get_export_root()}/orders").to_pydict()
+        assert len(orders["id"]) == 6
+        statuses = dict(zip(orders["id"], orders["status"]))
+        assert statuses[old_order.id] == "cancelled"
+        
+        # Свежие строки (возможно, из еще не зафиксированных транзакций) ждут следующего запуска
+        db.session.add(OrderItem(order_id=order.id, product_id=1, quantity=1, unit_price=10.0))
+        db.session.add(InventoryLog(product_id=1, user_id=1, quantity_change=-1, order_id=order.id))
+        db.session.commit()
+        
+        monkeypatch.setitem(app.config, "PARQUET_EXPORT_SAFETY_MINUTES", 10)
+        manifest = export_parquet_snapshot(db.session)
+        assert manifest["rows"]["order_items"] == 0
+        assert manifest["rows"]["inventory_logs"] == 0
+        
+        monkeypatch.setitem(app.config, "PARQUET_EXPORT_SAFETY_MINUTES", 0)
+        manifest = export_parquet_snapshot(db.session)
+        assert manifest["rows"]["order_items"] == 1
+        assert manifest["rows"]["inventory_logs"] == 1
+        assert manifest["schema_changed"] == []
+        
+        # Изменение состава колонок перевыгружает таблицу целиком
+        state_path = os.path.join(get_export_root(), "_state.json")
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        state["schemas"]["inventory_logs"].remove("order_id")
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        
+        manifest = export_parquet_snapshot(db.session)
+        assert manifest["schema_changed"] == ["inventory_logs"]
+        assert manifest["rewritten_partitions"]["inventory_logs"] is None
+        assert manifest["rows"]["inventory_logs"] == 1
+        logs = pq.read_table(f"{get_export_root()}/inventory_logs").to_pydict()
+        assert logs["order_id"] == [order.id]
+        assert len(pq.read_table(f"{get_export_root()}/order_items").to_pydict()["id"]) == 11
+
+def test_abc_xyz_classification(app, client, auth_headers):
+    """Тест ABC/XYZ-классификации"""
+    with app.app_context():
+        result = run_classification(db.session, weeks=26)
+        assert result["products"] == 3
+    
+    response = client.get("/api/analytics/abc-xyz", headers=auth_headers)
+    assert response.status_code == 200
+    items = {item["product_id"]: item for item in response.json["items"]}
+    
+    # Товары 1 и 2 дают всю выручку, товар 3 не продавался
+    assert items[1]["abc_class"] == "A"
+    assert items[2]["abc_class"] == "A"
+    assert items[3]["abc_class"] == "C"
+    assert items[3]["xyz_class"] == "Z"
+    assert items[3]["demand_cv"] is None
+    assert sum(response.json["matrix"].values()) == 3
+    
+    # Фильтр по классу
+    response = client.get("/api/analytics/abc-xyz?abc=C", headers=auth_headers)
+    assert [item["product_id"] for item in response.json["items"]] == [3]
+    
+    response = client.get("/api/analytics/abc-xyz?abc=D", headers=auth_headers)
+    assert response.status_code == 400
+    assert "ABC" in response.json["message"]
+    
+    response = client.get("/api/analytics/abc-xyz?xyz=Q", headers=auth_headers)
+    assert response.status_code == 400
+    
+    # Некорректное окно пересчета отклоняется до постановки задачи
+    response = client.post("/api/analytics/abc-xyz/recalculate", json={"weeks": 0}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_inventory_metrics_cursor_pagination(app, client, auth_headers):
+    """Тест показателей оборачиваемости и курсорной пагинации"""
+    with app.app_context():
+        refresh_inventory_metrics(db.session, windows=(30,))
+    
+    # Сортировка по дням запаса: пустые значения (нет продаж) в конце
+    seen = []
+    cursor = None
+    while True:
+        params = "scope=product&window=30&sort=days_of_supply&order=asc&limit=1"
+        if cursor:
+            params += f"&cursor={cursor}"
+        response = client.get(f"/api/analytics/inventory-metrics?{params}", headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend(response.json["items"])
+        cursor = response.json["next_cursor"]
+        if not cursor:
+            break
+    
+    assert [item["id"] for item in seen] == [2, 1, 3]
+    # Товар 1: остаток 100, продано 15 за 30 дней
+    assert seen[1]["days_of_supply"] == 200.0
+    assert seen[1]["units_sold"] == 15.0
+    assert seen[2]["days_of_supply"] is None
+    
+    # Категория: показатели считаются по суммам товаров
+    response = client.get("/api/analytics/inventory-metrics?scope=category&window=30", headers=auth_headers)
+    category = response.json["items"][0]
+    assert category["units_sold"] == 30.0
+    assert category["on_hand"] == 270.0
+    
+    response = client.get("/api/analytics/inventory-metrics?window=30&sort=price", headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.get("/api/analytics/inventory-metrics?window=7", headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.get("/api/analytics/inventory-metrics?window=30&order=up", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_inventory_valuation_fifo_and_average(app, client, auth_headers):
+    """Тест инкрементальной оценки запасов по FIFO и средневзвешенной себестоимости"""
+    with app.app_context():
+        product = Product.query.get(1)
+        
+        # Начальный остаток 100 ед. по цене товара 10.99 и поступление 10 ед. по 5.0
+        old_quantity = product.quantity
+        product.quantity += 10
+        apply_stock_change(db.session, product, old_quantity, source="test", unit_cost=5.0)
+        
+        # Отгрузка 105 ед.: FIFO закрывает начальный слой и 5 ед. новой партии
+        old_quantity = product.quantity
+        product.quantity -= 105
+        apply_stock_change(db.session, product, old_quantity, source="test")
+        db.session.commit()
+        
+        summary = get_valuation_summary(db.session)
+        assert summary["quantity"] == 5
+        assert summary["fifo_value"] == 25.0
+        assert summary["weighted_average_value"] == round(5 * (100 * 10.99 + 10 * 5.0) / 110, 2)
+    
+    response = client.get("/api/analytics/valuation?by_category=true", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json["fifo_value"] == 25.0
+    assert response.json["categories"][0]["quantity"] == 5
+
+def test_stock_health_dead_and_slow(app, client, auth_headers):
+    """Тест поиска неликвидов и медленно оборачиваемых товаров"""
+    with app.app_context():
+        # Товар 3 не продавался и заведен 200 дней назад
+        product = Product.query.get(3)
+        product.created_at = datetime.utcnow() - timedelta(days=200)
+        db.session.commit()
+        
+        # Покрытие: товар 1 - около 19.7 мес., товар 2 - около 17.7 мес.
+        result = refresh_stock_health(db.session, dead_days=90, slow_months=18)
+        assert result["statuses"] == {"dead": 1, "slow": 1, "healthy": 1}
+    
+    response = client.get("/api/analytics/stock-health", headers=auth_headers)
+    assert response.status_code == 200
+    assert {item["product_id"]: item["status"] for item in response.json["items"]} == {3: "dead", 1: "slow"}
+    assert response.json["summary"]["dead"]["products"] == 1
+    
+    response = client.get("/api/analytics/stock-health?status=dead", headers=auth_headers)
+    item = response.json["items"][0]
+    assert item["product_id"] == 3
+    assert item["last_outbound_at"] is None
+    assert item["coverage_months"] is None
+    assert item["days_since_outbound"] > 90
+    
+    response = client.get("/api/analytics/stock-health?status=unknown", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_forecast_features_batch(app):
+    """Тест пакетного построения признаков по календарным рядам спроса"""
+    with app.app_context():
+        daily = load_daily_demand(db.session, datetime.now() - timedelta(days=90))
+        # Продажи (исходящие заказы) товаров 1 и 2, строки одного дня свернуты
+        assert set(daily["product_id"]) == {1, 2}
+        assert daily["quantity"].sum() == 30
+        
+        # Ряд товара без продаж - нули по всему календарю, повторный запрос из кэша
+        series = series_cache.get(db.session, [3, 1], days=60)
+        assert series.values.shape == (2, 60)
+        assert not series.values[0].any()
+        assert series.values[1].sum() == 15
+    
+    # Товар 1: продажи в дни 0 и 40 окна из 45 дней
+    dates = pd.date_range("2026-01-01", periods=45, freq="D")
+    daily = pd.DataFrame({
+        "product_id": [1, 1],
+        "date": [dates[0], dates[40]],
+        "quantity": [5.0, 3.0]
+    })
+    series = to_series(daily, dates, [1, 2])
+    features = feature_frame(series)
+    
+    # Строка на товар и день с полной историей, дни без продаж - нули
+    assert len(features) == 2 * (45 - HISTORY_DAYS)
+    assert list(features.columns[-len(FEATURE_COLUMNS):]) == FEATURE_COLUMNS
+    product = features[features["product_id"] == 1].set_index("date")
+    assert product.loc[dates[30], "lag_30"] == 5.0
+    assert product.loc[dates[41], "lag_1"] == 3.0
+    assert product.loc[dates[41], "rolling_mean_7"] == 3.0 / 7
+    
+    # Признаки следующего дня совпадают с признаками обучающей выборки
+    expected = product.loc[dates[44], FEATURE_COLUMNS].to_numpy(dtype=float)
+    assert next_day_features(series.values[:1, :44], dates[44])[0] == pytest.approx(expected)
+
+
+def test_forecast_batch_matches_single_product():
+    """Тест пакетного рекурсивного прогноза и рекомендаций по пополнению"""
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2026-01-01", periods=60, freq="D")
+    series = DemandSeries(
+        product_ids=np.array([1, 2, 3]),
+        dates=dates,
+        values=rng.poisson([[2.0], [5.0], [0.5]], size=(3, 60)).astype(float)
+    )
+    features = feature_frame(series)
+    
+    scaler = StandardScaler()
+    model = RandomForestRegressor(n_estimators=10, random_state=0)
+    model.fit(
+        scaler.fit_transform(features[FEATURE_COLUMNS].to_numpy(dtype=float)),
+        features["quantity"].to_numpy(dtype=float)
+    )
+    forecaster = InventoryForecaster()
+    forecaster.bundle = ModelBundle(model=model, scaler=scaler, version="test")
+    
+    # Один вызов модели на шаг для всех товаров дает те же прогнозы, что и по товару
+    future, predictions = forecaster._forecast(series, 14)
+    assert predictions.shape == (3, 14)
+    assert future[0] == dates[-1] + timedelta(days=1)
+    for row in range(3):
+        single = DemandSeries(series.product_ids[row:row + 1], dates, series.values[row:row + 1])
+        assert (forecaster._forecast(single, 14)[1][0] == predictions[row]).all()
+    
+    # Порог достигается только у товара 1: (20 - 10) / 2 = 5 дней
+    products = [(1, "A", 20, 10), (2, "B", 500, 10), (3, "C", 5, 1), (4, "D", 1, 0)]
+    demand = pd.Series([2.0, 5.0, 0.0], index=[1, 2, 3])
+    recommendations = restock_recommendations(products, demand, horizon=14)
+    assert [item["product_id"] for item in recommendations] == [1]
+    assert recommendations[0]["days_until_threshold"] == 5.0
+    assert recommendations[0]["recommended_order_quantity"] == 40
+
+
+def test_stored_forecasts(app, client, auth_headers):
+    """Тест чтения сохраненных прогнозов и удаления прогнозов прежних версий"""
+    generated_at = datetime.utcnow()
+    with app.app_context():
+        for version, quantity in (("old", 1.0), ("v1", 4.0)):
+            for offset in range(14):
+                db.session.add(DemandForecast(
+                    product_id=1,
+                    forecast_date=date.today() + timedelta(days=offset),
+                    model_version=version,
+                    predicted_quantity=quantity,
+                    generated_at=generated_at
+                ))
+        db.session.commit()
+        
+        # Прогноз товара 1: строки версии начиная с сегодняшнего дня
+        forecasts, stored_at = get_stored_forecast(db.session, 1, "v1", days=7)
+        assert len(forecasts) == 7
+        assert forecasts[0] == {"date": date.today().isoformat(), "predicted_quantity": 4}
+        assert stored_at == generated_at
+        
+        # Товар без продаж получает пустой прогноз, версия без прогнозов - None
+        assert get_stored_forecast(db.session, 2, "v1", days=7) == ([], generated_at)
+        assert get_stored_forecast(db.session, 1, "v2", days=7) is None
+        
+        # Рекомендации: (100 - 10) / 4 = 22.5 дня - за пределами горизонта 14 дней
+        products, demand, _ = get_stored_demand(db.session, "v1", horizon=14)
+        assert [row[0] for row in products] == [1]
+        assert demand[1] == 4.0
+        assert restock_recommendations(products, demand, horizon=14) == []
+        
+        # Обучение новой версии удаляет прогнозы остальных версий
+        assert purge_forecasts(db.session, keep_version="v1") == 14
+        db.session.commit()
+        assert get_stored_forecast(db.session, 1, "old", days=7) is None
+        
+        headers = forecast_headers("v1", generated_at - timedelta(days=2))
+        assert headers["X-Forecast-Source"] == "stored"
+        assert headers["X-Forecast-Stale"] == "true"
+
+
+def test_model_bundle_hot_swap(app, tmp_path):
+    """Тест атомарной записи модели и ее подхвата другим процессом"""
+    with app.app_context():
+        # Обучение - служебное задание, через API отчетов не создается
+        with pytest.raises(ValueError):
+            create_job(db.session, "train_model", {}, 1)
+        job = create_job(db.session, "train_model", {}, 1, internal=True)
+        assert job.job_type == "train_model"
+    
+    X = np.random.default_rng(0).random((50, len(FEATURE_COLUMNS)))
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(scaler.transform(X), X[:, 0])
+    
+    writer, reader = InventoryForecaster(), InventoryForecaster()
+    for forecaster in (writer, reader):
+        forecaster.bundle_path = str(tmp_path / "bundle.joblib")
+    assert not reader.refresh()
+    
+    writer._save_bundle(ModelBundle(model=model, scaler=scaler, version="v2"))
+    assert list(tmp_path.iterdir()) == [tmp_path / "bundle.joblib"]
+    
+    # Второй экземпляр замечает новый файл и заменяет модель целиком
+    assert reader.refresh()
+    assert reader.model_version == "v2"
+    assert reader.model.predict(scaler.transform(X[:1])) == pytest.approx(model.predict(scaler.transform(X[:1])))
+    assert not reader.refresh()
+
+
+def test_incremental_smoothing_update(app):
+    """Тест инкрементального обновления состояний сглаживания спроса"""
+    # Понедельник - среда; у товара 2 уже учтены дни до вторника включительно
+    dates = pd.date_range("2026-01-05", periods=3, freq="D")
+    level, seasonal, observations = smooth(
+        level=np.array([0.0, 10.0]),
+        seasonal=np.zeros((2, 7)),
+        observations=np.array([0, 5]),
+        watermarks=np.array(["NaT", "2026-01-06"], dtype="datetime64[D]"),
+        values=np.array([[4.0, 4.0, 4.0], [0.0, 0.0, 0.0]]),
+        dates=dates,
+        alpha=0.5,
+        gamma=0.1
+    )
+    # Новый товар инициализируется первым днем, товар 2 учитывает только среду
+    assert level == pytest.approx([4.0, 5.0])
+    assert observations.tolist() == [3, 6]
+    assert seasonal[1, 2] == pytest.approx(-0.5)
+    assert not seasonal[0].any()
+    
+    with app.app_context():
+        result = update_states(db.session)
+        assert result["products"] == 2
+        assert result["days"] == 90
+        
+        # Повторное обновление в тот же день не читает уже учтенные дни
+        assert update_states(db.session)["days"] == 0
+        assert update_states(db.session, rebuild=True)["days"] == 90
+        
+        forecast = smoothing_forecast(db.session, [1, 3], pd.date_range(date.today(), periods=7, freq="D"))
+        assert (forecast[0] >= 0).all()
+        assert np.isnan(forecast[1]).all()
+
+def test_train_model_api_errors(app, client, auth_headers, monkeypatch):
+    """Тест кодов ответа запуска обучения модели"""
+    monkeypatch.setattr("app.api.analytics.is_training", lambda: False)
+    
+    response = client.post("/api/analytics/train-model", json={"product_id": "abc"}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.post("/api/analytics/train-model", json={"product_id": 999}, headers=auth_headers)
+    assert response.status_code == 404
+    
+    # Повторный запуск во время обучения
+    monkeypatch.setattr("app.api.analytics.is_training", lambda: True)
+    response = client.post("/api/analytics/train-model", json={}, headers=auth_headers)
+    assert response.status_code == 409
@@ -2,47 +2,36 @@
 Тесты для API инвентаря
 """
 import pytest
-from flask import Flask
+from datetime import datetime, timedelta
 from flask_jwt_extended import create_access_token
 
-from ..core.config import TestSettings
-from ..models.user import User
-from ..models.inventory import Product, Category
-from ..db.session import db, init_db
-from ..core.security import get_password_hash
+from app.models.user import User
+from app.models.inventory import Product, Category, Supplier, InventoryLog
+from app.models.order import Order, OrderItem
+from app.db.session import db
+from app.core.security import get_password_hash
 
 @pytest.fixture
-def app():
-    """Создание тестового приложения Flask"""
-    app = Flask(__name__)
-    app.config.from_object(TestSettings())
-    
-    # Инициализация базы данных
-    init_db(app)
-    
-    # Создание тестовых данных
+def app(app, db):
+    """Тестовое приложение с тестовыми данными (таблицы создает фикстура db из conftest)"""
     with app.app_context():
         # Создание тестового пользователя
         user = User(
             email="test@example.com",
             password_hash=get_password_hash("password"),
-            first_name="Test",
-            last_name="User",
+            name="Test User",
             role="admin"
         )
         db.session.add(user)
         
-        # Создание тестовой категории
+        # Создание тестовой категории и поставщика
         category = Category(name="Test Category")
         db.session.add(category)
+        db.session.add(Supplier(name="Test Supplier"))
         
         db.session.commit()
     
     yield app
-    
-    # Очистка после тестов
-    with app.app_context():
-        db.drop_all()
 
 @pytest.fixture
 def client(app):
@@ -178,4 +167,92 @@ def test_delete_inventory_item(app, client, auth_headers):
     # Проверка в базе данных
     with app.app_context():
         deleted_item = db.query(Product).filter_by(id=item_id).first()
-        assert deleted_item is None 
\ No newline at end of file
+        assert deleted_item is None 
+def test_stock_history_downsampling(app, client, auth_headers):
+    """Тест истории остатков с прореживанием"""
+    with app.app_context():
+        category = Category.query.first()
+        user = User.query.first()
+        
+        item = Product(
+            name="History Product",
+            sku="HIST-1",
+            price=1.0,
+            quantity=0,
+            category_id=category.id
+        )
+        db.session.add(item)
+        db.session.flush()
+        
+        start = datetime.utcnow() - timedelta(days=10)
+        for i in range(200):
+            change = 5 if i % 2 == 0 else -3
+            item.quantity += change
+            db.session.add(InventoryLog(
+                product_id=item.id,
+                user_id=user.id,
+                quantity_change=change,
+                created_at=start + timedelta(hours=i)
+            ))
+        db.session.commit()
+        item_id = item.id
+        final_quantity = item.quantity
+    
+    response = client.get(f"/api/inventory/products/{item_id}/stock-history", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json) == 200
+    assert response.json[0]["quantity"] == 5
+    assert response.json[-1]["quantity"] == final_quantity
+    
+    response = client.get(
+        f"/api/inventory/products/{item_id}/stock-history?max_points=20",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert len(response.json) == 20
+    assert response.json[-1]["quantity"] == final_quantity
+
+
+def test_stock_history_includes_shipped_orders(app, client, auth_headers):
+    """Тест истории остатков с отгрузкой и отменой заказа"""
+    with app.app_context():
+        category = Category.query.first()
+        user = User.query.first()
+        
+        item = Product(
+            name="Shipped Product",
+            sku="SHIP-1",
+            price=1.0,
+            quantity=10,
+            category_id=category.id
+        )
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(InventoryLog(
+            product_id=item.id,
+            user_id=user.id,
+            quantity_change=10,
+            created_at=datetime.utcnow() - timedelta(days=1)
+        ))
+        
+        order = Order(
+            order_number="ORD-SHIP-1", order_type="outgoing", status="processing", user_id=user.id, supplier_id=1
+        )
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=item.id, quantity=4, unit_price=1.0))
+        db.session.commit()
+        item_id, order_id = item.id, order.id
+    
+    response = client.put(f"/api/orders/{order_id}/status", json={"status": "shipped"}, headers=auth_headers)
+    assert response.status_code == 200
+    
+    response = client.get(f"/api/inventory/products/{item_id}/stock-history", headers=auth_headers)
+    assert [point["quantity"] for point in response.json] == [10, 6]
+    
+    # Отмена отгруженного заказа возвращает товар
+    response = client.put(f"/api/orders/{order_id}/status", json={"status": "cancelled"}, headers=auth_headers)
+    assert response.status_code == 200
+    
+    response = client.get(f"/api/inventory/products/{item_id}/stock-history", headers=auth_headers)
+    assert [point["quantity"] for point in response.json] == [10, 6, 10]
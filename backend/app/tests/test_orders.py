@@ -1,42 +1,39 @@
 """
 Тесты для API заказов
 """
+import os
 import pytest
-from flask import Flask
-from flask_jwt_extended import create_access_token
-from datetime import datetime
+from flask_jwt_extended import create_access_token, create_refresh_token
+from datetime import datetime, timedelta
 
-from ..core.config import TestSettings
-from ..models.user import User
-from ..models.inventory import Product, Category
-from ..models.order import Order, OrderItem
-from ..db.session import db, init_db
-from ..core.security import get_password_hash
+from app.models.user import User
+from app.models.inventory import Product, Category, Supplier
+from app.models.order import Order, OrderItem, OrderFile
+from app.models.event import OutboxEvent
+from app.models.archive import ArchivedOrder
+from app.services.order_archive import archive_closed_orders
+from app.services.events import ORDER_STATUS_CHANGED, STOCK_CHANGED, REPORT_FINISHED
+from app.services.event_stream import is_visible
+from app.db.session import db
+from app.core.security import get_password_hash
 
 @pytest.fixture
-def app():
-    """Создание тестового приложения Flask"""
-    app = Flask(__name__)
-    app.config.from_object(TestSettings())
-    
-    # Инициализация базы данных
-    init_db(app)
-    
-    # Создание тестовых данных
+def app(app, db):
+    """Тестовое приложение с тестовыми данными (таблицы создает фикстура db из conftest)"""
     with app.app_context():
         # Создание тестового пользователя
         user = User(
             email="test@example.com",
             password_hash=get_password_hash("password"),
-            first_name="Test",
-            last_name="User",
+            name="Test User",
             role="admin"
         )
         db.session.add(user)
         
-        # Создание тестовой категории
+        # Создание тестовой категории и поставщика
         category = Category(name="Test Category")
         db.session.add(category)
+        db.session.add(Supplier(name="Test Supplier"))
         
         # Создание тестового товара
         product = Product(
@@ -52,10 +49,6 @@ def app():
         db.session.commit()
     
     yield app
-    
-    # Очистка после тестов
-    with app.app_context():
-        db.drop_all()
 
 @pytest.fixture
 def client(app):
@@ -86,7 +79,7 @@ def test_create_order(app, client, auth_headers):
     }
     
     # Отправка запроса
-    response = client.post("/api/orders", json=data, headers=auth_headers)
+    response = client.post("/api/orders/", json=data, headers=auth_headers)
     
     # Проверка ответа
     assert response.status_code == 201
@@ -114,9 +107,11 @@ def test_get_orders(app, client, auth_headers):
         product = Product.query.first()
         
         order = Order(
+            order_number="ORD-LIST-1",
             order_type="outgoing",
             status="pending",
-            user_id=user.id
+            user_id=user.id,
+            supplier_id=1
         )
         db.session.add(order)
         db.session.commit()
@@ -131,7 +126,7 @@ def test_get_orders(app, client, auth_headers):
         db.session.commit()
     
     # Отправка запроса
-    response = client.get("/api/orders", headers=auth_headers)
+    response = client.get("/api/orders/", headers=auth_headers)
     
     # Проверка ответа
     assert response.status_code == 200
@@ -147,9 +142,11 @@ def test_update_order_status(app, client, auth_headers):
         product = Product.query.first()
         
         order = Order(
+            order_number="ORD-STATUS-1",
             order_type="outgoing",
             status="pending",
-            user_id=user.id
+            user_id=user.id,
+            supplier_id=1
         )
         db.session.add(order)
         db.session.commit()
@@ -179,4 +176,223 @@ def test_update_order_status(app, client, auth_headers):
     # Проверка в базе данных
     with app.app_context():
         updated_order = Order.query.filter_by(id=order_id).first()
-        assert updated_order.status == "completed" 
\ No newline at end of file
+        assert updated_order.status == "completed"
+
+def test_download_order_file(app, client, auth_headers):
+    """Тест скачивания файла заказа с поддержкой Range и ETag"""
+    content = b"%PDF-1.4 test document content"
+    
+    # Создание заказа с прикрепленным файлом
+    with app.app_context():
+        user = User.query.first()
+        
+        order = Order(
+            order_number="ORD-FILE-1",
+            order_type="outgoing",
+            status="pending",
+            user_id=user.id,
+            supplier_id=1
+        )
+        db.session.add(order)
+        db.session.commit()
+        
+        upload_dir = os.path.join(app.root_path, 'uploads', 'orders', str(order.id))
+        os.makedirs(upload_dir, exist_ok=True)
+        with open(os.path.join(upload_dir, "stored_invoice.pdf"), "wb") as f:
+            f.write(content)
+        
+        order_file = OrderFile(
+            order_id=order.id,
+            filename="invoice.pdf",
+            file_path=os.path.join('uploads', 'orders', str(order.id), "stored_invoice.pdf"),
+            file_type="application/pdf"
+        )
+        db.session.add(order_file)
+        db.session.commit()
+        order_id = order.id
+        file_id = order_file.id
+    
+    url = f"/api/orders/{order_id}/files/{file_id}/download"
+    
+    # Полная загрузка
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.data == content
+    assert "invoice.pdf" in response.headers["Content-Disposition"]
+    etag = response.headers["ETag"]
+    
+    # Частичная загрузка
+    response = client.get(url, headers={**auth_headers, "Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.data == content[:4]
+    
+    # Повторный запрос с тем же ETag
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    
+    # Делегирование передачи nginx
+    app.config["USE_X_ACCEL_REDIRECT"] = True
+    try:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.data == b""
+        assert response.headers["X-Accel-Redirect"] == f"/protected/uploads/orders/{order_id}/stored_invoice.pdf"
+    finally:
+        app.config["USE_X_ACCEL_REDIRECT"] = False
+
+def test_update_order_status_records_outbox_event(app, client, auth_headers):
+    """Тест записи события об изменении статуса в outbox"""
+    with app.app_context():
+        user = User.query.first()
+        
+        order = Order(
+            order_number="ORD-EVENT-1",
+            order_type="outgoing",
+            status="pending",
+            user_id=user.id,
+            supplier_id=1
+        )
+        db.session.add(order)
+        db.session.commit()
+        order_id = order.id
+    
+    response = client.put(f"/api/orders/{order_id}/status", json={"status": "processing"}, headers=auth_headers)
+    assert response.status_code == 200
+    
+    with app.app_context():
+        event = OutboxEvent.query.filter_by(event_type=ORDER_STATUS_CHANGED, aggregate_id=order_id).first()
+        assert event is not None
+        assert event.status == "pending"
+        assert event.payload["old_status"] == "pending"
+        assert event.payload["status"] == "processing"
+
+def test_get_orders_by_product(app, client, auth_headers):
+    """Тест поиска заказов по товару и подсчета заказов по товарам"""
+    with app.app_context():
+        user = User.query.first()
+        product = Product.query.first()
+        
+        for i in range(3):
+            order = Order(
+                order_number=f"ORD-PRODUCT-{i}",
+                order_type="outgoing",
+                status="pending" if i < 2 else "cancelled",
+                user_id=user.id,
+                supplier_id=1
+            )
+            db.session.add(order)
+            db.session.commit()
+            
+            db.session.add(OrderItem(
+                order_id=order.id,
+                product_id=product.id,
+                quantity=i + 1,
+                unit_price=product.price
+            ))
+        db.session.commit()
+        product_id = product.id
+        sku = product.sku
+    
+    response = client.get(f"/api/orders/by-product?sku={sku}&status=pending&per_page=1", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json["product_id"] == product_id
+    assert response.json["total"] == 2
+    assert len(response.json["orders"]) == 1
+    
+    response = client.get(f"/api/orders/product-counts?product_ids={product_id},999", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json[str(product_id)] == 3
+    assert response.json["999"] == 0
+
+def test_archive_closed_orders(app, client, auth_headers):
+    """Тест переноса старых закрытых заказов в архив и чтения из архива"""
+    with app.app_context():
+        user = User.query.first()
+        product = Product.query.first()
+        
+        old_order = Order(
+            order_number="ORD-OLD-1",
+            order_type="outgoing",
+            status="cancelled",
+            user_id=user.id,
+            created_at=datetime.utcnow() - timedelta(days=400),
+            supplier_id=1
+        )
+        recent_order = Order(
+            order_number="ORD-RECENT-1",
+            order_type="outgoing",
+            status="cancelled",
+            user_id=user.id,
+            supplier_id=1
+        )
+        db.session.add_all([old_order, recent_order])
+        db.session.commit()
+        
+        db.session.add(OrderItem(
+            order_id=old_order.id,
+            product_id=product.id,
+            quantity=2,
+            unit_price=product.price,
+            product_name=product.name,
+            product_sku=product.sku
+        ))
+        db.session.commit()
+        old_order_id = old_order.id
+        product_id = product.id
+        
+        result = archive_closed_orders(db.session, older_than_days=365)
+        assert result["archived"] == 1
+        assert Order.query.get(old_order_id) is None
+        assert ArchivedOrder.query.get(old_order_id).items.count() == 1
+    
+    # Без фильтра по дате архив не читается
+    response = client.get("/api/orders/", headers=auth_headers)
+    assert [order["order_number"] for order in response.json] == ["ORD-RECENT-1"]
+    
+    # Фильтр, заходящий в архивный период, возвращает и архивные заказы
+    start_date = (datetime.utcnow() - timedelta(days=500)).strftime('%Y-%m-%d')
+    response = client.get(f"/api/orders/?start_date={start_date}", headers=auth_headers)
+    assert [order["order_number"] for order in response.json] == ["ORD-RECENT-1", "ORD-OLD-1"]
+    
+    # Фильтр только по дате окончания тоже заходит в архив
+    end_date = (datetime.utcnow() - timedelta(days=380)).strftime('%Y-%m-%d')
+    response = client.get(f"/api/orders/?end_date={end_date}", headers=auth_headers)
+    assert [order["order_number"] for order in response.json] == ["ORD-OLD-1"]
+    
+    response = client.get(f"/api/orders/by-product?product_id={product_id}&end_date={end_date}", headers=auth_headers)
+    assert response.json["total"] == 1
+    assert response.json["orders"][0]["archived"] is True
+    
+    # Архивный заказ доступен по id
+    response = client.get(f"/api/orders/{old_order_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json["archived"] is True
+
+
+def test_event_stream_rejects_refresh_token(app, client):
+    """Тест: поток событий не открывается по токену обновления"""
+    with app.app_context():
+        user = User.query.first()
+        refresh_token = create_refresh_token(identity=user.id)
+    
+    response = client.get(f"/api/events/stream?token={refresh_token}")
+    assert response.status_code == 401
+
+
+def test_event_stream_visibility_by_role():
+    """Тест: сотрудник получает события только своих заказов"""
+    own_order = {"event_type": ORDER_STATUS_CHANGED, "payload": {"user_id": 1}}
+    other_order = {"event_type": ORDER_STATUS_CHANGED, "payload": {"user_id": 2}}
+    stock = {"event_type": STOCK_CHANGED, "payload": {"product_id": 1}}
+    report = {"event_type": REPORT_FINISHED, "payload": {"user_id": 2}}
+    
+    assert is_visible(own_order, 1, "employee")
+    assert not is_visible(other_order, 1, "employee")
+    assert is_visible(stock, 1, "employee")
+    
+    assert is_visible(other_order, 1, "admin")
+    assert is_visible(other_order, 1, "owner")
+    
+    # Отчеты адресованы только автору независимо от роли
+    assert not is_visible(report, 1, "admin")
+    assert is_visible(report, 2, "employee")
@@ -0,0 +1,91 @@
+import os
+import logging
+from typing import Optional
+from urllib.parse import quote
+
+from flask import current_app, send_file, Response
+
+from app.core.errors import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Каталог загрузок относительно root_path приложения
+UPLOADS_DIR = "uploads"
+
+
+def get_upload_root() -> str:
+    """Абсолютный путь к каталогу загруженных файлов"""
+    return os.path.join(current_app.root_path, UPLOADS_DIR)
+
+
+def resolve_upload_path(relative_path: str) -> str:
+    """
+    Преобразование сохраненного пути файла в абсолютный путь.
+
+    Args:
+        relative_path: Путь относительно root_path приложения (как хранится в OrderFile.file_path).
+
+    Returns:
+        Абсолютный путь к файлу внутри каталога загрузок.
+
+    Raises:
+        NotFoundError: Если путь выходит за пределы каталога загрузок или файла нет на диске.
+    """
+    upload_root = os.path.realpath(get_upload_root())
+    full_path = os.path.realpath(os.path.join(current_app.root_path, relative_path))
+
+    # Защита от выхода за пределы каталога загрузок (../)
+    if os.path.commonpath([upload_root, full_path]) != upload_root:
+        logger.warning(f"Попытка доступа к файлу вне каталога загрузок: {relative_path}")
+        raise NotFoundError("Файл не найден")
+
+    if not os.path.isfile(full_path):
+        raise NotFoundError("Файл не найден")
+
+    return full_path
+
+
+def _content_disposition(filename: str) -> str:
+    """Заголовок Content-Disposition с поддержкой не-ASCII имен (RFC 6266)"""
+    ascii_name = filename.encode("ascii", "ignore").decode("ascii").replace('"', "") or "download"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def send_protected_file(relative_path: str, download_name: str, mimetype: Optional[str] = None) -> Response:
+    """
+    Отдача файла из каталога загрузок после проверки прав доступа.
+
+    Если включен USE_X_ACCEL_REDIRECT, тело ответа пустое, а передачу файла
+    выполняет nginx по внутреннему адресу (sendfile, Range и ETag на стороне nginx),
+    так что воркер Python не занят передачей. Иначе файл отдается напрямую
+    с поддержкой Range-запросов, ETag и If-None-Match.
+
+    Args:
+        relative_path: Путь относительно root_path приложения.
+        download_name: Имя файла для сохранения у клиента.
+        mimetype: MIME-тип файла.
+
+    Returns:
+        Ответ Flask.
+    """
+    full_path = resolve_upload_path(relative_path)
+    mimetype = mimetype or "application/octet-stream"
+
+    if current_app.config.get("USE_X_ACCEL_REDIRECT"):
+        internal_path = os.path.relpath(full_path, os.path.realpath(get_upload_root()))
+        prefix = current_app.config.get("X_ACCEL_REDIRECT_PREFIX", "/protected/uploads/")
+
+        response = current_app.response_class(status=200, mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(internal_path.replace(os.sep, "/"))
+        response.headers["Content-Disposition"] = _content_disposition(download_name)
+        return response
+
+    return send_file(
+        full_path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=True,
+        max_age=None  # Файлы доступны только после авторизации - без публичного кэширования
+    )
@@ -20,6 +20,10 @@ from backend.app.db.base import Base
 from backend.app.models.user import User
 from backend.app.models.inventory import Category, Supplier, Product, InventoryLog
 from backend.app.models.order import Order, OrderItem, OrderFile
+from backend.app.models.event import OutboxEvent
+from backend.app.models.archive import ArchivedOrder, ArchivedOrderItem, ArchivedOrderFile
+from backend.app.models.analytics import DailySales, AnalyticsJob, ProductClassification, InventoryMetric, StockHealth, DemandForecast, DemandSmoothingState
+from backend.app.models.valuation import CostLayer, ProductValuation
 
 # Это объект конфигурации Alembic, который предоставляет
 # доступ к значениям в используемом файле .ini.
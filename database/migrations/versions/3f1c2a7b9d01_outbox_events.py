@@ -0,0 +1,42 @@
+"""Таблица outbox для доменных событий
+
+Revision ID: 3f1c2a7b9d01
+Revises: 
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = '3f1c2a7b9d01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('aggregate_type', sa.String(length=50), nullable=False),
+        sa.Column('aggregate_id', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_event_type', 'outbox_events', ['event_type'])
+    op.create_index('ix_outbox_events_status_id', 'outbox_events', ['status', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_status_id', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_event_type', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,45 @@
+"""ABC/XYZ-классификация товаров
+
+Revision ID: 4c8e2f6a1d93
+Revises: d3b7a1e9c4f8
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = '4c8e2f6a1d93'
+down_revision = 'd3b7a1e9c4f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_classifications',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('abc_class', sa.String(length=1), nullable=False),
+        sa.Column('xyz_class', sa.String(length=1), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('revenue_share', sa.Float(), nullable=False),
+        sa.Column('cumulative_share', sa.Float(), nullable=False),
+        sa.Column('demand_mean', sa.Float(), nullable=False),
+        sa.Column('demand_std', sa.Float(), nullable=False),
+        sa.Column('demand_cv', sa.Float(), nullable=True),
+        sa.Column('periods', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id')
+    )
+    op.create_index('ix_product_classifications_classes', 'product_classifications', ['abc_class', 'xyz_class'])
+
+
+def downgrade():
+    op.drop_index('ix_product_classifications_classes', table_name='product_classifications')
+    op.drop_table('product_classifications')
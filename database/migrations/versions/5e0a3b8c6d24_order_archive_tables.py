@@ -0,0 +1,82 @@
+"""Архивные таблицы заказов
+
+Revision ID: 5e0a3b8c6d24
+Revises: c72d9e0b4f13
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = '5e0a3b8c6d24'
+down_revision = 'c72d9e0b4f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'archived_orders',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('order_number', sa.String(length=50), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('supplier_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('order_type', sa.String(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('shipping_address', sa.Text(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('expected_delivery_date', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_orders_order_number', 'archived_orders', ['order_number'])
+    op.create_index('ix_archived_orders_created_at', 'archived_orders', ['created_at'])
+
+    op.create_table(
+        'archived_order_items',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=True),
+        sa.Column('product_sku', sa.String(length=50), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['archived_orders.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_order_items_order_id', 'archived_order_items', ['order_id'])
+    op.create_index('ix_archived_order_items_product_order', 'archived_order_items', ['product_id', 'order_id'])
+
+    op.create_table(
+        'archived_order_files',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('file_path', sa.String(length=512), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=True),
+        sa.Column('upload_date', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['archived_orders.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_order_files_order_id', 'archived_order_files', ['order_id'])
+
+
+def downgrade():
+    op.drop_index('ix_archived_order_files_order_id', table_name='archived_order_files')
+    op.drop_table('archived_order_files')
+    op.drop_index('ix_archived_order_items_product_order', table_name='archived_order_items')
+    op.drop_index('ix_archived_order_items_order_id', table_name='archived_order_items')
+    op.drop_table('archived_order_items')
+    op.drop_index('ix_archived_orders_created_at', table_name='archived_orders')
+    op.drop_index('ix_archived_orders_order_number', table_name='archived_orders')
+    op.drop_table('archived_orders')
@@ -0,0 +1,43 @@
+"""Показатели оборачиваемости запасов
+
+Revision ID: 7d2a9c4e1b68
+Revises: 4c8e2f6a1d93
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = '7d2a9c4e1b68'
+down_revision = '4c8e2f6a1d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'inventory_metrics',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('window_days', sa.Integer(), nullable=False),
+        sa.Column('units_sold', sa.Float(), nullable=False),
+        sa.Column('units_received', sa.Float(), nullable=False),
+        sa.Column('on_hand', sa.Float(), nullable=False),
+        sa.Column('avg_inventory', sa.Float(), nullable=False),
+        sa.Column('turnover', sa.Float(), nullable=True),
+        sa.Column('days_of_supply', sa.Float(), nullable=True),
+        sa.Column('sell_through', sa.Float(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'window_days', 'entity_id', name='uq_inventory_metrics_scope_window_entity')
+    )
+
+
+def downgrade():
+    op.drop_table('inventory_metrics')
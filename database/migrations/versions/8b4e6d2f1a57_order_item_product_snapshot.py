@@ -0,0 +1,45 @@
+"""Снимок товара в позициях заказа
+
+Revision ID: 8b4e6d2f1a57
+Revises: 3f1c2a7b9d01
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = '8b4e6d2f1a57'
+down_revision = '3f1c2a7b9d01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('order_items', sa.Column('product_name', sa.String(length=255), nullable=True))
+    op.add_column('order_items', sa.Column('product_sku', sa.String(length=50), nullable=True))
+    op.add_column('order_items', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_order_items_category_id', 'order_items', 'categories', ['category_id'], ['id']
+    )
+
+    # Заполнение снимка для существующих позиций текущими данными товаров
+    op.execute(
+        """
+        UPDATE order_items
+        SET product_name = products.name,
+            product_sku = products.sku,
+            category_id = products.category_id
+        FROM products
+        WHERE order_items.product_id = products.id
+          AND order_items.product_name IS NULL
+        """
+    )
+
+
+def downgrade():
+    op.drop_constraint('fk_order_items_category_id', 'order_items', type_='foreignkey')
+    op.drop_column('order_items', 'category_id')
+    op.drop_column('order_items', 'product_sku')
+    op.drop_column('order_items', 'product_name')
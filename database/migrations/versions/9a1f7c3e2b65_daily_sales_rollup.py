@@ -0,0 +1,53 @@
+"""Дневная витрина продаж
+
+Revision ID: 9a1f7c3e2b65
+Revises: 5e0a3b8c6d24
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = '9a1f7c3e2b65'
+down_revision = '5e0a3b8c6d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_sales',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('order_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sales_date', 'order_type', 'status', name='uq_daily_sales_date_type_status')
+    )
+    op.create_index('ix_daily_sales_sales_date', 'daily_sales', ['sales_date'])
+
+    # Первичное заполнение витрины по существующим заказам (включая архив)
+    op.execute(
+        """
+        INSERT INTO daily_sales (sales_date, order_type, status, order_count, total_amount, created_at, updated_at)
+        SELECT DATE(created_at), order_type, status, COUNT(*), COALESCE(SUM(total_amount), 0),
+               CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM (
+            SELECT created_at, order_type, status, total_amount FROM orders
+            UNION ALL
+            SELECT created_at, order_type, status, total_amount FROM archived_orders
+        ) AS all_orders
+        GROUP BY DATE(created_at), order_type, status
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_daily_sales_sales_date', table_name='daily_sales')
+    op.drop_table('daily_sales')
@@ -0,0 +1,37 @@
+"""Сохраненные прогнозы спроса
+
+Revision ID: a6c4d9e2f157
+Revises: e8f3a6b2c915
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'a6c4d9e2f157'
+down_revision = 'e8f3a6b2c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'demand_forecasts',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('forecast_date', sa.Date(), nullable=False),
+        sa.Column('model_version', sa.String(length=64), nullable=False),
+        sa.Column('predicted_quantity', sa.Float(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('model_version', 'product_id', 'forecast_date', name='uq_demand_forecasts_version_product_date')
+    )
+
+
+def downgrade():
+    op.drop_table('demand_forecasts')
@@ -0,0 +1,67 @@
+"""Слои себестоимости и оценка запасов
+
+Revision ID: b5e1c8d3a274
+Revises: 7d2a9c4e1b68
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'b5e1c8d3a274'
+down_revision = '7d2a9c4e1b68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cost_layers',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('remaining_quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_cost', sa.Float(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('reference', sa.String(length=100), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cost_layers_product_received', 'cost_layers', ['product_id', 'received_at', 'id'])
+
+    op.create_table(
+        'product_valuations',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('avg_unit_cost', sa.Float(), nullable=False),
+        sa.Column('fifo_value', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id')
+    )
+
+    # Начальные остатки: один слой на товар по текущей цене (закупочные цены прошлых поступлений неизвестны)
+    op.execute(
+        "INSERT INTO cost_layers (created_at, updated_at, product_id, quantity, remaining_quantity, unit_cost, source, received_at) "
+        "SELECT CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, id, quantity, quantity, price, 'opening_balance', CURRENT_TIMESTAMP "
+        "FROM products WHERE quantity > 0"
+    )
+    op.execute(
+        "INSERT INTO product_valuations (created_at, updated_at, product_id, quantity, avg_unit_cost, fifo_value) "
+        "SELECT CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, id, quantity, price, quantity * price "
+        "FROM products"
+    )
+
+
+def downgrade():
+    op.drop_table('product_valuations')
+    op.drop_index('ix_cost_layers_product_received', table_name='cost_layers')
+    op.drop_table('cost_layers')
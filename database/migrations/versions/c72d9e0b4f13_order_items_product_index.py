@@ -0,0 +1,24 @@
+"""Обратный индекс order_items(product_id, order_id)
+
+Revision ID: c72d9e0b4f13
+Revises: 8b4e6d2f1a57
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'c72d9e0b4f13'
+down_revision = '8b4e6d2f1a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_order_items_product_order', 'order_items', ['product_id', 'order_id'])
+
+
+def downgrade():
+    op.drop_index('ix_order_items_product_order', table_name='order_items')
@@ -0,0 +1,26 @@
+"""Заказ в записях журнала остатков
+
+Revision ID: c9d3f1a6e842
+Revises: f2b7e5a9c381
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'c9d3f1a6e842'
+down_revision = 'f2b7e5a9c381'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('inventory_logs', sa.Column('order_id', sa.Integer(), nullable=True))
+    op.create_index('ix_inventory_logs_order_id', 'inventory_logs', ['order_id'])
+
+
+def downgrade():
+    op.drop_index('ix_inventory_logs_order_id', table_name='inventory_logs')
+    op.drop_column('inventory_logs', 'order_id')
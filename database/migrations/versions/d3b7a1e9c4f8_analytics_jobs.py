@@ -0,0 +1,46 @@
+"""Фоновые задания отчетов аналитики
+
+Revision ID: d3b7a1e9c4f8
+Revises: 9a1f7c3e2b65
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'd3b7a1e9c4f8'
+down_revision = '9a1f7c3e2b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analytics_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('celery_task_id', sa.String(length=155), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_analytics_jobs_user_created', 'analytics_jobs', ['user_id', 'created_at'])
+    op.create_index('ix_analytics_jobs_expires_at', 'analytics_jobs', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_analytics_jobs_expires_at', table_name='analytics_jobs')
+    op.drop_index('ix_analytics_jobs_user_created', table_name='analytics_jobs')
+    op.drop_table('analytics_jobs')
@@ -0,0 +1,44 @@
+"""Неликвидные и медленно оборачиваемые запасы
+
+Revision ID: e8f3a6b2c915
+Revises: b5e1c8d3a274
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'e8f3a6b2c915'
+down_revision = 'b5e1c8d3a274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stock_health',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('on_hand', sa.Integer(), nullable=False),
+        sa.Column('stock_value', sa.Float(), nullable=False),
+        sa.Column('last_outbound_at', sa.DateTime(), nullable=True),
+        sa.Column('last_movement_at', sa.DateTime(), nullable=True),
+        sa.Column('days_since_outbound', sa.Integer(), nullable=True),
+        sa.Column('monthly_demand', sa.Float(), nullable=False),
+        sa.Column('coverage_months', sa.Float(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id')
+    )
+    op.create_index('ix_stock_health_status_value', 'stock_health', ['status', 'stock_value'])
+
+
+def downgrade():
+    op.drop_index('ix_stock_health_status_value', table_name='stock_health')
+    op.drop_table('stock_health')
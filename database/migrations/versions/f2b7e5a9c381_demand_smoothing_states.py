@@ -0,0 +1,37 @@
+"""Состояния экспоненциального сглаживания спроса
+
+Revision ID: f2b7e5a9c381
+Revises: a6c4d9e2f157
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# идентификаторы ревизий, используемые Alembic
+revision = 'f2b7e5a9c381'
+down_revision = 'a6c4d9e2f157'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'demand_smoothing_states',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('level', sa.Float(), nullable=False),
+        sa.Column('seasonal', sa.JSON(), nullable=False),
+        sa.Column('observations', sa.Integer(), nullable=False),
+        sa.Column('watermark', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id')
+    )
+
+
+def downgrade():
+    op.drop_table('demand_smoothing_states')
@@ -0,0 +1,62 @@
+import { useEffect, useRef } from 'react';
+
+/**
+ * Событие потока изменений сервера
+ */
+export interface StreamEvent<T = any> {
+  id: number;
+  event_type: string;
+  aggregate_type: string;
+  aggregate_id: number;
+  payload: T;
+  created_at: string | null;
+}
+
+type StreamHandlers = Record<string, (event: StreamEvent) => void>;
+
+// Пауза перед переподключением после закрытия потока (например, истек токен)
+const RECONNECT_DELAY_MS = 5000;
+
+/**
+ * Хук подписки на поток событий сервера (Server-Sent Events)
+ * @param handlers - Обработчики по типу события (order.created, order.status_changed, stock.changed, report.finished)
+ */
+export const useEventStream = (handlers: StreamHandlers) => {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    let source: EventSource | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const listener = (event: Event) => {
+      const data: StreamEvent = JSON.parse((event as MessageEvent).data);
+      handlersRef.current[data.event_type]?.(data);
+    };
+
+    const connect = () => {
+      const token = localStorage.getItem('access_token');
+      if (!token || closed) return;
+
+      // EventSource не передает заголовки, поэтому токен передается параметром
+      source = new EventSource(`/api/events/stream?token=${encodeURIComponent(token)}`);
+      Object.keys(handlersRef.current).forEach((type) => source?.addEventListener(type, listener));
+
+      source.onerror = () => {
+        // Обрывы соединения EventSource восстанавливает сам, закрытый поток открываем заново
+        if (source?.readyState === EventSource.CLOSED && !closed) {
+          reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+        }
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      source?.close();
+    };
+  }, []);
+};
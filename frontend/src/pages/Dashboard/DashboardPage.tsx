@@ -26,6 +26,7 @@ import {
 } from '@mui/icons-material';
 
 import { apiService } from '../../services/api';
+import { useEventStream, StreamEvent } from '../../hooks/useEventStream';
 import { useStores } from '../../store';
 import { Product, Order, OrderStatus } from '../../types/models';
 import StatisticsCards from '../../components/AntComponents/StatisticsCards';
@@ -213,7 +214,7 @@ const DashboardPage: React.FC = () => {
         
         setStats({
           totalProducts: products.length,
-          lowStockCount: lowStockProducts.length,
+          lowStockCount: (lowStockResponse.data.products || []).length,
           totalOrders: allOrders.length,
           pendingOrders: pendingOrders.length,
         });
@@ -226,7 +227,43 @@ const DashboardPage: React.FC = () => {
     };
     
     fetchDashboardData();
-  }, [uiStore, t, lowStockProducts.length]);
+  }, [uiStore, t]);
+
+  useEffect(() => {
+    setStats((stats) => ({ ...stats, lowStockCount: lowStockProducts.length }));
+  }, [lowStockProducts.length]);
+
+  // Живые обновления вместо периодического опроса
+  useEventStream({
+    'stock.changed': ({ payload }: StreamEvent) => {
+      setLowStockProducts((current) => {
+        const others = current.filter((product) => product.id !== payload.product_id);
+        const existing = current.find((product) => product.id === payload.product_id);
+        return payload.new_quantity <= payload.min_stock
+          ? [...others, { ...existing, id: payload.product_id, name: payload.name, sku: payload.sku, quantity: payload.new_quantity, min_stock: payload.min_stock } as Product]
+          : others;
+      });
+    },
+    'order.created': ({ payload }: StreamEvent) => {
+      setStats((stats) => ({
+        ...stats,
+        totalOrders: stats.totalOrders + 1,
+        pendingOrders: stats.pendingOrders + (payload.status === OrderStatus.PENDING ? 1 : 0),
+      }));
+      apiService.orders.getAll({ limit: 5 }).then((response) => setRecentOrders(response.data || []));
+    },
+    'order.status_changed': ({ payload }: StreamEvent) => {
+      setStats((stats) => ({
+        ...stats,
+        pendingOrders: stats.pendingOrders
+          - (payload.old_status === OrderStatus.PENDING ? 1 : 0)
+          + (payload.status === OrderStatus.PENDING ? 1 : 0),
+      }));
+      setRecentOrders((current) => current.map((order) => (
+        order.id === payload.order_id ? { ...order, status: payload.status } : order
+      )));
+    },
+  });
 
   return (
     <Box>
@@ -184,6 +184,12 @@ export const apiService = {
     get: (id: number) => 
       api.get(`/orders/${id}`),
     
+    getByProduct: (params: { product_id?: number; sku?: string; status?: string; start_date?: string; end_date?: string; page?: number; per_page?: number }) => 
+      api.get('/orders/by-product', { params }),
+    
+    getProductCounts: (productIds: number[]) => 
+      api.get('/orders/product-counts', { params: { product_ids: productIds.join(',') } }),
+    
     create: (data: any) => 
       api.post('/orders', data),
     
@@ -202,6 +208,9 @@ export const apiService = {
         },
       });
     },
+    
+    downloadFile: (orderId: number, fileId: number) => 
+      api.get(`/orders/${orderId}/files/${fileId}/download`, { responseType: 'blob' }),
   },
 
   // Интеграции